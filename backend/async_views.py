@@ -0,0 +1,66 @@
+from asgiref.sync import SyncToAsync
+from django.db import close_old_connections
+from rest_framework.views import APIView
+
+
+class DatabaseSyncToAsync(SyncToAsync):
+    """sync_to_async for ORM work from async views (as in Django Channels).
+
+    Calls run in the shared executor instead of a thread per request, so
+    requests parked on network I/O don't each pin a thread and a database
+    connection. Connections that are broken or past CONN_MAX_AGE are
+    closed around each call, since no request_finished signal reaches
+    these threads.
+    """
+
+    def thread_handler(self, loop, *args, **kwargs):
+        close_old_connections()
+        try:
+            return super().thread_handler(loop, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+
+def database_sync_to_async(func):
+    return DatabaseSyncToAsync(func, thread_sensitive=False)
+
+
+class AsyncViewMixin:
+    """Run an APIView's handlers as coroutines.
+
+    Handlers (``async def post(...)``) run on the event loop, so a request
+    waiting on network I/O holds no thread under an ASGI server.
+    Authentication, permission and throttle checks touch the database and
+    the cache, so ``initial()`` runs through ``database_sync_to_async``;
+    handlers must do the same for ORM work. Under WSGI, Django runs the
+    view in an event loop of its own.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await database_sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            # OPTIONS and 405 handlers are inherited synchronous methods
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncViewMixin, APIView):
+    pass
@@ -0,0 +1,332 @@
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .routers import primary_reads
+
+logger = logging.getLogger('backend')
+
+VERSION_KEY = 'cache:version:{}'
+LOCK_KEY = 'cache:lock:{}'
+# Counts deletes of a key, so a build that overlapped one doesn't store its value
+DELETED_KEY = 'cache:deleted:{}'
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+# Number of per-process locks keys are spread over for single-flight builds
+LOCK_STRIPES = 64
+
+namespaces = {}
+
+
+class LocalLRU:
+    """Bounded in-process cache with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache:
+    """A cache namespace with an in-process LRU in front of the shared cache.
+
+    Keys are prefixed with the namespace and its version, so
+    ``invalidate_all()`` drops every key at once by bumping the version.
+    Deletes and version bumps are published over Redis pub/sub so other
+    processes drop their local copies; a missed message is made up for
+    within CACHE_LOCAL_TIMEOUT seconds, when the version is re-read. Without
+    REDIS_URL the shared tier is per process too, which is only right for
+    a single development server (see backend.checks).
+
+    ``get_or_set`` protects hot keys from stampedes. A value close to
+    expiry is recomputed early by one caller with a probability that
+    grows as expiry nears (the larger the build time, the earlier), while
+    everyone else keeps getting the cached value. On a hard miss only one
+    caller per key builds the value: other threads wait on a lock, and
+    other processes wait for the shared cache to fill while a lock key is
+    held. A build that a ``delete()`` overlapped may have read the old
+    rows, so its value is returned but not stored. Hit ratios are
+    exported per namespace as cache_requests_total.
+    """
+
+    lock_timeout = 10
+    early_expiry_beta = 1.0
+    # How long a delete is remembered; builds are expected to finish well within it
+    deleted_timeout = 60
+
+    def __init__(self, namespace, timeout, max_entries=1000):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local = LocalLRU(max_entries)
+        self.version_value = None
+        self.version_checked_at = 0
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        namespaces[namespace] = self
+
+    @property
+    def local_timeout(self):
+        return settings.CACHE_LOCAL_TIMEOUT
+
+    def version(self):
+        """Current version of the namespace, re-read from the shared cache every local timeout"""
+        if self.version_value is None or time.monotonic() - self.version_checked_at > self.local_timeout:
+            key = VERSION_KEY.format(self.namespace)
+            version = cache.get(key)
+            if version is None:
+                cache.add(key, 1, None)
+                version = cache.get(key, 1)
+            self.version_value, self.version_checked_at = version, time.monotonic()
+        return self.version_value
+
+    def make_key(self, key):
+        invalidator.ensure_started()
+        return f'{self.namespace}:{self.version()}:{key}'
+
+    def lookup(self, full_key, record=True):
+        # Entries are (value, expires_at, build_seconds)
+        entry = self.local.get(full_key)
+        result = 'local_hit'
+        if entry is None:
+            entry = cache.get(full_key)
+            result = 'shared_hit'
+            if entry is None:
+                result = 'miss'
+            else:
+                self.store_local(full_key, entry)
+        if record:
+            metrics.cache_requests_total.inc(namespace=self.namespace, result=result)
+        return entry
+
+    def store_local(self, full_key, entry):
+        remaining = entry[1] - time.time()
+        if remaining > 0:
+            self.local.set(full_key, entry, min(self.local_timeout, remaining))
+
+    def store(self, full_key, value, timeout, build_seconds=0.0):
+        timeout = self.timeout if timeout is None else timeout
+        entry = (value, time.time() + timeout, build_seconds)
+        cache.set(full_key, entry, timeout)
+        self.store_local(full_key, entry)
+
+    def get(self, key, default=None):
+        entry = self.lookup(self.make_key(key))
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=None):
+        self.store(self.make_key(key), value, timeout)
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        self.mark_deleted(full_key)
+        cache.delete(full_key)
+        self.local.delete(full_key)
+        publish(self.namespace, full_key)
+
+    def delete_many(self, keys):
+        full_keys = [self.make_key(key) for key in keys]
+        for full_key in full_keys:
+            self.mark_deleted(full_key)
+        cache.delete_many(full_keys)
+        for full_key in full_keys:
+            self.local.delete(full_key)
+            publish(self.namespace, full_key)
+
+    def mark_deleted(self, full_key):
+        # Written before the entry is deleted, so a build storing after the delete sees it
+        key = DELETED_KEY.format(full_key)
+        if not cache.add(key, 1, self.deleted_timeout):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, self.deleted_timeout)
+
+    def invalidate_all(self):
+        """Orphan every key of the namespace; they expire from the shared cache on their own"""
+        key = VERSION_KEY.format(self.namespace)
+        if not cache.add(key, 2, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 2, None)
+        self.drop_local()
+        publish(self.namespace, None)
+
+    def drop_local(self):
+        self.local.clear()
+        self.version_value = None
+
+    def expiring_early(self, entry):
+        # Probabilistic early expiration ("XFetch")
+        value, expires_at, build_seconds = entry
+        if not build_seconds:
+            return False
+        return time.time() - build_seconds * self.early_expiry_beta * math.log(random.random()) >= expires_at
+
+    def build(self, full_key, builder, timeout):
+        start = time.perf_counter()
+        deleted_key = DELETED_KEY.format(full_key)
+        deletes = cache.get(deleted_key)
+        # Entries are shared, so they are built from the primary's rows
+        with primary_reads():
+            value = builder()
+        if cache.get(deleted_key) != deletes:
+            return value
+        self.store(full_key, value, timeout, time.perf_counter() - start)
+        if cache.get(deleted_key) != deletes:
+            # Deleted between the check and the store
+            cache.delete(full_key)
+            self.local.delete(full_key)
+        return value
+
+    def get_or_set(self, key, builder, timeout=None):
+        """Return the cached value for key, calling builder() to fill a miss"""
+        full_key = self.make_key(key)
+        entry = self.lookup(full_key)
+        if entry is not None:
+            if not self.expiring_early(entry):
+                return entry[0]
+            metrics.cache_requests_total.inc(namespace=self.namespace, result='early_refresh')
+            return self.build(full_key, builder, timeout)
+
+        with self.locks[zlib.crc32(full_key.encode()) % LOCK_STRIPES]:
+            # Another thread may have filled it while we waited
+            entry = self.lookup(full_key, record=False)
+            if entry is not None:
+                return entry[0]
+
+            lock_key = LOCK_KEY.format(full_key)
+            if cache.add(lock_key, os.getpid(), self.lock_timeout):
+                try:
+                    return self.build(full_key, builder, timeout)
+                finally:
+                    cache.delete(lock_key)
+
+            entry = self.wait_for(full_key, lock_key)
+            if entry is not None:
+                return entry[0]
+            return self.build(full_key, builder, timeout)
+
+    def wait_for(self, full_key, lock_key):
+        """Poll while another process builds the value, giving up when its lock goes away"""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            entry = cache.get(full_key)
+            if entry is not None:
+                self.store_local(full_key, entry)
+                return entry
+            if cache.get(lock_key) is None:
+                return None
+            delay = min(delay * 2, 0.2)
+        return None
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every process, rather than a per-process LocMem"""
+    return settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def clear_local_caches():
+    """Drop every namespace's local tier in this process"""
+    for namespace in namespaces.values():
+        namespace.drop_local()
+
+
+class Invalidator:
+    """Redis pub/sub fan-out of deletes to the local tiers of every process"""
+
+    def __init__(self):
+        self.client = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self):
+        # Started lazily, and again in forked workers
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.client = None
+            if not settings.CACHE_REDIS_URL:
+                return
+            self.client = redis.Redis.from_url(settings.CACHE_REDIS_URL, socket_connect_timeout=0.5)
+            threading.Thread(target=self.listen, name='cache-invalidation', daemon=True).start()
+
+    def publish(self, namespace, full_key):
+        self.ensure_started()
+        if self.client is None:
+            return
+        try:
+            self.client.publish(INVALIDATION_CHANNEL, json.dumps({'namespace': namespace, 'key': full_key}))
+        except redis.RedisError as e:
+            logger.warning('Could not publish cache invalidation: %s', e)
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected is lost
+                clear_local_caches()
+                for message in pubsub.listen():
+                    self.apply(json.loads(message['data']))
+            except redis.RedisError as e:
+                logger.warning('Cache invalidation listener disconnected: %s', e)
+                time.sleep(1)
+
+    @staticmethod
+    def apply(message):
+        namespace = namespaces.get(message['namespace'])
+        if namespace is None:
+            return
+        if message['key'] is None:
+            namespace.drop_local()
+        else:
+            namespace.local.delete(message['key'])
+
+
+invalidator = Invalidator()
+
+
+def publish(namespace, full_key):
+    invalidator.publish(namespace, full_key)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def require_shared_state():
+    """Refuse to serve from workers that would each keep their own copy of shared state.
+
+    The cache, rate limit buckets, token blacklist markers and replica pins
+    live in Redis. Without it they are per process, which is only right
+    for a single development server.
+    """
+    if settings.DEBUG or settings.REDIS_URL:
+        return
+    raise ImproperlyConfigured(
+        'REDIS_URL must be set when DEBUG is off: caches, rate limits, '
+        'token blacklist markers and replica pins are shared through Redis'
+    )
@@ -0,0 +1,273 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds between writes of this process's samples to the multiprocess directory
+FLUSH_INTERVAL = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Registry:
+    """Process-local metric samples, shared between workers through files.
+
+    Each process keeps its samples in memory and periodically rewrites
+    ``<METRICS_DIR>/metrics-<pid>-<token>.json``; the ``/metrics`` view
+    sums the files of every worker, including ones that have exited, so
+    counters never go backwards when gunicorn recycles a worker. The
+    random token keeps a worker that reuses a dead worker's pid from
+    overwriting its file. The directory is emptied when the gunicorn
+    master starts (see gunicorn.conf.py), so a restart starts every
+    counter from zero. Without a directory only the serving process is
+    reported.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.samples = {}
+        self.lock = threading.Lock()
+        # Held while writing this process's file, so threads don't write it at once
+        self.flush_lock = threading.Lock()
+        self.pid = os.getpid()
+        self.token = uuid.uuid4().hex[:12]
+        self.last_flush = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _check_fork(self):
+        # A forked worker must not report the parent's samples as its own
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid = pid
+            self.token = uuid.uuid4().hex[:12]
+            self.samples = {}
+            self.last_flush = 0.0
+
+    def add(self, name, labels, amount):
+        with self.lock:
+            self._check_fork()
+            key = (name, labels)
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def observe(self, name, labels, buckets, value):
+        with self.lock:
+            self._check_fork()
+            key = (name, labels)
+            sample = self.samples.get(key)
+            if sample is None:
+                # Per-bucket counts (the last one is +Inf), then sum and count
+                sample = self.samples[key] = [0] * (len(buckets) + 3)
+            sample[bisect_left(buckets, value)] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', '')
+
+    def path(self):
+        return os.path.join(self.directory, f'metrics-{self.pid}-{self.token}.json')
+
+    def dump(self):
+        with self.lock:
+            self._check_fork()
+            return [[name, list(labels), value] for (name, labels), value in self.samples.items()]
+
+    def flush(self, force=False):
+        if not self.directory:
+            return
+        # Another thread writing the file now will include our samples
+        if not self.flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self.last_flush < FLUSH_INTERVAL:
+                return
+            self.last_flush = now
+            samples = self.dump()
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path()
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(samples, f, separators=(',', ':'))
+            os.replace(temporary, path)
+        finally:
+            self.flush_lock.release()
+
+    def collect(self):
+        """Samples summed over every process that has written metrics"""
+
+        if not self.directory:
+            return {(name, tuple(labels)): value for name, labels, value in self.dump()}
+
+        self.flush(force=True)
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in rows:
+                key = (name, tuple(labels))
+                if isinstance(value, list):
+                    current = merged.setdefault(key, [0] * len(value))
+                    for index, part in enumerate(value):
+                        current[index] += part
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self):
+        samples = {}
+        for (name, labels), value in self.collect().items():
+            samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, value in sorted(samples.get(name, ())):
+                lines.extend(metric.render(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush(force=True))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value):
+    if isinstance(value, float) and value != int(value):
+        return repr(value)
+    return str(int(value))
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        registry.add(self.name, tuple(str(labels[name]) for name in self.labelnames), amount)
+
+    def render(self, labels, value):
+        yield f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}'
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        registry.observe(
+            self.name, tuple(str(labels[name]) for name in self.labelnames), self.buckets, value
+        )
+
+    def time(self, **labels):
+        return Timer(self, labels)
+
+    def render(self, labels, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value[:-2]):
+            cumulative += count
+            le = format_labels(self.labelnames, labels, [('le', bound)])
+            yield f'{self.name}_bucket{le} {cumulative}'
+        label_text = format_labels(self.labelnames, labels)
+        yield f'{self.name}_sum{label_text} {format_value(value[-2])}'
+        yield f'{self.name}_count{label_text} {value[-1]}'
+
+
+class Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+# HTTP and database, recorded by backend.middleware.MetricsMiddleware
+http_requests_total = Counter(
+    'http_requests_total', 'Requests by URL pattern, method and status', ('view', 'method', 'status')
+)
+http_request_duration_seconds = Histogram(
+    'http_request_duration_seconds', 'Request latency by URL pattern', ('view', 'method')
+)
+http_response_size_bytes = Histogram(
+    'http_response_size_bytes', 'Response body size by URL pattern', ('view',), buckets=SIZE_BUCKETS
+)
+db_queries_per_request = Histogram(
+    'db_queries_per_request', 'Database queries issued per request', ('view',), buckets=QUERY_BUCKETS
+)
+db_query_seconds_per_request = Histogram(
+    'db_query_seconds_per_request', 'Time spent in database queries per request', ('view',)
+)
+
+# Judge0, recorded by submissions.judge0_service.Judge0Service
+judge0_requests_total = Counter(
+    'judge0_requests_total', 'Judge0 API calls by operation and outcome', ('operation', 'outcome')
+)
+judge0_request_duration_seconds = Histogram(
+    'judge0_request_duration_seconds', 'Judge0 API call latency', ('operation',)
+)
+judge0_results_total = Counter(
+    'judge0_results_total', 'Finished Judge0 executions by verdict and language', ('status', 'language')
+)
+judge0_wait_seconds = Histogram(
+    'judge0_wait_seconds', 'Time from submitting to Judge0 until a result is available', ('language',)
+)
+
+# Caches, recorded by backend.cache.TieredCache; hit ratio per namespace is
+# sum(rate(cache_requests_total{result=~".*_hit"}[5m])) by (namespace) / sum(rate(cache_requests_total[5m])) by (namespace)
+cache_requests_total = Counter(
+    'cache_requests_total', 'Cache lookups by namespace and result (local_hit, shared_hit, miss, early_refresh)',
+    ('namespace', 'result')
+)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of every worker's metrics"""
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,230 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware as BaseMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as BaseSessionMiddleware
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfViewMiddleware
+from rest_framework.permissions import SAFE_METHODS
+
+from . import metrics, routers
+
+API_PATH_PREFIX = '/api/'
+
+
+class APIExemptMixin:
+    """Let /api/ requests bypass this middleware.
+    
+    The API authenticates with JWT bearer tokens, so sessions, CSRF and
+    messages are pure overhead there; DRF sets ``request.user`` itself.
+    In async mode both branches return a coroutine.
+    """
+    
+    def __call__(self, request):
+        if request.path_info.startswith(API_PATH_PREFIX):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(APIExemptMixin, BaseSessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(APIExemptMixin, BaseCsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(APIExemptMixin, BaseAuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(APIExemptMixin, BaseMessageMiddleware):
+    pass
+
+
+class QueryRecorder:
+    """Counts the queries and query time of the block it is recording"""
+    
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = [] if keep_sql else None
+    
+    def add(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        if self.queries is not None:
+            self.queries.append({'sql': sql, 'time': f'{duration:.3f}'})
+
+
+_query_recorders = ContextVar('query_recorders', default=())
+
+
+def record_queries(execute, sql, params, many, context):
+    # Installed on every connection. The active recorders follow the
+    # context into sync_to_async threads, which have their own connections
+    recorders = _query_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for recorder in recorders:
+            recorder.add(sql, duration)
+
+
+@contextmanager
+def recording_queries(recorder):
+    """Send every query run in this context, on any thread, to recorder"""
+    token = _query_recorders.set(_query_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _query_recorders.reset(token)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+for _connection in connections.all(initialized_only=True):
+    install_query_recorder(None, _connection)
+
+
+class MetricsMiddleware:
+    """Record latency, response size and database usage for every request.
+    
+    Requests are labelled with the route of the URL pattern that matched
+    (``/api/problems/<int:pk>/``), never the raw path, so label
+    cardinality stays bounded by ``backend/urls.py``.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with recording_queries(QueryRecorder()) as recorder:
+            response = self.get_response(request)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+    
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with recording_queries(QueryRecorder()) as recorder:
+            response = await self.get_response(request)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+    
+    def record(self, request, response, recorder, duration):
+        view = self.get_view_label(request)
+        if view != '/metrics':
+            metrics.http_requests_total.inc(view=view, method=request.method, status=response.status_code)
+            metrics.http_request_duration_seconds.observe(duration, view=view, method=request.method)
+            if not response.streaming:
+                metrics.http_response_size_bytes.observe(len(response.content), view=view)
+            metrics.db_queries_per_request.observe(recorder.count, view=view)
+            metrics.db_query_seconds_per_request.observe(recorder.duration, view=view)
+        metrics.registry.flush()
+    
+    @staticmethod
+    def get_view_label(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        return '/' + match.route
+
+
+class ReplicaRoutingMiddleware:
+    """Route the reads of safe API requests to a read replica (see backend/routers.py).
+    
+    A successful unsafe request by an authenticated user pins that user to
+    the primary for a while, so they read their own writes.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = routers.start_request(self.reads_from_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(token)
+        self.pin_writer(request, response, state)
+        return response
+    
+    async def __acall__(self, request):
+        state, token = routers.start_request(self.reads_from_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end_request(token)
+        self.pin_writer(request, response, state)
+        return response
+    
+    @staticmethod
+    def reads_from_replica(request):
+        # Admin and session pages aren't pinned after writes, so they stay on the primary
+        return request.method in SAFE_METHODS and request.path_info.startswith(API_PATH_PREFIX)
+    
+    @staticmethod
+    def pin_writer(request, response, state):
+        if request.method in SAFE_METHODS or state.user_id is None or response.status_code >= 400:
+            return
+        routers.pin_to_primary(state.user_id)
+
+
+class RateLimitHeadersMiddleware:
+    """Add RateLimit-* headers to responses of rate limited views"""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+    
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+    
+    @staticmethod
+    def add_headers(request, response):
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            response['RateLimit-Limit'] = rate_limit.limit
+            response['RateLimit-Remaining'] = rate_limit.remaining
+            response['RateLimit-Reset'] = rate_limit.reset
+        return response
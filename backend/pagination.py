@@ -0,0 +1,321 @@
+import json
+import math
+from base64 import b64decode, b64encode
+from urllib.parse import urlsplit, urlunsplit
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Counts stop here instead of scanning every row
+COUNT_LIMIT = 10000
+
+
+def capped_count(queryset, limit=None):
+    """COUNT(*) over at most limit rows, COUNT_LIMIT by default, returning (count, is_approximate)"""
+    limit = limit or COUNT_LIMIT
+    count = queryset.order_by()[:limit].count()
+    return count, count >= limit
+
+
+def relative_links(data):
+    """Paginated response data with next/previous reduced to path and query, so it can be shared across hosts"""
+    if not isinstance(data, dict):
+        return data
+    return {
+        name: urlunsplit(('', '', *urlsplit(value)[2:])) if name in ('next', 'previous') and value else value
+        for name, value in data.items()
+    }
+
+
+def absolute_links(data, request):
+    """Undo relative_links for the host of this request"""
+    if not isinstance(data, dict):
+        return data
+    return {
+        name: request.build_absolute_uri(value) if name in ('next', 'previous') and value else value
+        for name, value in data.items()
+    }
+
+
+class ApproximatePageNumberPagination(PageNumberPagination):
+    """Page number pagination whose count is exact unless the client passes ``?count=approximate``.
+
+    An approximate count stops at COUNT_LIMIT rows, so deep pages don't
+    cost a full COUNT(*). Pages are then read by offset, with one extra
+    row telling whether another page follows, and the response says
+    whether the count was capped.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    approximate_count = 'approximate'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate = None
+        if request.query_params.get(self.count_query_param) != self.approximate_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.count, self.approximate = capped_count(queryset)
+        self.number = self.get_approximate_page_number(request, page_size)
+
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_approximate_page_number(self, request, page_size):
+        number = request.query_params.get(self.page_query_param) or 1
+        # The last page can't be found from a capped count
+        if number in self.last_page_strings and not self.approximate:
+            return max(math.ceil(self.count / page_size), 1)
+        try:
+            number = int(number)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if number < 1:
+            raise NotFound(self.invalid_page_message)
+        return number
+
+    def get_paginated_response(self, data):
+        if self.approximate is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'count_approximate': self.approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_approximate'] = {'type': 'boolean'}
+        return response_schema
+
+    def get_next_link(self):
+        if self.approximate is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.approximate is None:
+            return super().get_previous_link()
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on an ordering keyset ending in a unique column.
+
+    Each page is a single indexed range scan (``WHERE (created_at, id) <
+    (...) ORDER BY ... LIMIT n``) with no COUNT(*) or OFFSET. Responses
+    keep page number pagination, and its exact count, unless the client
+    asks for cursors with ``?pagination=cursor``; cursor pages include a
+    capped count when ``?count=true`` is passed. Page number clients can
+    opt into a capped count with ``?count=approximate``.
+
+    Cursors follow the queryset's ordering when the view set one (e.g.
+    OrderingFilter), with ``id`` appended as the tiebreaker. Orderings on
+    expressions, such as search relevance, can't be paged by cursor.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    mode_query_param = 'pagination'
+
+    # Used when the queryset isn't ordered; the last field must be unique so
+    # every row has a distinct position
+    ordering = ('-created_at', '-id')
+    # 'cursor' or 'page' when the request doesn't say
+    default_mode = 'page'
+    page_number_class = ApproximatePageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if not self.use_cursor(request):
+            self.fallback = self.page_number_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        self.keyset = self.get_keyset(queryset)
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true', 'approximate'):
+            self.count = capped_count(queryset)
+
+        fields, deferred = queryset.query.deferred_loading
+        names = {field.lstrip('-') for field in self.keyset}
+        if fields and not deferred and not names <= fields:
+            # Projected querysets still load the columns positions are read from
+            queryset = queryset.only(*fields, *names)
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.get_ordering(reverse)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, ordering))
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+
+        self.first = self.get_position(rows[0]) if rows else position
+        self.last = self.get_position(rows[-1]) if rows else position
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            response['count'], response['count_approximate'] = self.count
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def use_cursor(self, request):
+        params = request.query_params
+        if self.cursor_query_param in params:
+            return True
+        if self.mode_query_param in params:
+            return params[self.mode_query_param] == 'cursor'
+        if self.page_number_class.page_query_param in params:
+            return False
+        return self.default_mode == 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_keyset(self, queryset):
+        """Fields the cursor orders on: the queryset's ordering plus a primary key tiebreaker"""
+
+        ordering = queryset.query.order_by
+        if not ordering:
+            return tuple(self.ordering)
+        opts = queryset.model._meta
+        keyset = []
+        for field in ordering:
+            # Expressions (search relevance) and nullable or related columns have no usable position
+            try:
+                name = field.lstrip('-')
+                model_field = opts.pk if name == 'pk' else opts.get_field(name)
+            except (AttributeError, FieldDoesNotExist):
+                model_field = None
+            if model_field is None or not model_field.concrete or model_field.null:
+                raise ValidationError({
+                    self.mode_query_param: 'Cursor pagination is not available for this ordering '
+                                           'or search; use page numbers instead.'
+                })
+            keyset.append(('-' if field.startswith('-') else '') + model_field.attname)
+        if keyset[-1].lstrip('-') != opts.pk.attname:
+            keyset.append(('-' if keyset[-1].startswith('-') else '') + opts.pk.attname)
+        return tuple(keyset)
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.keyset
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in self.keyset)
+
+    def get_position(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.keyset]
+
+    def get_position_filter(self, position, ordering):
+        """Rows strictly after position: (a, b) > (x, y) as a OR of prefixes"""
+
+        condition = Q(pk__in=[])
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[index]})
+            for previous_field, value in zip(ordering[:index], position[:index]):
+                term &= Q(**{previous_field.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]}
+        if self.keyset != tuple(self.ordering):
+            payload['o'] = list(self.keyset)
+        if reverse:
+            payload['r'] = 1
+        cursor = b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(
+            remove_query_param(self.base_url, self.mode_query_param),
+            self.cursor_query_param,
+            cursor
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode()).decode())
+            values = payload['p']
+            # A cursor is only valid for the ordering it was made with
+            if tuple(payload.get('o', self.ordering)) != self.keyset or len(values) != len(self.keyset):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset, values)
+            ]
+        except Exception:
+            raise NotFound('Invalid cursor')
+        return position, bool(payload.get('r'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
@@ -0,0 +1,56 @@
+class SparseFieldsSerializerMixin:
+    """Serializer that keeps only the fields passed as ``fields=``"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """List view that honours ``?fields=a,b`` in both the response and the query.
+
+    Requested serializer fields are mapped to the model columns they read,
+    the queryset loads only those columns with ``only()`` and joins the
+    related rows they traverse with ``select_related()``. Without the
+    parameter every serializer field is returned, still loading only the
+    columns the serializer uses.
+    """
+
+    fields_query_param = 'fields'
+    # Serializer field -> ORM paths it reads; unlisted fields read themselves
+    field_sources = {}
+    always_load = ('id',)
+
+    def get_requested_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None
+        value = request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        available = self.get_serializer_class().Meta.fields
+        requested = [name for name in (part.strip() for part in value.split(',')) if name in available]
+        return requested or None
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def project_queryset(self, queryset):
+        fields = self.get_requested_fields() or self.get_serializer_class().Meta.fields
+
+        paths = set(self.always_load)
+        for name in fields:
+            paths.update(self.field_sources.get(name, (name,)))
+
+        # A traversed relation must itself be loaded to be joined
+        relations = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        paths.update(relations)
+        if relations:
+            queryset = queryset.select_related(*sorted(relations))
+        return queryset.only(*sorted(paths))
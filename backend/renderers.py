@@ -0,0 +1,20 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson straight to bytes.
+    
+    Output matches the stock renderer: datetimes, decimals and other
+    non-native types still go through DRF's encoder. Indented output
+    (e.g. ``Accept: application/json; indent=4``) uses the stock path.
+    """
+    
+    orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
@@ -0,0 +1,91 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY = 'db:primary:{}'
+
+_routing = ContextVar('db_routing', default=None)
+
+
+class ReadRouting:
+    """Where the reads of one request go: a replica, or the primary once pinned"""
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.user_id = None
+
+
+def start_request(safe):
+    """Routing state for a request; only safe requests read from a replica"""
+    replicas = settings.DATABASE_REPLICAS
+    # One replica per request, so its reads see a single point in time
+    state = ReadRouting(random.choice(replicas) if safe and replicas else None)
+    return state, _routing.set(state)
+
+
+def end_request(token):
+    _routing.reset(token)
+
+
+def note_user(user_id):
+    """Called by authentication, before it loads the user: reads of pinned users stay on the primary"""
+    state = _routing.get()
+    if state is None:
+        return
+    state.user_id = user_id
+    if state.replica and cache.get(PIN_KEY.format(user_id)):
+        state.replica = None
+
+
+def pin_to_primary(user_id):
+    """Keep a user's reads on the primary until replicas have caught up with their writes"""
+    if not settings.DATABASE_REPLICAS:
+        return
+    cache.set(PIN_KEY.format(user_id), 1, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, for data that outlives the request.
+
+    Shared cache entries and per-process indexes built from a lagging
+    replica would keep serving pre-write rows after their invalidation.
+    """
+    state = _routing.get()
+    if state is None or state.replica is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+class PrimaryReplicaRouter:
+    """Send reads of safe requests to a replica, everything else to the primary.
+
+    Writes, reads of unsafe requests and any query outside a request
+    (management commands, workers) use ``default``. A user who wrote
+    something is pinned to the primary for DATABASE_REPLICA_PIN_SECONDS,
+    so their next reads see it despite replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.replica is None:
+            return 'default'
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -15,6 +15,8 @@ import os
 import dj_database_url
 from dotenv import load_dotenv
 from datetime import timedelta
+from importlib.util import find_spec
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables
 load_dotenv()
@@ -31,8 +33,7 @@ SECRET_KEY = os.getenv(
     'SECRET_KEY', 'django-insecure-default-key-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-# DEBUG = os.getenv('DEBUG', 'True') == 'True'
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1',
                  '3292wq-8000.csb.app', '*.codesandbox.io', '*']
@@ -62,14 +63,19 @@ INSTALLED_APPS = [
     'submissions',
 ]
 
+# Session, CSRF, auth and messages middleware are skipped for /api/ paths
+# (see backend/middleware.py), since the API authenticates with JWT
 MIDDLEWARE = [
+    'backend.middleware.MetricsMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
+    'backend.middleware.RateLimitHeadersMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'backend.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'backend.middleware.CsrfViewMiddleware',
+    'backend.middleware.AuthenticationMiddleware',
+    'backend.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -112,6 +118,73 @@ DATABASES = {
     )
 }
 
+# Read replicas as comma-separated URLs, added as replica1, replica2, ...
+# Safe API requests read from one of them (see backend/routers.py)
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=600, conn_health_checks=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['backend.routers.PrimaryReplicaRouter']
+# Seconds a user's reads stay on the primary after they write (needs a shared cache)
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '10'))
+
+# Gunicorn workers (gunicorn reads the same variable)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '4'))
+# Connections this deployment may open per database server, shared by its workers
+DATABASE_MAX_CONNECTIONS = int(os.getenv('DATABASE_MAX_CONNECTIONS', '80'))
+
+# With psycopg_pool installed, each worker keeps a pool per Postgres database
+# instead of one persistent connection per thread: async views run their
+# queries on executor threads, which would otherwise each hold a connection
+if os.getenv('DATABASE_POOL', 'True') == 'True' and find_spec('psycopg_pool'):
+    for database in DATABASES.values():
+        if database.get('ENGINE') == 'django.db.backends.postgresql':
+            database['CONN_MAX_AGE'] = 0  # connections go back to the pool
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': 2,
+                'max_size': max(2, DATABASE_MAX_CONNECTIONS // WEB_CONCURRENCY),
+                'timeout': 10,
+            }
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+# The cache, rate limit buckets, token blacklist markers and replica pins
+# must be seen by every worker. Without Redis they live in each process,
+# which is only right for one process: the ASGI/WSGI entry points refuse
+# to serve that way unless DEBUG is on (backend.checks).
+if REDIS_URL and not find_spec('redis'):
+    raise ImproperlyConfigured('REDIS_URL is set but redis-py is not installed')
+
+# Shared by every worker when Redis is configured; backend.cache layers an
+# in-process LRU per namespace on top
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'leetcode',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a value may be served from a process's local tier; pub/sub
+# invalidation usually drops it sooner
+CACHE_LOCAL_TIMEOUT = int(os.getenv('CACHE_LOCAL_TIMEOUT', '5'))
+# Redis used for cross-process invalidation of local tiers
+CACHE_REDIS_URL = REDIS_URL
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -150,6 +223,16 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies plus .gz/.br sidecars, served by nginx
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'backend.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -163,20 +246,39 @@ AUTH_USER_MODEL = 'users.User'
 
 # Django REST Framework
 REST_FRAMEWORK = {
+    # orjson-backed when installed; the browsable API is only served in DEBUG
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+        'backend.renderers.FastJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Only views that set throttle_scope are limited, see RATE_LIMITS
+    'DEFAULT_THROTTLE_CLASSES': [
+        'backend.throttling.TokenBucketThrottle',
+    ],
+    # Proxies in front of Django (nginx: 1); client IPs are read from X-Forwarded-For
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.getenv('NUM_PROXIES') else None,
 }
 
+# Token-bucket rate limits per throttle_scope, per authenticated user and
+# per client IP. Override without a redeploy with manage.py set_rate_limit.
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMITS = {
+    'run_code': {'user': '20/min', 'ip': '60/min'},
+    'submit': {'user': '10/min', 'ip': '30/min'},
+    'auth': {'ip': '20/min'},
+}
+# Buckets are shared through Redis; per-process buckets are for a single DEBUG process
+RATE_LIMIT_REDIS_URL = REDIS_URL
+# Seconds before overrides set in the shared cache reach every process
+RATE_LIMIT_OVERRIDES_TTL = int(os.getenv('RATE_LIMIT_OVERRIDES_TTL', '10'))
+
 # Simple JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -189,6 +291,9 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
 
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
@@ -198,6 +303,18 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Seconds an authenticated user stays cached per process (0 disables)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+# Back the per-process user cache with the shared cache
+AUTH_USER_CACHE_SHARED = os.getenv('AUTH_USER_CACHE_SHARED', 'False') == 'True'
+# Let read-only views opting in trust the user snapshot in the access token
+AUTH_TOKEN_SNAPSHOT = os.getenv('AUTH_TOKEN_SNAPSHOT', 'False') == 'True'
+
+# Seconds between rebuilds of the in-memory token blacklist filter
+TOKEN_BLACKLIST_FILTER_REFRESH = int(os.getenv('TOKEN_BLACKLIST_FILTER_REFRESH', '300'))
+# False positive rate of the filter; false positives cost one blacklist query
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.getenv('TOKEN_BLACKLIST_FILTER_ERROR_RATE', '0.001'))
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -211,6 +328,29 @@ CORS_ALLOW_CREDENTIALS = True
 # Judge0 Configuration
 JUDGE0_API_URL = os.getenv('JUDGE0_API_URL', 'http://localhost:2358')
 JUDGE0_API_KEY = os.getenv('JUDGE0_API_KEY', '')
+# Per-request timeout (seconds) and connection pool size of the async Judge0 client
+JUDGE0_TIMEOUT = float(os.getenv('JUDGE0_TIMEOUT', '30'))
+JUDGE0_MAX_CONNECTIONS = int(os.getenv('JUDGE0_MAX_CONNECTIONS', '100'))
+# 'judge0', or 'local' to run Python submissions in-process for development
+JUDGE_BACKEND = os.getenv('JUDGE_BACKEND', 'judge0')
+# Most output (bytes) a judge run may write; a program printing more fails with
+# a Runtime Error. Sent to Judge0 as max_file_size, which must not exceed its
+# MAX_MAX_FILE_SIZE (4 MB by default)
+JUDGE_MAX_OUTPUT_BYTES = int(os.getenv('JUDGE_MAX_OUTPUT_BYTES', str(1024 * 1024)))
+# Characters of input, output and errors kept with a failed test or returned by a run
+SUBMISSION_OUTPUT_EXCERPT = int(os.getenv('SUBMISSION_OUTPUT_EXCERPT', '1000'))
+
+# Submissions older than this are moved to the archive table by archive_submissions
+SUBMISSION_ARCHIVE_AFTER_DAYS = int(os.getenv('SUBMISSION_ARCHIVE_AFTER_DAYS', '180'))
+
+# Database alias that analytics exports read from, e.g. replica1
+SUBMISSION_EXPORT_DATABASE = os.getenv('SUBMISSION_EXPORT_DATABASE', 'default')
+
+# Metrics: per-worker sample files are aggregated from this directory so
+# /metrics covers every gunicorn worker; empty reports this process only
+METRICS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', '')
+# When set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost',
@@ -221,6 +361,9 @@ CSRF_TRUSTED_ORIGINS = [
     'https://3292wq-8000.csb.app',
 ]
 
+# Judge pipeline traces, one JSON line per submission or run
+TRACES_FILE = BASE_DIR / 'logs' / 'traces.log'
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -234,6 +377,10 @@ LOGGING = {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
+        'message': {
+            'format': '{message}',
+            'style': '{',
+        },
         'json': {
             'format': '{asctime} {levelname} {name} {message}',
             'style': '{',
@@ -277,6 +424,14 @@ LOGGING = {
             'backupCount': 5,
             'formatter': 'verbose',
         },
+        'traces_file': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': TRACES_FILE,
+            'maxBytes': 1024 * 1024 * 50,  # 50MB
+            'backupCount': 5,
+            'formatter': 'message',
+        },
         'submissions_file': {
             'level': 'INFO',
             'class': 'logging.handlers.RotatingFileHandler',
@@ -307,6 +462,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'traces': {
+            'handlers': ['traces_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'submissions': {
             'handlers': ['console', 'submissions_file', 'error_file'],
             'level': 'INFO',
@@ -322,5 +482,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'backend': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,191 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from problems.models import Problem
+from submissions.models import Submission
+
+from .metrics import Registry
+from .pagination import KeysetPagination
+from .throttling import LocalBucketStore, parse_rate
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor encoding and paging on the ordering keyset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user('alice', 'alice@example.com', 'Test-pass-123')
+        problem = Problem.objects.create(title='Two Sum', slug='two-sum', description='Add',
+                                         difficulty='Easy', category='array')
+        now = timezone.now()
+        submissions = Submission.objects.bulk_create(
+            Submission(user=user, problem=problem, language='python', status='Accepted')
+            for _ in range(7)
+        )
+        # Two rows share a timestamp so the id tiebreaker decides their order
+        for index, submission in enumerate(submissions):
+            Submission.objects.filter(pk=submission.pk).update(
+                created_at=now - timedelta(minutes=min(index, 3)),
+                status='Accepted' if index % 2 else 'Wrong Answer'
+            )
+
+    def paginate(self, queryset, url='/items/', **params):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get(url, params))
+        rows = paginator.paginate_queryset(queryset, request)
+        return paginator, rows
+
+    def follow(self, queryset, link):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(link).query).items()}
+        return self.paginate(queryset, **params)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        queryset = Submission.objects.all()
+        expected = list(queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        paginator, rows = self.paginate(queryset, pagination='cursor', page_size=2)
+        seen = [row.id for row in rows]
+        self.assertIsNone(paginator.get_previous_link())
+        while paginator.get_next_link():
+            paginator, rows = self.follow(queryset, paginator.get_next_link())
+            seen += [row.id for row in rows]
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_to_the_earlier_page(self):
+        queryset = Submission.objects.all()
+        first, first_rows = self.paginate(queryset, pagination='cursor', page_size=3)
+        second, _ = self.follow(queryset, first.get_next_link())
+        back, back_rows = self.follow(queryset, second.get_previous_link())
+        self.assertEqual([row.id for row in back_rows], [row.id for row in first_rows])
+        self.assertFalse(back.has_previous)
+
+    def test_cursor_follows_the_active_ordering(self):
+        queryset = Submission.objects.order_by('status')
+        paginator, rows = self.paginate(queryset, pagination='cursor', page_size=3)
+        self.assertEqual(paginator.keyset, ('status', 'id'))
+
+        seen = [row.id for row in rows]
+        while paginator.get_next_link():
+            paginator, rows = self.follow(queryset, paginator.get_next_link())
+            seen += [row.id for row in rows]
+        self.assertEqual(seen, list(queryset.order_by('status', 'id').values_list('id', flat=True)))
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        paginator, _ = self.paginate(Submission.objects.order_by('status'), pagination='cursor', page_size=2)
+        with self.assertRaises(NotFound):
+            self.follow(Submission.objects.all(), paginator.get_next_link())
+
+    def test_tampered_cursor_is_rejected(self):
+        with self.assertRaises(NotFound):
+            self.paginate(Submission.objects.all(), cursor='not-a-cursor')
+
+    def test_expression_ordering_has_no_cursor(self):
+        queryset = Submission.objects.order_by(F('runtime').desc())
+        with self.assertRaises(ValidationError):
+            self.paginate(queryset, pagination='cursor')
+
+    def test_page_numbers_by_default(self):
+        paginator, rows = self.paginate(Submission.objects.all(), page_size=2)
+        self.assertIsNotNone(paginator.fallback)
+        self.assertEqual(paginator.fallback.page.paginator.count, 7)
+
+    def test_page_numbers_keep_the_exact_count_past_the_cap(self):
+        with mock.patch('backend.pagination.COUNT_LIMIT', 3):
+            paginator, rows = self.paginate(Submission.objects.all(), page=4, page_size=2)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(paginator.fallback.page.paginator.count, 7)
+
+    def test_approximate_count_pages_past_the_cap(self):
+        queryset = Submission.objects.order_by('-created_at', '-id')
+        expected = list(queryset.values_list('id', flat=True))
+        with mock.patch('backend.pagination.COUNT_LIMIT', 3):
+            paginator, rows = self.paginate(queryset, count='approximate', page_size=2)
+            seen = [row.id for row in rows]
+            response = paginator.get_paginated_response([])
+            while response.data['next']:
+                paginator, rows = self.follow(queryset, response.data['next'])
+                seen += [row.id for row in rows]
+                response = paginator.get_paginated_response([])
+            with self.assertRaises(NotFound):
+                self.paginate(queryset, count='approximate', page_size=2, page=5)
+        self.assertEqual(seen, expected)
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(response.data['count_approximate'])
+        self.assertIsNone(response.data['next'])
+        self.assertIn('page=3', response.data['previous'])
+
+    def test_approximate_count_below_the_cap_is_exact(self):
+        paginator, _ = self.paginate(Submission.objects.all(), count='approximate', page='last', page_size=2)
+        response = paginator.get_paginated_response([])
+        self.assertEqual((response.data['count'], response.data['count_approximate']), (7, False))
+        self.assertIsNone(response.data['next'])
+
+
+class TokenBucketTests(TestCase):
+    """Refill and capacity of the in-process token buckets"""
+
+    def take(self, store, at):
+        with mock.patch('backend.throttling.time.monotonic', return_value=at):
+            return store.take_all([('user:1', 2, 1.0)])[0]
+
+    def test_bucket_empties_then_refills_with_time(self):
+        store = LocalBucketStore()
+        self.assertTrue(self.take(store, 100.0))
+        self.assertTrue(self.take(store, 100.0))
+        self.assertFalse(self.take(store, 100.0))
+        # Half a token isn't enough
+        self.assertFalse(self.take(store, 100.5))
+        self.assertTrue(self.take(store, 101.0))
+
+    def test_refill_stops_at_capacity(self):
+        store = LocalBucketStore()
+        self.take(store, 0.0)
+        self.assertTrue(self.take(store, 3600.0))
+        self.assertTrue(self.take(store, 3600.0))
+        self.assertFalse(self.take(store, 3600.0))
+
+    def test_buckets_are_per_key(self):
+        store = LocalBucketStore()
+        with mock.patch('backend.throttling.time.monotonic', return_value=0.0):
+            store.take_all([('user:1', 1, 1.0)])
+            self.assertFalse(store.take_all([('user:1', 1, 1.0)])[0])
+            self.assertTrue(store.take_all([('user:2', 1, 1.0)])[0])
+
+    def test_denied_request_takes_from_no_bucket(self):
+        store = LocalBucketStore()
+        with mock.patch('backend.throttling.time.monotonic', return_value=0.0):
+            store.take_all([('ip:1', 1, 1.0)])
+            allowed, levels = store.take_all([('user:1', 5, 1.0), ('ip:1', 1, 1.0)])
+            self.assertFalse(allowed)
+            self.assertEqual(levels, [5, 0])
+            self.assertEqual(store.take_all([('user:1', 5, 1.0)]), (True, [4]))
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('20/min'), (20, 20 / 60))
+        self.assertEqual(parse_rate('5/s'), (5, 5.0))
+        self.assertEqual(parse_rate('1000/day'), (1000, 1000 / 86400))
+
+
+class MetricsRegistryTests(TestCase):
+    """Per-process sample files summed by /metrics"""
+
+    def test_reused_pid_keeps_the_dead_workers_counts(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            dead, recycled = Registry(), Registry()
+            dead.add('requests_total', (), 5)
+            dead.flush(force=True)
+            # Same pid, as when the OS hands a dead worker's pid to its replacement
+            recycled.pid = dead.pid
+            recycled.add('requests_total', (), 1)
+            self.assertNotEqual(recycled.path(), dead.path())
+            self.assertEqual(recycled.collect(), {('requests_total', ()): 6})
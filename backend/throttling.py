@@ -0,0 +1,190 @@
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger('backend')
+
+OVERRIDES_KEY = 'ratelimit:overrides'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Refill each bucket for the time elapsed since its last request, then
+# take one token from every bucket if each has one, or from none. Runs
+# atomically in Redis, using its clock so every worker agrees on the time.
+# ARGV holds a capacity and rate per key. Returns whether the request is
+# allowed, then the tokens left in each bucket as strings, Redis would
+# truncate a number to an integer.
+TAKE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if levels[i] < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local tokens = levels[i] - allowed
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    result[i + 1] = tostring(tokens)
+end
+return result
+"""
+
+RateLimit = namedtuple('RateLimit', 'limit remaining reset')
+
+
+def parse_rate(rate):
+    """'20/min' -> (20 tokens, 20/60 tokens refilled per second)"""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()[0]]
+
+
+class LocalBucketStore:
+    """Token buckets in this process: the development store, and the stand-in while Redis is down"""
+
+    max_entries = 100000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take_all(self, buckets):
+        """Take a token from every (key, capacity, rate) bucket, or from none if any is empty"""
+        with self.lock:
+            now = time.monotonic()
+            levels = []
+            for key, capacity, rate in buckets:
+                tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+            allowed = all(tokens >= 1 for tokens in levels)
+            if allowed:
+                levels = [tokens - 1 for tokens in levels]
+            if len(self.buckets) + len(buckets) > self.max_entries:
+                # Forget buckets that have refilled; a full bucket is the default
+                self.buckets = {k: bucket for k, bucket in self.buckets.items() if bucket[2] > now}
+            for (key, capacity, rate), tokens in zip(buckets, levels):
+                self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return allowed, levels
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker, updated by one script call each"""
+
+    def __init__(self, url, fallback):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1)
+        self.script = self.client.register_script(TAKE_SCRIPT)
+        self.fallback = fallback
+
+    def take_all(self, buckets):
+        try:
+            allowed, *levels = self.script(
+                keys=[key for key, _, _ in buckets],
+                args=[value for _, capacity, rate in buckets for value in (capacity, rate)]
+            )
+        except redis.RedisError as e:
+            logger.warning('Rate limit store unavailable, using local buckets: %s', e)
+            return self.fallback.take_all(buckets)
+        return bool(allowed), [float(tokens) for tokens in levels]
+
+
+class RateLimits:
+    """RATE_LIMITS from settings, with overrides stored in the shared cache.
+
+    Overrides are set with ``manage.py set_rate_limit`` and picked up by
+    every process within RATE_LIMIT_OVERRIDES_TTL seconds.
+    """
+
+    def __init__(self):
+        self.overrides = {}
+        self.loaded_at = None
+
+    def get(self, scope):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > settings.RATE_LIMIT_OVERRIDES_TTL:
+            self.overrides = cache.get(OVERRIDES_KEY) or {}
+            self.loaded_at = time.monotonic()
+        return {**settings.RATE_LIMITS.get(scope, {}), **self.overrides.get(scope, {})}
+
+    def reload(self):
+        self.loaded_at = None
+
+
+rate_limits = RateLimits()
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        local = LocalBucketStore()
+        # Without Redis every worker would allow the full rate on its own, so
+        # servers refuse to start that way outside DEBUG (backend.checks)
+        if settings.RATE_LIMIT_REDIS_URL:
+            _store = RedisBucketStore(settings.RATE_LIMIT_REDIS_URL, local)
+        else:
+            _store = local
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token-bucket limits for views that set ``throttle_scope``.
+
+    RATE_LIMITS maps each scope to a rate per authenticated user
+    (``'user'``) and per client IP (``'ip'``), e.g. ``'10/min'``: a bucket
+    of 10 tokens refilled at 10 a minute, so clients can burst up to the
+    full bucket. A request needs a token from every bucket that applies,
+    and takes them all at once: a request one bucket denies costs nothing
+    from the others. The tightest bucket is reported in RateLimit-*
+    response headers.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope or not settings.RATE_LIMIT_ENABLED:
+            return True
+
+        limits = rate_limits.get(scope)
+        buckets = []
+        if limits.get('user') and request.user.is_authenticated:
+            buckets.append((f'ratelimit:{scope}:user:{request.user.pk}', *parse_rate(limits['user'])))
+        if limits.get('ip'):
+            buckets.append((f'ratelimit:{scope}:ip:{self.get_ident(request)}', *parse_rate(limits['ip'])))
+        if not buckets:
+            return True
+
+        allowed, levels = get_bucket_store().take_all(buckets)
+        reported = None
+        for (_, capacity, per_second), tokens in zip(buckets, levels):
+            state = RateLimit(capacity, int(tokens), math.ceil((capacity - tokens) / per_second))
+            if reported is None or state.remaining < reported.remaining:
+                reported = state
+            if not allowed and tokens < 1:
+                wait = (1 - tokens) / per_second
+                self.wait_seconds = max(self.wait_seconds or 0, wait)
+
+        # Read by RateLimitHeadersMiddleware
+        request._request.rate_limit = reported
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,112 @@
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger('traces')
+
+_current_trace = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Timed spans for one unit of work, written as a single JSON line.
+
+    Span offsets and durations are in milliseconds from the start of the
+    trace; ``parent`` is the index of the enclosing span. Spans derived
+    from another system's timestamps (e.g. Judge0's queue wait) have no
+    offset.
+    """
+
+    def __init__(self, name, **attributes):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.spans = []
+        self.stack = []
+        self.started = time.perf_counter()
+
+    def elapsed_ms(self, since=None):
+        return round((time.perf_counter() - (since or self.started)) * 1000, 3)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        record = {
+            'name': name,
+            'parent': self.stack[-1] if self.stack else None,
+            'offset_ms': self.elapsed_ms(),
+        }
+        self.spans.append(record)
+        self.stack.append(len(self.spans) - 1)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            self.stack.pop()
+            record['duration_ms'] = self.elapsed_ms(start)
+            if attributes:
+                record['attributes'] = {**attributes, **record.get('attributes', {})}
+
+    def record(self, name, duration, **attributes):
+        """Add a span measured elsewhere, duration in seconds"""
+        self.spans.append({
+            'name': name,
+            'parent': self.stack[-1] if self.stack else None,
+            'offset_ms': None,
+            'duration_ms': round(duration * 1000, 3),
+            **({'attributes': attributes} if attributes else {}),
+        })
+
+    def finish(self):
+        logger.info(json.dumps({
+            'trace_id': self.id,
+            'name': self.name,
+            'attributes': self.attributes,
+            'duration_ms': self.elapsed_ms(),
+            'spans': self.spans,
+        }, separators=(',', ':'), default=str))
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """Make a new trace current for the enclosed block and write it on exit"""
+
+    trace = Trace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block within the current trace; a no-op outside of one"""
+
+    trace = _current_trace.get()
+    if trace is None:
+        yield {}
+        return
+    with trace.span(name, **attributes) as record:
+        yield record
+
+
+def set_attributes(record, **attributes):
+    """Attach attributes discovered while a span is running"""
+    if record is not None:
+        record.setdefault('attributes', {}).update(attributes)
+
+
+def record_span(name, duration, **attributes):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(name, duration, **attributes)
@@ -20,6 +20,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from .metrics import metrics_view
+from .views import HomePageView, LeaderboardPageView, ProblemDetailPageView, ProblemListPageView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -28,14 +31,14 @@ urlpatterns = [
     path('api/problems/', include('problems.urls')),
     path('api/submissions/', include('submissions.urls')),
 
-    # Frontend routes
-    path('', TemplateView.as_view(template_name='index.html'), name='home'),
-    path('problems/', TemplateView.as_view(template_name='problems/list.html'),
-         name='problem_list'),
-    path('problems/<int:pk>/',
-         TemplateView.as_view(template_name='problems/detail.html'), name='problem_detail'),
-    path('leaderboard/', TemplateView.as_view(template_name='leaderboard.html'),
-         name='leaderboard'),
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
+
+    # Frontend routes; pages with data embed what their first render needs
+    path('', HomePageView.as_view(), name='home'),
+    path('problems/', ProblemListPageView.as_view(), name='problem_list'),
+    path('problems/<int:pk>/', ProblemDetailPageView.as_view(), name='problem_detail'),
+    path('leaderboard/', LeaderboardPageView.as_view(), name='leaderboard'),
     path('login/', TemplateView.as_view(template_name='auth/login.html'), name='login'),
     path('register/', TemplateView.as_view(template_name='auth/register.html'), name='register'),
 ]
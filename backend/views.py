@@ -0,0 +1,78 @@
+import copy
+
+from django.http import Http404, QueryDict
+from django.views.generic import TemplateView
+
+
+def api_data(request, view, path, **kwargs):
+    """Response data of an anonymous GET to an API view, as the page's own fetch would get it.
+
+    The view runs on a copy of the page request pointed at the API path, so
+    pagination links match and the API's cached entry is shared.
+    """
+    api_request = copy.copy(request)
+    api_request.path = api_request.path_info = path
+    api_request.GET = QueryDict()
+    api_request.META = {
+        key: value for key, value in request.META.items()
+        if not key.startswith(('HTTP_IF_', 'HTTP_AUTHORIZATION', 'HTTP_COOKIE'))
+    }
+    api_request.META.update(PATH_INFO=path, QUERY_STRING='', HTTP_ACCEPT='application/json')
+    response = view(api_request, **kwargs)
+    return response.data if response.status_code == 200 else None
+
+
+class PageView(TemplateView):
+    """Frontend page that embeds the data its first render needs.
+
+    The JSON the page would otherwise fetch after loading comes from the
+    API's caches and is written into the page with json_script, saving a
+    round trip before anything is shown. Pages fall back to fetching it
+    when it is missing.
+    """
+
+    def get_initial_data(self):
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['initial_data'] = self.get_initial_data()
+        return context
+
+
+class HomePageView(PageView):
+    template_name = 'index.html'
+
+    def get_initial_data(self):
+        from problems.cache import get_dashboard
+        return get_dashboard()
+
+
+class ProblemListPageView(PageView):
+    template_name = 'problems/list.html'
+
+    def get_initial_data(self):
+        from problems.views import ProblemListView
+        return api_data(self.request, ProblemListView.as_view(), '/api/problems/')
+
+
+class ProblemDetailPageView(PageView):
+    template_name = 'problems/detail.html'
+
+    def get_initial_data(self):
+        from problems.cache import get_problem_detail_by_lookup, get_problem_stats, get_user_overlay
+        from problems.models import Problem
+        try:
+            problem_id, entry = get_problem_detail_by_lookup(self.kwargs['pk'])
+        except Problem.DoesNotExist:
+            raise Http404('No Problem matches the given query.')
+        # The page fetches anonymously, the editor's own requests carry the token
+        return {**entry['payload'], **get_problem_stats(problem_id), **get_user_overlay(None, problem_id)}
+
+
+class LeaderboardPageView(PageView):
+    template_name = 'leaderboard.html'
+
+    def get_initial_data(self):
+        from users.views import LeaderboardView
+        return api_data(self.request, LeaderboardView.as_view(), '/api/auth/leaderboard/')
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+from backend.checks import require_shared_state  # noqa: E402
+
+require_shared_state()
+
+# Build the in-memory problem search/typeahead indexes once per worker
+from problems.search import warm_indexes  # noqa: E402
+
+warm_indexes()
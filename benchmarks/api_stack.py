@@ -0,0 +1,101 @@
+"""
+Microbenchmark of the API response path: stock vs lean stack.
+
+Measures in-process requests per second for a single worker, so network
+and proxy time are excluded and only Django/DRF overhead is compared.
+
+    python -m benchmarks.api_stack --requests 2000
+
+"stock" is the original stack (all middleware on every path, stock
+JSONRenderer plus BrowsableAPIRenderer); "lean" is the same middleware
+skipping /api/ paths, with FastJSONRenderer alone. Both are pinned here
+rather than read from settings, so middleware added to settings.MIDDLEWARE
+for other purposes (metrics, replica routing, rate limit headers) doesn't
+count towards either.
+"""
+import argparse
+import os
+import time
+
+
+STOCK_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+LEAN_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'backend.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'backend.middleware.CsrfViewMiddleware',
+    'backend.middleware.AuthenticationMiddleware',
+    'backend.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ENDPOINTS = {
+    'problem_list': '/api/problems/',
+    'leaderboard': '/api/auth/leaderboard/',
+}
+
+
+def measure(client, url, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url)
+        assert response.status_code == 200, f'{url} returned {response.status_code}'
+    return requests / (time.perf_counter() - start)
+
+
+def run_stack(middleware, renderers, requests, warmup):
+    from django.test import Client
+    from django.test.utils import override_settings
+    from rest_framework.views import APIView
+    
+    # View classes read renderer_classes at import time, so swap them directly
+    original_renderers = APIView.renderer_classes
+    APIView.renderer_classes = renderers
+    results = {}
+    try:
+        with override_settings(MIDDLEWARE=middleware):
+            # A fresh client loads the middleware chain from the overridden settings
+            client = Client()
+            for endpoint, url in ENDPOINTS.items():
+                measure(client, url, warmup)
+                results[endpoint] = measure(client, url, requests)
+    finally:
+        APIView.renderer_classes = original_renderers
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000, help='Timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=50, help='Untimed requests per endpoint')
+    args = parser.parse_args()
+    
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+    
+    from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+    from backend.renderers import FastJSONRenderer
+    
+    stock = run_stack(STOCK_MIDDLEWARE, [JSONRenderer, BrowsableAPIRenderer], args.requests, args.warmup)
+    lean = run_stack(LEAN_MIDDLEWARE, [FastJSONRenderer], args.requests, args.warmup)
+    
+    print(f"{'endpoint':<16}{'stock req/s':>14}{'lean req/s':>14}{'change':>10}")
+    for endpoint in ENDPOINTS:
+        change = (lean[endpoint] / stock[endpoint] - 1) * 100
+        print(f'{endpoint:<16}{stock[endpoint]:>14.0f}{lean[endpoint]:>14.0f}{change:>+9.1f}%')
+
+
+if __name__ == '__main__':
+    main()
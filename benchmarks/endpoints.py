@@ -0,0 +1,206 @@
+"""
+Latency percentiles of the read endpoints of a running server.
+
+Picks real problem, user and submission IDs from the configured database
+(load some with ``manage.py generate_synthetic_data`` first), then sends
+each endpoint's requests from a pool of concurrent clients and reports
+p50/p90/p99 latency and throughput. Results are saved as JSON so runs on
+different commits can be compared.
+
+    python manage.py runserver --noreload   # or gunicorn, in another shell
+    python -m benchmarks.endpoints --concurrency 16 --requests 500 --output before.json
+    python -m benchmarks.endpoints --concurrency 16 --requests 500 --compare before.json
+
+Authenticated endpoints use access tokens signed with this checkout's
+SECRET_KEY, so the server must run with the same settings.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# name -> (path template, needs auth); templates are filled from sampled IDs
+ENDPOINTS = {
+    'problem_list': ('/api/problems/', False),
+    'problem_list_page': ('/api/problems/?page={page}', False),
+    'problem_list_filtered': ('/api/problems/?difficulty={difficulty}&ordering=-acceptance_rate', False),
+    'problem_search': ('/api/problems/?search={word}', False),
+    'problem_typeahead': ('/api/problems/typeahead/?q={prefix}', False),
+    'dashboard': ('/api/problems/dashboard/', False),
+    'problem_detail': ('/api/problems/{problem}/', True),
+    'problem_detail_slug': ('/api/problems/{slug}/', False),
+    'problem_test_cases': ('/api/problems/{problem}/test-cases/', True),
+    'user_submissions': ('/api/submissions/user/', True),
+    'problem_submissions': ('/api/submissions/problem/{problem}/', True),
+    'submission_detail': ('/api/submissions/{submission}/', True),
+    'user_profile': ('/api/auth/profile/', True),
+    'user_detail': ('/api/auth/users/{user}/', False),
+    'leaderboard': ('/api/auth/leaderboard/', False),
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def sample_targets(size):
+    """IDs to request, drawn from the database the server is using"""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from problems.models import Problem
+    from submissions.models import Submission
+
+    User = get_user_model()
+    problems = list(Problem.objects.filter(is_active=True).order_by('?').values_list('id', 'slug', 'title')[:size])
+    # Active users, so their submission lists aren't empty
+    users = list(User.objects.annotate(n=Count('submissions')).filter(n__gt=0).order_by('?')[:size])
+    if not problems or not users:
+        raise SystemExit('No problems or active users found; generate data first')
+
+    submissions = {}
+    for user in users:
+        submissions[user.id] = list(Submission.objects.filter(user=user).values_list('id', flat=True)[:20])
+    words = [word.lower() for _, _, title in problems for word in title.split() if len(word) > 3]
+    return {
+        'problems': problems,
+        'users': [(user.id, str(AccessToken.for_user(user)), submissions[user.id]) for user in users],
+        'words': words or ['sum'],
+        'pages': max(1, Problem.objects.filter(is_active=True).count() // 20),
+    }
+
+
+def build_request(name, targets, rng):
+    template, needs_auth = ENDPOINTS[name]
+    problem_id, slug, _ = rng.choice(targets['problems'])
+    user_id, token, submission_ids = rng.choice(targets['users'])
+    word = rng.choice(targets['words'])
+    path = template.format(
+        problem=problem_id,
+        slug=slug,
+        user=user_id,
+        submission=rng.choice(submission_ids) if submission_ids else 0,
+        page=rng.randint(1, targets['pages']),
+        difficulty=rng.choice(('Easy', 'Medium', 'Hard')),
+        word=word,
+        prefix=word[:rng.randint(2, 4)],
+    )
+    headers = {'Authorization': f'Bearer {token}'} if needs_auth else {}
+    return path, headers
+
+
+def percentile(ordered, value):
+    return ordered[min(int(len(ordered) * value / 100), len(ordered) - 1)]
+
+
+def run_endpoint(name, base_url, targets, requests_count, concurrency, seed):
+    import requests
+
+    rng = random.Random(seed)
+    planned = [build_request(name, targets, rng) for _ in range(requests_count)]
+    sessions = {}
+
+    def send(request):
+        path, headers = request
+        session = sessions.setdefault(threading.get_ident(), requests.Session())
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, headers=headers, timeout=30)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send, planned))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    result = {
+        'requests': len(outcomes),
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'throughput': round(len(outcomes) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+    for value in PERCENTILES:
+        result[f'p{value}_ms'] = round(percentile(latencies, value), 2)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':<24}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}"
+    print(header + ('  p99 vs baseline' if baseline else ''))
+    for name, result in results.items():
+        line = (f"{name:<24}{result['p50_ms']:>10.1f}{result['p90_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                f"{result['throughput']:>10.1f}{result['errors']:>8}")
+        before = (baseline or {}).get(name)
+        if before:
+            line += f"  {(result['p99_ms'] / before['p99_ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per endpoint')
+    parser.add_argument('--sample', type=int, default=200, help='Problems and users to draw requests from')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Earlier results file to compare p99 latency against')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    targets = sample_targets(args.sample)
+    base_url = args.base_url.rstrip('/')
+
+    results = {}
+    for name in args.endpoints:
+        if args.warmup:
+            run_endpoint(name, base_url, targets, args.warmup, args.concurrency, args.seed + 1)
+        results[name] = run_endpoint(name, base_url, targets, args.requests, args.concurrency, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'config': {
+                    'base_url': base_url,
+                    'requests': args.requests,
+                    'concurrency': args.concurrency,
+                    'warmup': args.warmup,
+                    'seed': args.seed,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f'Saved results to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
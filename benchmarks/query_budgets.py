@@ -0,0 +1,309 @@
+"""
+Query-count and latency budgets for every API endpoint.
+
+Creates a throwaway test database, seeds representative data and calls
+each endpoint in problems/, submissions/ and users/urls.py once with a
+cold cache. An endpoint fails when it issues more queries or takes longer
+than its budget, and the queries it ran are printed. An endpoint without
+a budget also fails, so new views can't skip the check. Queries are
+counted on every thread the request uses, async views included;
+transaction BEGIN/COMMIT statements are not counted.
+
+    python -m benchmarks.query_budgets
+    python -m benchmarks.query_budgets --only problem_list problem_detail
+    python -m benchmarks.query_budgets --latency-factor 3    # slow machine
+
+Submissions are judged by the local stand-in (JUDGE_BACKEND='local'), so
+latency covers our side of the judge pipeline without Judge0. Exits with
+status 1 on any failure. The query and status budgets also run with the
+test suite (benchmarks/tests.py), which leaves latency to this script.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+
+Budget = namedtuple('Budget', 'name label method user kwargs data queries ms status')
+
+ACCEPTED_CODE = 'print(int(input()) * 2)'
+WRONG_CODE = 'print(0)'
+
+# url name, label, method, user, url kwargs(ctx), body(ctx), max queries, max ms, expected status
+BUDGETS = [
+    # problems/urls.py
+    Budget('problem_list', 'anonymous', 'get', None, None, None, 2, 150, 200),
+    Budget('problem_list', 'authenticated', 'get', 'alice', None, None, 3, 150, 200),
+    Budget('problem_list', 'search', 'get', 'alice', None, {'search': 'array'}, 4, 250, 200),
+    Budget('problem_list', 'cursor', 'get', None, None, {'pagination': 'cursor'}, 1, 150, 200),
+    Budget('problem_list', 'cursor ordered', 'get', None, None,
+           {'pagination': 'cursor', 'ordering': '-acceptance_rate'}, 1, 150, 200),
+    Budget('problem_typeahead', '', 'get', None, None, {'q': 'tw'}, 1, 150, 200),
+    Budget('dashboard', '', 'get', None, None, None, 2, 150, 200),
+    Budget('problem_detail', 'anonymous', 'get', None,
+           lambda ctx: {'pk': ctx['problem'].pk}, None, 3, 150, 200),
+    Budget('problem_detail', 'authenticated', 'get', 'alice',
+           lambda ctx: {'pk': ctx['problem'].pk}, None, 4, 150, 200),
+    Budget('problem_detail_slug', '', 'get', 'alice',
+           lambda ctx: {'pk': ctx['problem'].slug}, None, 5, 150, 200),
+    Budget('problem_test_cases', '', 'get', 'alice',
+           lambda ctx: {'pk': ctx['problem'].pk}, None, 2, 100, 200),
+
+    # submissions/urls.py
+    Budget('submission_create', 'accepted', 'post', 'alice', None,
+           lambda ctx: {'problem': ctx['problem'].pk, 'language': 'python', 'code': ACCEPTED_CODE},
+           15, 3000, 201),
+    Budget('submission_create', 'wrong answer', 'post', 'alice', None,
+           lambda ctx: {'problem': ctx['problem'].pk, 'language': 'python', 'code': WRONG_CODE},
+           12, 1500, 201),
+    Budget('submission_detail', '', 'get', 'alice',
+           lambda ctx: {'pk': ctx['submission'].pk}, None, 2, 100, 200),
+    Budget('submission_detail', 'archived', 'get', 'alice',
+           lambda ctx: {'pk': ctx['archived'].pk}, None, 3, 100, 200),
+    Budget('user_submissions', '', 'get', 'alice', None, None, 2, 150, 200),
+    Budget('user_submissions', 'page', 'get', 'alice', None, {'page': 2}, 2, 150, 200),
+    Budget('user_submissions', 'cursor', 'get', 'alice', None, {'pagination': 'cursor'}, 1, 150, 200),
+    Budget('problem_submissions', '', 'get', 'alice',
+           lambda ctx: {'problem_id': ctx['problem'].pk}, None, 2, 150, 200),
+    Budget('problem_submissions', 'cursor', 'get', 'alice',
+           lambda ctx: {'problem_id': ctx['problem'].pk}, {'pagination': 'cursor'}, 1, 150, 200),
+    Budget('submission_export', '', 'get', 'admin', None, {'output': 'csv'}, 1, 500, 200),
+    Budget('run_code', '', 'post', 'alice',
+           lambda ctx: {'problem_id': ctx['problem'].pk},
+           lambda ctx: {'language': 'python', 'code': ACCEPTED_CODE}, 2, 1500, 200),
+
+    # users/urls.py
+    Budget('register', '', 'post', None, None,
+           lambda ctx: {'username': 'newcomer', 'email': 'newcomer@example.com',
+                        'password': 'Budget-pass-123', 'password2': 'Budget-pass-123'},
+           4, 1500, 201),
+    Budget('token_obtain_pair', '', 'post', None, None,
+           lambda ctx: {'username': 'alice', 'password': ctx['password']}, 3, 1500, 200),
+    # Both tokens are newer than the blacklist filter, so they are checked against the table
+    Budget('token_refresh', '', 'post', None, None,
+           lambda ctx: {'refresh': ctx['refresh']}, 9, 150, 200),
+    Budget('logout', '', 'post', 'alice', None,
+           lambda ctx: {'refresh': ctx['logout_refresh']}, 5, 150, 205),
+    Budget('user_profile', '', 'get', 'alice', None, None, 1, 100, 200),
+    Budget('user_detail', '', 'get', None,
+           lambda ctx: {'pk': ctx['users']['alice'].pk}, None, 1, 100, 200),
+    Budget('leaderboard', '', 'get', None, None, None, 2, 150, 200),
+]
+
+# Included urlconf -> the prefix backend/urls.py mounts it under
+URL_MODULES = {
+    'problems.urls': '/api/problems/',
+    'submissions.urls': '/api/submissions/',
+    'users.urls': '/api/auth/',
+}
+
+
+def url_modules():
+    """URL name -> module, for names declared in the API urlconfs"""
+    from importlib import import_module
+
+    modules = {}
+    for module in URL_MODULES:
+        for pattern in import_module(module).urlpatterns:
+            if pattern.name:
+                modules[pattern.name] = module
+    return modules
+
+
+def api_reverse(name, kwargs=None):
+    # Reverse within the app's own urlconf: some names are reused by frontend routes
+    from django.urls import reverse
+
+    module = url_modules()[name]
+    return URL_MODULES[module] + reverse(name, urlconf=module, kwargs=kwargs).lstrip('/')
+
+
+def seed():
+    """Representative data: 40 problems, 25 users, a few hundred submissions"""
+    from datetime import timedelta
+
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from problems.models import Problem, Solution, TestCase
+    from submissions.models import ArchivedSubmission, Submission
+    from users.models import UserStats
+
+    User = get_user_model()
+    password = 'Budget-pass-123'
+    users = {
+        'admin': User.objects.create_superuser('admin', 'admin@example.com', password),
+        'alice': User.objects.create_user('alice', 'alice@example.com', password),
+    }
+    users.update({
+        user.username: user for user in User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@example.com', points=i * 10, solved_count=i)
+            for i in range(23)
+        )
+    })
+
+    topics = ['array', 'string', 'tree', 'graph', 'dp', 'math', 'hash-table', 'two-pointers']
+    problems = Problem.objects.bulk_create(
+        Problem(
+            title=f'{word} Problem {i}',
+            slug=f'{word.lower()}-problem-{i}',
+            description=f'Given an {topics[i % len(topics)]}, return twice the input. ' * 20,
+            difficulty=('Easy', 'Medium', 'Hard')[i % 3],
+            category=topics[i % len(topics)],
+            tags=[topics[i % len(topics)], topics[(i + 3) % len(topics)]],
+            starter_code_python='class Solution:\n    def solve(self):\n        pass\n',
+        )
+        for i, word in enumerate(['Two', 'Array', 'Tree', 'Graph', 'Path'] * 8)
+    )
+    TestCase.objects.bulk_create(
+        TestCase(problem=problem, input_data=f'{n}\n', expected_output=f'{n * 2}\n', is_sample=n < 3,
+                 is_hidden=n >= 3)
+        for problem in problems for n in range(8)
+    )
+    Solution.objects.bulk_create(
+        Solution(problem=problem, title='Direct', approach='Double it.', code=ACCEPTED_CODE,
+                 language='python', time_complexity='O(1)', space_complexity='O(1)')
+        for problem in problems for _ in range(2)
+    )
+
+    submissions = []
+    for index in range(300):
+        user = users['alice'] if index % 3 == 0 else users[f'user{index % 23}']
+        submission = Submission(
+            user=user,
+            problem=problems[index % len(problems)],
+            language='python',
+            status=('Accepted', 'Wrong Answer', 'Runtime Error')[index % 3],
+            passed_test_cases=8,
+            total_test_cases=8,
+        )
+        submission.code = f'# attempt {index}\n{ACCEPTED_CODE}\n'
+        submission.save()
+        submissions.append(submission)
+
+    # Age a few of alice's submissions into the archive
+    old = timezone.now() - timedelta(days=400)
+    archived = []
+    for submission in submissions[:15:3]:
+        submission.created_at = submission.updated_at = old
+        archived.append(ArchivedSubmission.from_submission(submission, submission.source_id))
+    ArchivedSubmission.objects.bulk_create(archived)
+    Submission.objects.filter(id__in=[item.id for item in archived]).delete()
+
+    for user in users.values():
+        UserStats(user=user).rebuild()
+
+    return {
+        'users': users,
+        'password': password,
+        'problem': problems[0],
+        'submission': Submission.objects.filter(user=users['alice']).first(),
+        'archived': archived[0],
+        'refresh': str(RefreshToken.for_user(users['alice'])),
+        'logout_refresh': str(RefreshToken.for_user(users['alice'])),
+        'tokens': {
+            username: str(RefreshToken.for_user(user).access_token) for username, user in users.items()
+        },
+    }
+
+
+def check(budget, ctx, latency_factor=None):
+    """Run one budget, returning a list of failure messages; latency is only checked given a factor"""
+    from django.core.cache import cache
+    from rest_framework.test import APIClient
+
+    from backend.cache import clear_local_caches
+    from backend.middleware import QueryRecorder, recording_queries
+    from users.authentication import user_cache
+    from users.tokens import blacklist_filter
+
+    client = APIClient()
+    if budget.user:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ctx['tokens'][budget.user]}")
+    url = api_reverse(budget.name, kwargs=budget.kwargs(ctx) if budget.kwargs else None)
+    data = budget.data(ctx) if callable(budget.data) else budget.data
+
+    cache.clear()
+    clear_local_caches()
+    user_cache.clear()
+    # Steady state: the authenticated user is cached and the blacklist filter built
+    if budget.user:
+        user_cache.set(ctx['users'][budget.user])
+    blacklist_filter.rebuild()
+    # Counts queries on every thread, including async views' sync_to_async calls
+    with recording_queries(QueryRecorder(keep_sql=True)) as queries:
+        start = time.perf_counter()
+        if budget.method == 'get':
+            response = client.get(url, data)
+        else:
+            response = client.post(url, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = (time.perf_counter() - start) * 1000
+
+    failures = []
+    if response.status_code != budget.status:
+        failures.append(f'status {response.status_code}, expected {budget.status}')
+    if queries.count > budget.queries:
+        failures.append(f'{queries.count} queries, budget {budget.queries}')
+    if latency_factor is not None and elapsed > budget.ms * latency_factor:
+        failures.append(f'{elapsed:.0f}ms, budget {budget.ms * latency_factor:.0f}ms')
+    return queries.count, elapsed, failures, queries.queries
+
+
+def missing_budgets():
+    covered = {budget.name for budget in BUDGETS}
+    return [f'{module}:{name}' for name, module in url_modules().items() if name not in covered]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Check only these URL names')
+    parser.add_argument('--latency-factor', type=float, default=1.0,
+                        help='Multiply every latency budget, for slow or shared machines')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    # Keep budget runs out of the trace file
+    logging.getLogger('traces').disabled = True
+
+    failed = False
+    missing = missing_budgets()
+    for name in missing:
+        failed = True
+        print(f'MISSING  {name} has no budget')
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(JUDGE_BACKEND='local'):
+            ctx = seed()
+            print(f"{'endpoint':<42}{'queries':>10}{'ms':>14}")
+            for budget in BUDGETS:
+                if args.only and budget.name not in args.only:
+                    continue
+                label = f'{budget.name} ({budget.label})' if budget.label else budget.name
+                count, elapsed, failures, captured = check(budget, ctx, args.latency_factor)
+                print(f'{label:<42}{count:>5} / {budget.queries:<3}{elapsed:>7.0f} / {budget.ms:<5}'
+                      f"{'  FAIL: ' + '; '.join(failures) if failures else ''}")
+                if failures:
+                    failed = True
+                    for number, query in enumerate(captured, 1):
+                        print(f"    {number:>3}. [{query['time']}s] {query['sql']}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
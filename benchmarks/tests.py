@@ -0,0 +1,28 @@
+import logging
+
+from django.test import TransactionTestCase, override_settings
+
+from .query_budgets import BUDGETS, check, missing_budgets, seed
+
+
+@override_settings(JUDGE_BACKEND='local')
+class QueryBudgetTests(TransactionTestCase):
+    """The query-count and status budgets of query_budgets.py; latency stays in the script"""
+
+    def setUp(self):
+        # Keep budget runs out of the trace file
+        logging.getLogger('traces').disabled = True
+        self.addCleanup(setattr, logging.getLogger('traces'), 'disabled', False)
+
+    def test_every_endpoint_has_a_budget(self):
+        self.assertEqual(missing_budgets(), [])
+
+    def test_query_budgets(self):
+        # Async views query from executor threads, so data is committed rather
+        # than kept in a per-test transaction, and seeded once for every budget
+        ctx = seed()
+        for budget in BUDGETS:
+            with self.subTest(budget.name, label=budget.label):
+                count, elapsed, failures, captured = check(budget, ctx)
+                queries = '\n'.join(f"{number}. {query['sql']}" for number, query in enumerate(captured, 1))
+                self.assertEqual(failures, [], f'{count} queries:\n{queries}')
@@ -0,0 +1,16 @@
+# Read by gunicorn from the working directory; command line flags still apply
+import glob
+import os
+
+
+def on_starting(server):
+    # Workers' metric files (backend.metrics) are summed for as long as they
+    # exist, so a new master starts from an empty directory
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json*')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,167 @@
+import hashlib
+
+from django.db.models import Avg, Count, Prefetch, Q, Sum
+
+from backend.cache import TieredCache
+from backend.pagination import absolute_links, relative_links
+from backend.routers import primary_reads
+
+from .models import Problem, TestCase
+from .serializers import ProblemDetailSerializer
+
+# Shared payloads are invalidated explicitly, the timeout only bounds staleness
+DETAIL_CACHE_TIMEOUT = 60 * 60
+LOOKUP_CACHE_TIMEOUT = 60 * 60 * 24
+# Anonymous list pages carry submission stats, which change without invalidation
+LIST_CACHE_TIMEOUT = 60
+DASHBOARD_CACHE_TIMEOUT = 60
+# Detail pages read the same counters from here rather than their hour-long payload
+STATS_CACHE_TIMEOUT = 60
+
+detail_cache = TieredCache('problems:detail', DETAIL_CACHE_TIMEOUT)
+lookup_cache = TieredCache('problems:lookup', LOOKUP_CACHE_TIMEOUT, max_entries=10000)
+list_cache = TieredCache('problems:list', LIST_CACHE_TIMEOUT)
+dashboard_cache = TieredCache('problems:dashboard', DASHBOARD_CACHE_TIMEOUT)
+stats_cache = TieredCache('problems:stats', STATS_CACHE_TIMEOUT, max_entries=10000)
+
+
+def resolve_problem_id(lookup_value):
+    """Resolve a numeric ID or slug to a problem ID"""
+    
+    value = str(lookup_value)
+    if value.isdigit():
+        return int(value)
+    
+    problem_id = lookup_cache.get(value)
+    if problem_id is None:
+        with primary_reads():
+            problem_id = Problem.objects.filter(
+                is_active=True,
+                slug=value
+            ).values_list('id', flat=True).first()
+        if problem_id is None:
+            raise Problem.DoesNotExist
+        lookup_cache.set(value, problem_id)
+    return problem_id
+
+
+def build_problem_detail(problem_id):
+    """Serialize the viewer-independent part of a problem detail payload"""
+    
+    problem = Problem.objects.filter(is_active=True).prefetch_related(
+        Prefetch(
+            'test_cases',
+            queryset=TestCase.objects.filter(is_sample=True, is_hidden=False),
+            to_attr='sample_test_cases'
+        ),
+        'solutions'
+    ).get(pk=problem_id)
+    
+    # The counters were just read, so they start the stats entry too
+    stats_cache.set(problem_id, {field: getattr(problem, field) for field in Problem.STATS_FIELDS})
+    return {
+        'version': problem.updated_at.timestamp(),
+        'payload': ProblemDetailSerializer(problem).data,
+    }
+
+
+def get_problem_detail(problem_id):
+    """Return the cached shared payload for a problem, building it on a miss"""
+    
+    return detail_cache.get_or_set(problem_id, lambda: build_problem_detail(problem_id))
+
+
+def get_problem_stats(problem_id):
+    """Submission counters of a problem, at most STATS_CACHE_TIMEOUT seconds old"""
+    
+    return stats_cache.get_or_set(
+        problem_id,
+        lambda: Problem.objects.filter(pk=problem_id).values(*Problem.STATS_FIELDS).first() or {}
+    )
+
+
+def get_problem_detail_by_lookup(lookup_value):
+    """Return the shared payload for an ID or slug, both sharing one entry"""
+    
+    problem_id = resolve_problem_id(lookup_value)
+    entry = get_problem_detail(problem_id)
+    
+    # A renamed slug may still point at the old problem
+    value = str(lookup_value)
+    if not value.isdigit() and entry['payload']['slug'] != value:
+        lookup_cache.delete(value)
+        raise Problem.DoesNotExist
+    return problem_id, entry
+
+
+def get_user_overlay(user, problem_id):
+    """Compute the per-viewer fields merged into the shared payload"""
+    
+    if not user or not user.is_authenticated:
+        return {'is_solved': False, 'user_submissions_count': 0}
+    
+    from submissions.models import ArchivedSubmission, Submission
+    # Archived attempts still count, so archiving doesn't change what users
+    # see; both tables are counted in one query
+    hot, archived = (
+        model.objects.filter(
+            user_id=user.pk,
+            problem_id=problem_id
+        ).order_by().values('user_id').annotate(
+            total=Count('id'),
+            accepted=Count('id', filter=Q(status='Accepted'))
+        ).values_list('total', 'accepted')
+        for model in (Submission, ArchivedSubmission)
+    )
+    counts = list(hot.union(archived, all=True).order_by())
+    return {
+        'is_solved': sum(accepted for _, accepted in counts) > 0,
+        'user_submissions_count': sum(total for total, _ in counts),
+    }
+
+
+def invalidate_problem_detail(problem_id, slug=None):
+    """Drop the cached payload (and slug alias) for a problem"""
+    
+    detail_cache.delete(problem_id)
+    if slug:
+        lookup_cache.delete(slug)
+
+
+def get_problem_list_page(request, build):
+    """Return the cached response data of an anonymous problem list request"""
+    
+    # Links are cached relative and made absolute per request, so any Host header shares one entry
+    params = sorted(request.query_params.lists())
+    key = '&'.join(f'{name}={values}' for name, values in params)
+    data = list_cache.get_or_set(hashlib.md5(key.encode()).hexdigest(), lambda: relative_links(build()))
+    return absolute_links(data, request)
+
+
+def invalidate_problem_list():
+    list_cache.invalidate_all()
+
+
+def build_dashboard():
+    """Site-wide totals shown on the home page"""
+    
+    from django.contrib.auth import get_user_model
+    totals = Problem.objects.filter(is_active=True).aggregate(
+        problems=Count('id'),
+        submissions=Sum('total_submissions'),
+        acceptance=Avg('acceptance_rate')
+    )
+    return {
+        'total_problems': totals['problems'],
+        'total_users': get_user_model().objects.count(),
+        'total_submissions': totals['submissions'] or 0,
+        'avg_acceptance': round(totals['acceptance'] or 0.0, 1),
+    }
+
+
+def get_dashboard():
+    return dashboard_cache.get_or_set('totals', build_dashboard)
+
+
+def invalidate_dashboard():
+    dashboard_cache.delete('totals')
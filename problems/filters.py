@@ -0,0 +1,32 @@
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .search import get_search_index
+
+# Ranked matches beyond this are dropped rather than paged through
+SEARCH_RESULT_LIMIT = 500
+
+
+class ProblemSearchFilter(filters.SearchFilter):
+    """Search problems through the in-process index, ordered by relevance.
+    
+    Runs after OrderingFilter so that relevance only replaces the default
+    ordering, never an explicit ``?ordering=`` from the client.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        
+        problem_ids = get_search_index().search(query, limit=SEARCH_RESULT_LIMIT)
+        queryset = queryset.filter(id__in=problem_ids)
+        
+        if problem_ids and not request.query_params.get(api_settings.ORDERING_PARAM):
+            rank = Case(
+                *[When(id=problem_id, then=position) for position, problem_id in enumerate(problem_ids)],
+                output_field=IntegerField()
+            )
+            queryset = queryset.order_by(rank)
+        return queryset
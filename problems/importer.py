@@ -0,0 +1,345 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard, invalidate_problem_detail, invalidate_problem_list
+from .models import Problem, Solution, TestCase
+from .search import invalidate_search_index
+
+CHUNK_SIZE = 64 * 1024
+
+# Problem columns an import may set; statistics and metadata are left alone
+PROBLEM_FIELDS = (
+    'title', 'description', 'difficulty', 'category', 'tags', 'constraints', 'examples',
+    'starter_code_python', 'starter_code_javascript', 'starter_code_java', 'starter_code_cpp',
+    'is_active',
+)
+REQUIRED_FIELDS = ('slug', 'title', 'description', 'difficulty', 'category')
+TEST_CASE_FIELDS = ('input_data', 'expected_output', 'is_sample', 'is_hidden', 'explanation')
+SOLUTION_FIELDS = ('title', 'approach', 'code', 'language', 'time_complexity', 'space_complexity')
+
+SEPARATORS = ' \t\r\n,'
+
+
+class InvalidRecord(Exception):
+    """A single record that failed validation"""
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading it whole"""
+
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+    eof = started = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of JSON array')
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+            continue
+
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError('Expected a JSON array')
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Element spans the chunk boundary: grow the buffer geometrically
+            chunk = stream.read(max(chunk_size, len(buffer) - pos))
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+
+        yield element
+        pos = end
+        if pos >= chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_ndjson(stream):
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Line {line_number}: {e}')
+
+
+def iter_problems(records):
+    """Normalize records into problem dicts with nested test cases and solutions.
+
+    Accepts plain problem objects (with optional ``test_cases`` and
+    ``solutions`` lists) or Django fixture records, whose test cases and
+    solutions must follow the problem they belong to.
+    """
+
+    pending = None
+    pending_pk = None
+
+    for record in records:
+        if not isinstance(record, dict):
+            raise InvalidRecord('Each record must be a JSON object')
+
+        model = record.get('model')
+        if model is None:
+            if pending is not None:
+                yield pending
+                pending = None
+            yield record
+            continue
+
+        fields = dict(record.get('fields', {}))
+        if model == 'problems.problem':
+            if pending is not None:
+                yield pending
+            pending, pending_pk = fields, record.get('pk')
+            pending.setdefault('test_cases', [])
+            pending.setdefault('solutions', [])
+        elif model in ('problems.testcase', 'problems.solution'):
+            if pending is None or fields.get('problem') != pending_pk:
+                raise InvalidRecord(f'{model} record must follow its problem (pk {fields.get("problem")})')
+            key = 'test_cases' if model == 'problems.testcase' else 'solutions'
+            pending[key].append(fields)
+
+    if pending is not None:
+        yield pending
+
+
+def clean_field(model, name, value):
+    """Value converted for a model column, raising InvalidRecord if it wouldn't fit"""
+
+    field = model._meta.get_field(name)
+    if isinstance(field, (models.CharField, models.TextField)) and not isinstance(value, str):
+        raise InvalidRecord(f'{name} must be a string')
+    try:
+        value = field.to_python(value)
+        field.run_validators(value)
+    except ValidationError as e:
+        raise InvalidRecord(f"invalid {name}: {' '.join(e.messages)}")
+    return value
+
+
+def validate_problem(data):
+    """Return the cleaned problem, raising InvalidRecord on invalid input.
+
+    Values are checked against their columns (type, max_length), so a bad
+    record is skipped rather than failing its whole batch in the database.
+    """
+
+    missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+    if missing:
+        raise InvalidRecord(f"missing {', '.join(missing)}")
+    try:
+        validate_slug(data['slug'])
+    except ValidationError:
+        raise InvalidRecord(f"invalid slug {data['slug']!r}")
+    if data['difficulty'] not in dict(Problem.DIFFICULTY_CHOICES):
+        raise InvalidRecord(f"invalid difficulty {data['difficulty']!r}")
+    for field in ('tags', 'examples', 'test_cases', 'solutions'):
+        if field in data and not isinstance(data[field], list):
+            raise InvalidRecord(f'{field} must be a list')
+    if not all(isinstance(tag, str) for tag in data.get('tags', [])):
+        raise InvalidRecord('tags must be strings')
+    for field in ('examples', 'test_cases', 'solutions'):
+        if not all(isinstance(item, dict) for item in data.get(field, [])):
+            raise InvalidRecord(f'{field} must be objects')
+
+    cleaned = {'slug': clean_field(Problem, 'slug', data['slug']), 'fields': {}}
+    for field in PROBLEM_FIELDS:
+        if field in data:
+            cleaned['fields'][field] = clean_field(Problem, field, data[field])
+
+    if 'test_cases' in data:
+        cleaned['test_cases'] = []
+        for case in data['test_cases']:
+            if 'input_data' not in case or 'expected_output' not in case:
+                raise InvalidRecord('test case needs input_data and expected_output')
+            cleaned['test_cases'].append(tuple(
+                clean_field(TestCase, field, case[field]) if field in case
+                else TestCase._meta.get_field(field).get_default()
+                for field in TEST_CASE_FIELDS
+            ))
+
+    if 'solutions' in data:
+        cleaned['solutions'] = []
+        for solution in data['solutions']:
+            if not solution.get('code') or not solution.get('language'):
+                raise InvalidRecord('solution needs code and language')
+            cleaned['solutions'].append(tuple(
+                clean_field(Solution, field, solution[field]) if field in solution
+                else Solution._meta.get_field(field).get_default()
+                for field in SOLUTION_FIELDS
+            ))
+    return cleaned
+
+
+class ProblemImporter:
+    """Upsert problems by slug in batches, touching only what changed"""
+
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+        self.stats = {
+            'read': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+            'invalid': 0, 'test_cases': 0, 'solutions': 0,
+        }
+        self.touched = {}
+        # Problems were added or (de)activated, which changes the site totals
+        self.totals_changed = False
+
+    def run(self, problems, on_error=None, on_batch=None):
+        batch = []
+        for data in problems:
+            self.stats['read'] += 1
+            try:
+                batch.append(validate_problem(data))
+            except InvalidRecord as e:
+                self.stats['invalid'] += 1
+                if on_error:
+                    on_error(data.get('slug'), e)
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+                if on_batch:
+                    on_batch(self.stats)
+
+        if batch:
+            self.flush(batch)
+            if on_batch:
+                on_batch(self.stats)
+
+        self.invalidate()
+        return self.stats
+
+    def flush(self, batch):
+        # Later duplicates of a slug win, as they would with sequential saves
+        batch = list({item['slug']: item for item in batch}.values())
+
+        with transaction.atomic():
+            existing = Problem.objects.in_bulk([item['slug'] for item in batch], field_name='slug')
+            now = timezone.now()
+
+            to_create, to_update, changed_fields = [], [], set()
+            for item in batch:
+                problem = existing.get(item['slug'])
+                if problem is None:
+                    problem = Problem(slug=item['slug'], **item['fields'])
+                    to_create.append(problem)
+                    continue
+
+                changed = {
+                    field for field, value in item['fields'].items()
+                    if getattr(problem, field) != value
+                }
+                if changed:
+                    for field in changed:
+                        setattr(problem, field, item['fields'][field])
+                    problem.updated_at = now
+                    to_update.append(problem)
+                    changed_fields |= changed
+
+            if to_create or 'is_active' in changed_fields:
+                self.totals_changed = True
+            Problem.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if to_update:
+                Problem.objects.bulk_update(to_update, sorted(changed_fields) + ['updated_at'],
+                                            batch_size=self.batch_size)
+
+            problems = {item['slug']: existing.get(item['slug']) for item in batch}
+            for problem in to_create:
+                problems[problem.slug] = problem
+
+            children_changed = self.sync_children(batch, problems, now)
+
+            created = {problem.id for problem in to_create}
+            updated = ({problem.id for problem in to_update} | children_changed) - created
+            self.stats['created'] += len(created)
+            self.stats['updated'] += len(updated)
+            self.stats['unchanged'] += len(batch) - len(created) - len(updated)
+            slugs = {problem.id: slug for slug, problem in problems.items()}
+            for problem_id in created | updated:
+                self.touched[problem_id] = slugs[problem_id]
+
+    def sync_children(self, batch, problems, now):
+        """Bring the test cases/solutions of each problem in line with its list.
+
+        Rows are matched by position: changed rows are updated in place and
+        keep their IDs (submissions refer to failed test cases by ID), extra
+        incoming rows are inserted and missing ones deleted.
+        """
+
+        changed = set()
+        for relation, model, fields, stat in (
+            ('test_cases', TestCase, TEST_CASE_FIELDS, 'test_cases'),
+            ('solutions', Solution, SOLUTION_FIELDS, 'solutions'),
+        ):
+            incoming = {
+                problems[item['slug']].id: item[relation]
+                for item in batch if relation in item
+            }
+            if not incoming:
+                continue
+
+            current = {problem_id: [] for problem_id in incoming}
+            for row in model.objects.filter(problem_id__in=incoming).order_by('id').values_list(
+                'problem_id', 'id', *fields
+            ):
+                current[row[0]].append((row[1], tuple(row[2:])))
+
+            to_create, to_update, to_delete = [], [], []
+            for problem_id, rows in incoming.items():
+                existing = current[problem_id]
+                if [values for _, values in existing] == rows:
+                    continue
+                changed.add(problem_id)
+                for (row_id, values), row in zip(existing, rows):
+                    if values != row:
+                        to_update.append(model(id=row_id, problem_id=problem_id, **dict(zip(fields, row))))
+                to_create.extend(
+                    model(problem_id=problem_id, **dict(zip(fields, row))) for row in rows[len(existing):]
+                )
+                to_delete.extend(row_id for row_id, _ in existing[len(rows):])
+
+            update_fields = list(fields)
+            if hasattr(model, 'updated_at'):
+                for row in to_update:
+                    row.updated_at = now
+                update_fields.append('updated_at')
+            if to_delete:
+                model.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                model.objects.bulk_update(to_update, update_fields, batch_size=500)
+            model.objects.bulk_create(to_create, batch_size=500)
+            self.stats[stat] += len(to_update) + len(to_create)
+
+        if changed:
+            Problem.objects.filter(id__in=changed).update(updated_at=now)
+        return changed
+
+    def invalidate(self):
+        # Bulk writes skip model signals, so caches are cleared explicitly
+        if not self.touched:
+            return
+        for problem_id, slug in self.touched.items():
+            invalidate_problem_detail(problem_id, slug)
+        invalidate_search_index()
+        invalidate_problem_list()
+        if self.totals_changed:
+            invalidate_dashboard()
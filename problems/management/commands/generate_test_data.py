@@ -0,0 +1,59 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.models import Problem
+from problems.testdata import TestDataError, TestDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Compute expected outputs for test cases, and generate new ones, by running the official solutions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('problems', nargs='+', help='Problem IDs or slugs')
+        parser.add_argument('--generator',
+                            help="Script printing one input per seed (python SCRIPT SEED); "
+                                 "'{slug}' in the path is replaced per problem")
+        parser.add_argument('--count', type=int, default=0, help='New test cases to generate per problem')
+        parser.add_argument('--seed', type=int, default=1, help='First seed passed to the generator')
+        parser.add_argument('--parallel', type=int, default=4, help='Judge batches run at once')
+        parser.add_argument('--dry-run', action='store_true', help='Run and check everything, write nothing')
+
+    def handle(self, *args, **options):
+        if options['count'] and not options['generator']:
+            raise CommandError('--count needs a --generator')
+
+        from submissions.judge0_service import get_judge_service
+        generator = TestDataGenerator(get_judge_service(), parallel=options['parallel'])
+        seeds = range(options['seed'], options['seed'] + options['count'])
+
+        failed = []
+        for lookup in options['problems']:
+            field = 'pk' if lookup.isdigit() else 'slug'
+            problem = Problem.objects.filter(**{field: lookup}).first()
+            if problem is None:
+                raise CommandError(f"Unknown problem '{lookup}'")
+
+            script = None
+            if options['count']:
+                script = options['generator'].replace('{slug}', problem.slug)
+                if not os.path.isfile(script):
+                    raise CommandError(f"Generator '{script}' not found")
+
+            try:
+                stats = generator.run(problem, script, seeds, dry_run=options['dry_run'])
+            except TestDataError as e:
+                failed.append(problem.slug)
+                self.stderr.write(self.style.ERROR(f'{problem.slug}: {e}'))
+                continue
+
+            self.stdout.write(
+                f"{problem.slug}: {stats['filled']} filled, {stats['created']} generated "
+                f"({stats['duplicates']} duplicate inputs skipped), "
+                f"{stats['solutions']} solutions agree"
+                + (f" ({stats['unsupported']} in languages the judge can't run)" if stats['unsupported'] else '')
+            )
+
+        if failed:
+            raise CommandError(f"Nothing written for {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS('Dry run, nothing written' if options['dry_run'] else 'Done'))
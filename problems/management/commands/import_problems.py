@@ -0,0 +1,67 @@
+import gzip
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.importer import InvalidRecord, ProblemImporter, iter_json_array, iter_ndjson, iter_problems
+
+
+class Command(BaseCommand):
+    help = 'Stream-import problems, test cases and solutions from JSON or NDJSON, upserting by slug'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON/NDJSON file (optionally .gz), or '-' for stdin")
+        parser.add_argument('--format', choices=('auto', 'json', 'ndjson'), default='auto',
+                            help='Input format; auto picks NDJSON for .ndjson/.jsonl files')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Problems upserted per transaction')
+        parser.add_argument('--strict', action='store_true',
+                            help='Abort on the first invalid problem instead of skipping it')
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        stream = self.open(path)
+        
+        fmt = options['format']
+        if fmt == 'auto':
+            name = path[:-3] if path.endswith('.gz') else path
+            fmt = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'json'
+        records = iter_ndjson(stream) if fmt == 'ndjson' else iter_json_array(stream)
+        
+        importer = ProblemImporter(batch_size=options['batch_size'])
+        
+        def on_error(slug, error):
+            if options['strict']:
+                raise CommandError(f'Invalid problem {slug!r}: {error}')
+            self.stderr.write(f'Skipping invalid problem {slug!r}: {error}')
+        
+        def on_batch(stats):
+            self.stdout.write(
+                f"{stats['read']} read: {stats['created']} created, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged, {stats['invalid']} invalid"
+            )
+        
+        try:
+            stats = importer.run(iter_problems(records), on_error=on_error, on_batch=on_batch)
+        except (ValueError, InvalidRecord) as e:
+            raise CommandError(f'Import stopped: {e}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['read']} problems ({stats['created']} created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['invalid']} invalid); "
+            f"wrote {stats['test_cases']} test cases and {stats['solutions']} solutions"
+        ))
+    
+    def open(self, path):
+        if path == '-':
+            return sys.stdin
+        try:
+            if path.endswith('.gz'):
+                return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8')
+            return open(path, encoding='utf-8')
+        except OSError as e:
+            raise CommandError(str(e))
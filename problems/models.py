@@ -7,6 +7,10 @@ User = get_user_model()
 class Problem(models.Model):
     """Model for coding problems"""
     
+    # Counters updated on every submission. They don't affect search or
+    # typeahead, and don't change the problem's version (updated_at)
+    STATS_FIELDS = ('acceptance_rate', 'total_submissions', 'total_accepted')
+    
     DIFFICULTY_CHOICES = [
         ('Easy', 'Easy'),
         ('Medium', 'Medium'),
@@ -60,7 +64,7 @@ class Problem(models.Model):
             self.acceptance_rate = round((self.total_accepted / self.total_submissions) * 100, 2)
         else:
             self.acceptance_rate = 0.0
-        self.save()
+        self.save(update_fields=self.STATS_FIELDS)
 
 
 class TestCase(models.Model):
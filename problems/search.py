@@ -0,0 +1,241 @@
+import bisect
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+
+from backend.cache import TieredCache
+from backend.routers import primary_reads
+
+from .models import Problem
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Relative weight of a term occurrence in each indexed field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.0,
+    'description': 1.0,
+}
+
+# Score multipliers for inexact term matches
+PREFIX_FACTOR = 0.6
+TYPO_FACTOR = 0.4
+
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+
+# Only the namespace version is used: bumping it makes every process rebuild
+index_generation = TieredCache('problems:search', 0)
+
+logger = logging.getLogger('problems')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def deletion_variants(term):
+    """All strings one deletion away from term, used for typo matching"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class ProblemSearchIndex:
+    """In-process inverted index over active problems with weighted fields"""
+    
+    def __init__(self, documents):
+        # term -> {problem_id: weighted term frequency}
+        self.postings = defaultdict(dict)
+        
+        for doc in documents:
+            fields = {
+                'title': doc['title'],
+                'tags': ' '.join(str(tag) for tag in doc['tags'] or []),
+                'description': doc['description'],
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for term in tokenize(text):
+                    entry = self.postings[term]
+                    entry[doc['id']] = entry.get(doc['id'], 0.0) + weight
+        
+        self.postings = dict(self.postings)
+        self.doc_count = len({pid for entry in self.postings.values() for pid in entry})
+        self.terms = sorted(self.postings)
+        self.idf = {
+            term: math.log(1 + self.doc_count / len(entry))
+            for term, entry in self.postings.items()
+        }
+        
+        # deletion variant -> terms, so typos resolve with dictionary lookups
+        self.variants = defaultdict(set)
+        for term in self.terms:
+            if len(term) >= MIN_TYPO_LENGTH:
+                for variant in deletion_variants(term):
+                    self.variants[variant].add(term)
+    
+    @classmethod
+    def build(cls):
+        documents = Problem.objects.filter(is_active=True).values(
+            'id', 'title', 'tags', 'description'
+        )
+        return cls(documents)
+    
+    def expand(self, token):
+        """Return (term, factor) pairs a query token matches"""
+        
+        matches = {}
+        if token in self.postings:
+            matches[token] = 1.0
+        
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self.terms, token)
+            for term in self.terms[start:]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_FACTOR)
+        
+        if not matches and len(token) >= MIN_TYPO_LENGTH:
+            candidates = set(self.variants.get(token, ()))
+            for variant in deletion_variants(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.variants.get(variant, ()))
+            for term in candidates:
+                matches.setdefault(term, TYPO_FACTOR)
+        
+        return matches.items()
+    
+    def search(self, query, limit=None):
+        """Return active problem IDs matching every query token, best first"""
+        
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        
+        scores = None
+        for token in dict.fromkeys(tokens):
+            token_scores = {}
+            for term, factor in self.expand(token):
+                idf = self.idf[term]
+                for problem_id, frequency in self.postings[term].items():
+                    score = factor * idf * frequency
+                    if score > token_scores.get(problem_id, 0.0):
+                        token_scores[problem_id] = score
+            
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    problem_id: score + token_scores[problem_id]
+                    for problem_id, score in scores.items()
+                    if problem_id in token_scores
+                }
+            if not scores:
+                return []
+        
+        ranked = sorted(scores, key=lambda problem_id: (-scores[problem_id], problem_id))
+        return ranked[:limit] if limit else ranked
+
+
+class TypeaheadIndex:
+    """Sorted prefix index over active problem titles, slugs and IDs"""
+    
+    def __init__(self, problems):
+        self.problems = {}
+        keys = []
+        for problem in problems:
+            problem_id = problem['id']
+            self.problems[problem_id] = {
+                'id': problem_id,
+                'title': problem['title'],
+                'slug': problem['slug'],
+                'difficulty': problem['difficulty'],
+            }
+            # Every word suffix of the title, so "sum" finds "Two Sum"
+            words = tokenize(problem['title'])
+            for position in range(len(words)):
+                keys.append((' '.join(words[position:]), position, problem_id))
+            keys.append((' '.join(tokenize(problem['slug'])), 0, problem_id))
+            keys.append((str(problem_id), -1, problem_id))
+        
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.entries = [(position, problem_id) for _, position, problem_id in keys]
+    
+    @classmethod
+    def build(cls):
+        problems = Problem.objects.filter(is_active=True).values(
+            'id', 'title', 'slug', 'difficulty'
+        )
+        return cls(problems)
+    
+    def lookup(self, query, limit=10):
+        """Return up to limit problems whose title, slug or ID starts with query"""
+        
+        query = ' '.join(tokenize(query))
+        if not query:
+            return []
+        
+        best = {}
+        start = bisect.bisect_left(self.keys, query)
+        for index in range(start, len(self.keys)):
+            key = self.keys[index]
+            if not key.startswith(query):
+                break
+            position, problem_id = self.entries[index]
+            # Exact ID first, then matches nearer the start of the title
+            rank = (position, len(key) - len(query))
+            if problem_id not in best or rank < best[problem_id]:
+                best[problem_id] = rank
+        
+        ranked = sorted(best, key=lambda problem_id: (best[problem_id], problem_id))
+        return [self.problems[problem_id] for problem_id in ranked[:limit]]
+
+
+class ProcessIndex:
+    """Per-process holder that rebuilds an index when problems change"""
+    
+    def __init__(self, builder):
+        self.builder = builder
+        self.index = None
+        self.generation = None
+        self.lock = threading.Lock()
+    
+    def get(self):
+        generation = index_generation.version()
+        if self.index is None or generation != self.generation:
+            with self.lock:
+                if self.index is None or generation != self.generation:
+                    with primary_reads():
+                        self.index = self.builder()
+                    self.generation = generation
+        return self.index
+
+
+search_index = ProcessIndex(ProblemSearchIndex.build)
+typeahead_index = ProcessIndex(TypeaheadIndex.build)
+
+
+def get_search_index():
+    return search_index.get()
+
+
+def get_typeahead_index():
+    return typeahead_index.get()
+
+
+def warm_indexes():
+    """Build both indexes at worker startup, ahead of the first request"""
+    try:
+        search_index.get()
+        typeahead_index.get()
+    except Exception as e:
+        # e.g. migrations not applied yet; indexes are built lazily instead
+        logger.warning(f"Skipping search index warm-up: {e}")
+
+
+def invalidate_search_index():
+    """Signal every process to rebuild its indexes on next use"""
+    index_generation.invalidate_all()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from backend.projection import SparseFieldsSerializerMixin
 from .models import Problem, TestCase, Solution
 
 
@@ -19,7 +20,7 @@ class SolutionSerializer(serializers.ModelSerializer):
                   'time_complexity', 'space_complexity')
 
 
-class ProblemListSerializer(serializers.ModelSerializer):
+class ProblemListSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for problem list view"""
     
     is_solved = serializers.SerializerMethodField()
@@ -30,11 +31,16 @@ class ProblemListSerializer(serializers.ModelSerializer):
                   'tags', 'acceptance_rate', 'is_solved')
     
     def get_is_solved(self, obj):
+        # List views resolve the viewer's solved set once for the whole page
+        solved_problem_ids = self.context.get('solved_problem_ids')
+        if solved_problem_ids is not None:
+            return obj.id in solved_problem_ids
+        
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             from submissions.models import Submission
             return Submission.objects.filter(
-                user=request.user,
+                user_id=request.user.pk,
                 problem=obj,
                 status='Accepted'
             ).exists()
@@ -42,12 +48,10 @@ class ProblemListSerializer(serializers.ModelSerializer):
 
 
 class ProblemDetailSerializer(serializers.ModelSerializer):
-    """Serializer for problem detail view"""
+    """Serializer for the shared (viewer-independent) part of problem detail"""
     
     test_cases = serializers.SerializerMethodField()
     solutions = SolutionSerializer(many=True, read_only=True)
-    is_solved = serializers.SerializerMethodField()
-    user_submissions_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Problem
@@ -55,30 +59,11 @@ class ProblemDetailSerializer(serializers.ModelSerializer):
                   'tags', 'constraints', 'examples', 'starter_code_python',
                   'starter_code_javascript', 'starter_code_java', 'starter_code_cpp',
                   'acceptance_rate', 'total_submissions', 'total_accepted',
-                  'test_cases', 'solutions', 'is_solved', 'user_submissions_count')
+                  'test_cases', 'solutions')
     
     def get_test_cases(self, obj):
         # Only return sample test cases to users
-        sample_cases = obj.test_cases.filter(is_sample=True, is_hidden=False)
+        sample_cases = getattr(obj, 'sample_test_cases', None)
+        if sample_cases is None:
+            sample_cases = obj.test_cases.filter(is_sample=True, is_hidden=False)
         return TestCaseSerializer(sample_cases, many=True).data
-    
-    def get_is_solved(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from submissions.models import Submission
-            return Submission.objects.filter(
-                user=request.user,
-                problem=obj,
-                status='Accepted'
-            ).exists()
-        return False
-    
-    def get_user_submissions_count(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from submissions.models import Submission
-            return Submission.objects.filter(
-                user=request.user,
-                problem=obj
-            ).count()
-        return 0
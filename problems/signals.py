@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_problem_detail, invalidate_problem_list
+from .models import Problem, Solution, TestCase
+from .search import invalidate_search_index
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def invalidate_problem(sender, instance, update_fields=None, **kwargs):
+    # Counters are served from their own short-lived cache, so saving only
+    # them keeps the shared payload and its ETag
+    if update_fields is not None and set(update_fields) <= set(Problem.STATS_FIELDS):
+        return
+    problem_id, slug = instance.pk, instance.slug
+
+    # After commit, so a build can't refill the cache from the old rows
+    def invalidate():
+        invalidate_problem_detail(problem_id, slug)
+        invalidate_search_index()
+        invalidate_problem_list()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=TestCase)
+@receiver(post_delete, sender=TestCase)
+@receiver(post_save, sender=Solution)
+@receiver(post_delete, sender=Solution)
+def invalidate_problem_children(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Bump the problem version so ETag/Last-Modified change with its children
+    Problem.objects.filter(pk=instance.problem_id).update(updated_at=timezone.now())
+    problem_id = instance.problem_id
+    transaction.on_commit(lambda: invalidate_problem_detail(problem_id))
@@ -0,0 +1,140 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_problem_detail
+from .models import Problem, TestCase
+
+GENERATOR_TIMEOUT = 30  # seconds per seed
+
+# Characters of inputs and outputs quoted in error messages
+EXCERPT = 200
+
+
+class TestDataError(Exception):
+    """Test data for a problem could not be produced"""
+
+
+def excerpt(text):
+    text = text.strip()
+    return text if len(text) <= EXCERPT else text[:EXCERPT] + '...'
+
+
+def run_generator(path, seed):
+    """The input a generator script prints for one seed (``python <path> <seed>``)"""
+    try:
+        completed = subprocess.run(
+            [sys.executable, path, str(seed)],
+            capture_output=True,
+            text=True,
+            timeout=GENERATOR_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        raise TestDataError(f'{path} timed out on seed {seed}')
+    if completed.returncode != 0:
+        raise TestDataError(f'{path} failed on seed {seed}: {excerpt(completed.stderr)}')
+    return completed.stdout.rstrip('\n')
+
+
+class TestDataGenerator:
+    """Fill in expected outputs by running a problem's official solutions.
+
+    Inputs are the problem's test cases with a blank expected output and,
+    given a generator script, one new hidden test case per seed. Every
+    official solution the judge can run is run on every input, in batches
+    of the judge's BATCH_SIZE with ``parallel`` batches in flight, and all
+    of them must produce the same output. A problem's test cases are then
+    written in one transaction, or not at all.
+    """
+
+    def __init__(self, judge, parallel=4):
+        self.judge = judge
+        self.parallel = parallel
+
+    def run(self, problem, generator=None, seeds=(), dry_run=False):
+        official = list(problem.solutions.all())
+        solutions = [solution for solution in official if self.judge.supports(solution.language)]
+        if not solutions:
+            raise TestDataError('no official solution in a language the judge can run')
+
+        blank = list(problem.test_cases.filter(expected_output=''))
+        seen = set(problem.test_cases.values_list('input_data', flat=True))
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            generated = list(pool.map(lambda seed: run_generator(generator, seed), seeds)) if generator else []
+            new_inputs = []
+            for stdin in generated:
+                # Small input spaces repeat themselves; keep the first of each
+                if stdin not in seen:
+                    seen.add(stdin)
+                    new_inputs.append(stdin)
+
+            inputs = [case.input_data for case in blank] + new_inputs
+            expected = self.expected_outputs(pool, solutions, inputs)
+
+        if not dry_run and inputs:
+            self.save(problem, blank, new_inputs, expected)
+        return {
+            'solutions': len(solutions),
+            'unsupported': len(official) - len(solutions),
+            'filled': len(blank),
+            'created': len(new_inputs),
+            'duplicates': len(generated) - len(new_inputs),
+        }
+
+    def expected_outputs(self, pool, solutions, inputs):
+        """The agreed output of the solutions for each input"""
+
+        size = self.judge.BATCH_SIZE
+        batches = [(solution, start) for solution in solutions for start in range(0, len(inputs), size)]
+        futures = [
+            pool.submit(self.judge.run_batch, solution.code, solution.language, inputs[start:start + size])
+            for solution, start in batches
+        ]
+
+        outputs = {solution.id: [None] * len(inputs) for solution in solutions}
+        try:
+            for (solution, start), future in zip(batches, futures):
+                for index, result in enumerate(future.result(), start=start):
+                    if result['status'] != 'Accepted':
+                        raise TestDataError(
+                            f"solution '{solution.title}' ({solution.language}) got {result['status']} "
+                            f"on input {excerpt(inputs[index])!r}: {excerpt(result['error_message'])}"
+                        )
+                    outputs[solution.id][index] = result['stdout'].strip()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+        expected = []
+        for index, stdin in enumerate(inputs):
+            answers = {solution: outputs[solution.id][index] for solution in solutions}
+            if len(set(answers.values())) > 1:
+                differing = '; '.join(
+                    f"'{solution.title}' ({solution.language}) printed {excerpt(output)!r}"
+                    for solution, output in answers.items()
+                )
+                raise TestDataError(f'official solutions disagree on input {excerpt(stdin)!r}: {differing}')
+            expected.append(outputs[solutions[0].id][index])
+        return expected
+
+    def save(self, problem, blank, new_inputs, expected):
+        with transaction.atomic():
+            for case, output in zip(blank, expected):
+                case.expected_output = output
+            TestCase.objects.bulk_update(blank, ['expected_output'], batch_size=500)
+            TestCase.objects.bulk_create(
+                [
+                    TestCase(problem=problem, input_data=stdin, expected_output=output, is_hidden=True)
+                    for stdin, output in zip(new_inputs, expected[len(blank):])
+                ],
+                batch_size=500
+            )
+            Problem.objects.filter(pk=problem.pk).update(updated_at=timezone.now())
+            # Bulk writes skip model signals, so the cached payload is dropped
+            # here, once the new rows are visible to whoever rebuilds it
+            transaction.on_commit(lambda: invalidate_problem_detail(problem.pk))
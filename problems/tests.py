@@ -0,0 +1,221 @@
+import json
+from io import StringIO
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.cache import clear_local_caches
+
+from .cache import (
+    dashboard_cache, detail_cache, get_dashboard, get_problem_detail, get_problem_stats, list_cache, stats_cache
+)
+from .importer import InvalidRecord, ProblemImporter, iter_json_array, iter_problems, validate_problem
+from .models import Problem, Solution, TestCase as ProblemTestCase
+
+
+def make_problem(slug, **fields):
+    problem = {
+        'slug': slug,
+        'title': slug.replace('-', ' ').title(),
+        'description': 'Return the sum of the two numbers.',
+        'difficulty': 'Easy',
+        'category': 'math',
+        'tags': ['math'],
+        'test_cases': [
+            {'input_data': '1 2\n', 'expected_output': '3\n', 'is_sample': True},
+            {'input_data': '2 2\n', 'expected_output': '4\n', 'is_hidden': True},
+        ],
+        'solutions': [{'title': 'Add', 'code': 'print(sum(map(int, input().split())))', 'language': 'python'}],
+    }
+    problem.update(fields)
+    return problem
+
+
+class StreamingParserTests(TestCase):
+    """Reading problem files without loading them whole"""
+
+    def test_json_array_across_chunk_boundaries(self):
+        records = [make_problem(f'problem-{i}', description='x' * i * 7) for i in range(20)]
+        text = json.dumps(records, indent=2)
+        for chunk_size in (1, 7, 64, len(text) * 2):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_json_array(StringIO(text), chunk_size)), records)
+
+    def test_json_array_errors(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(StringIO('{"slug": "a"}')))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(StringIO('[{"slug": "a"}, {"slug"'), chunk_size=4))
+
+    def test_fixture_records_are_nested(self):
+        records = [
+            {'model': 'problems.problem', 'pk': 1, 'fields': {'slug': 'a'}},
+            {'model': 'problems.testcase', 'pk': 1, 'fields': {'problem': 1, 'input_data': '1'}},
+            {'model': 'problems.solution', 'pk': 1, 'fields': {'problem': 1, 'code': 'x'}},
+            {'model': 'problems.problem', 'pk': 2, 'fields': {'slug': 'b'}},
+        ]
+        problems = list(iter_problems(records))
+        self.assertEqual([problem['slug'] for problem in problems], ['a', 'b'])
+        self.assertEqual(len(problems[0]['test_cases']), 1)
+        self.assertEqual(len(problems[0]['solutions']), 1)
+        self.assertEqual(problems[1]['test_cases'], [])
+
+    def test_orphan_fixture_record_is_invalid(self):
+        records = [{'model': 'problems.testcase', 'pk': 1, 'fields': {'problem': 9}}]
+        with self.assertRaises(InvalidRecord):
+            list(iter_problems(records))
+
+    def test_validate_problem_rejects_bad_records(self):
+        bad = {
+            'missing title': make_problem('a', title=''),
+            'bad slug': make_problem('not a slug'),
+            'bad difficulty': make_problem('a', difficulty='Trivial'),
+            'tags not a list': make_problem('a', tags='math'),
+            'test case without output': make_problem('a', test_cases=[{'input_data': '1'}]),
+            'solution without code': make_problem('a', solutions=[{'language': 'python'}]),
+            'title too long': make_problem('a', title='x' * 256),
+            'category not a string': make_problem('a', category=['math']),
+            'tags not strings': make_problem('a', tags=[{'name': 'math'}]),
+            'examples not objects': make_problem('a', examples=['1 2 -> 3']),
+            'test case not an object': make_problem('a', test_cases=['1 2']),
+            'sample flag not a boolean': make_problem('a', test_cases=[
+                {'input_data': '1', 'expected_output': '1', 'is_sample': 'sometimes'}
+            ]),
+            'solution language too long': make_problem('a', solutions=[{'code': 'x', 'language': 'x' * 51}]),
+        }
+        for reason, record in bad.items():
+            with self.subTest(reason):
+                with self.assertRaises(InvalidRecord):
+                    validate_problem(record)
+
+
+class ProblemImporterTests(TestCase):
+    """Upserting problems by slug"""
+
+    def run_import(self, problems, batch_size=3):
+        return ProblemImporter(batch_size=batch_size).run(problems)
+
+    def test_import_creates_problems_and_children(self):
+        stats = self.run_import([make_problem(f'problem-{i}') for i in range(5)])
+        self.assertEqual((stats['read'], stats['created'], stats['updated']), (5, 5, 0))
+        self.assertEqual(Problem.objects.count(), 5)
+        self.assertEqual(ProblemTestCase.objects.count(), 10)
+        self.assertEqual(Solution.objects.count(), 5)
+
+    def test_reimport_is_idempotent(self):
+        problems = [make_problem(f'problem-{i}') for i in range(5)]
+        self.run_import(problems)
+        test_case_ids = set(ProblemTestCase.objects.values_list('id', flat=True))
+        updated_at = dict(Problem.objects.values_list('slug', 'updated_at'))
+
+        stats = self.run_import(problems)
+        self.assertEqual((stats['created'], stats['updated'], stats['unchanged']), (0, 0, 5))
+        self.assertEqual((stats['test_cases'], stats['solutions']), (0, 0))
+        self.assertEqual(set(ProblemTestCase.objects.values_list('id', flat=True)), test_case_ids)
+        self.assertEqual(dict(Problem.objects.values_list('slug', 'updated_at')), updated_at)
+
+    def test_reimport_updates_only_what_changed(self):
+        self.run_import([make_problem(f'problem-{i}') for i in range(3)])
+        changed = [
+            make_problem('problem-0', title='Renamed'),
+            make_problem('problem-1', test_cases=[{'input_data': '5 5\n', 'expected_output': '10\n'}]),
+            make_problem('problem-2'),
+        ]
+        stats = self.run_import(changed)
+        self.assertEqual((stats['created'], stats['updated'], stats['unchanged']), (0, 2, 1))
+        self.assertEqual(Problem.objects.get(slug='problem-0').title, 'Renamed')
+        self.assertEqual(
+            list(ProblemTestCase.objects.filter(problem__slug='problem-1').values_list('input_data', flat=True)),
+            ['5 5\n']
+        )
+
+    def test_test_case_changes_keep_unchanged_ids(self):
+        cases = [{'input_data': f'{n} {n}\n', 'expected_output': f'{n * 2}\n'} for n in range(4)]
+        self.run_import([make_problem('problem-0', test_cases=cases)])
+        ids = list(ProblemTestCase.objects.order_by('id').values_list('id', flat=True))
+
+        cases[1] = {'input_data': '7 7\n', 'expected_output': '14\n'}
+        stats = self.run_import([make_problem('problem-0', test_cases=cases[:3])])
+        self.assertEqual((stats['updated'], stats['test_cases']), (1, 1))
+        rows = list(ProblemTestCase.objects.order_by('id').values_list('id', 'input_data'))
+        self.assertEqual(rows, [(ids[0], '0 0\n'), (ids[1], '7 7\n'), (ids[2], '2 2\n')])
+
+        stats = self.run_import([make_problem('problem-0', test_cases=cases)])
+        self.assertEqual(stats['test_cases'], 1)
+        self.assertEqual(list(ProblemTestCase.objects.order_by('id').values_list('id', flat=True))[:3], ids[:3])
+
+    def test_invalid_records_are_skipped(self):
+        errors = []
+        stats = ProblemImporter().run(
+            [make_problem('good'), make_problem('bad', difficulty='Trivial'), make_problem('long', title='x' * 256)],
+            on_error=lambda slug, error: errors.append(slug)
+        )
+        self.assertEqual((stats['created'], stats['invalid']), (1, 2))
+        self.assertEqual(errors, ['bad', 'long'])
+
+    def test_import_invalidates_list_pages_and_totals(self):
+        cache.clear()
+        clear_local_caches()
+        self.assertEqual(get_dashboard()['total_problems'], 0)
+        list_cache.set('page', ['cached'])
+        self.run_import([make_problem('problem-0')])
+        self.assertIsNone(list_cache.get('page'))
+        self.assertIsNone(dashboard_cache.get('totals'))
+        self.assertEqual(get_dashboard()['total_problems'], 1)
+
+
+class ProblemCacheTests(TestCase):
+    """Shared problem payloads and their invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.problem = Problem.objects.create(title='Two Sum', slug='two-sum', description='Add',
+                                              difficulty='Easy', category='array')
+
+    def test_counter_updates_keep_the_shared_payload(self):
+        version = get_problem_detail(self.problem.pk)['version']
+        self.problem.total_submissions += 1
+        self.problem.update_acceptance_rate()
+
+        self.assertIsNotNone(detail_cache.get(self.problem.pk))
+        self.problem.refresh_from_db()
+        self.assertEqual(self.problem.updated_at.timestamp(), version)
+        # Counters come from their own entry, refreshed once it expires
+        self.assertEqual(get_problem_stats(self.problem.pk)['total_submissions'], 0)
+        stats_cache.delete(self.problem.pk)
+        self.assertEqual(get_problem_stats(self.problem.pk)['total_submissions'], 1)
+
+    def test_invalidation_waits_for_commit(self):
+        get_problem_detail(self.problem.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.problem.title = 'Two Sum II'
+            self.problem.save()
+            self.assertIsNotNone(detail_cache.get(self.problem.pk))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_problem_detail(self.problem.pk)['payload']['title'], 'Two Sum II')
+
+    def test_build_overlapping_a_delete_is_not_stored(self):
+        def build():
+            # The problem changes and is invalidated while this build runs
+            detail_cache.delete(self.problem.pk)
+            return 'stale'
+
+        self.assertEqual(detail_cache.get_or_set(self.problem.pk, build), 'stale')
+        self.assertIsNone(detail_cache.get(self.problem.pk))
+        self.assertEqual(detail_cache.get_or_set(self.problem.pk, lambda: 'fresh'), 'fresh')
+        self.assertEqual(detail_cache.get(self.problem.pk), 'fresh')
+
+    def test_list_pages_are_shared_across_hosts(self):
+        Problem.objects.create(title='Add Two', slug='add-two', description='Add',
+                               difficulty='Easy', category='math')
+        client = APIClient()
+        first = client.get('/api/problems/', {'page_size': 1}, HTTP_HOST='evil.example.com')
+        self.assertEqual(first.data['next'], 'http://evil.example.com/api/problems/?page=2&page_size=1')
+
+        with self.assertNumQueries(0):
+            second = client.get('/api/problems/', {'page_size': 1}, HTTP_HOST='localhost')
+        self.assertEqual(second.data['next'], 'http://localhost/api/problems/?page=2&page_size=1')
+        self.assertEqual(second.data['results'], first.data['results'])
@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import ProblemListView, ProblemDetailView, ProblemTestCasesView
+from .views import DashboardView, ProblemListView, ProblemDetailView, ProblemTestCasesView, ProblemTypeaheadView
 
 urlpatterns = [
     path('', ProblemListView.as_view(), name='problem_list'),
+    path('typeahead/', ProblemTypeaheadView.as_view(), name='problem_typeahead'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('<int:pk>/', ProblemDetailView.as_view(), name='problem_detail'),
     path('<int:pk>/test-cases/', ProblemTestCasesView.as_view(), name='problem_test_cases'),
+    path('<slug:pk>/', ProblemDetailView.as_view(), name='problem_detail_slug'),
 ]
@@ -1,20 +1,100 @@
 from rest_framework import generics, filters, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
+from backend.pagination import KeysetPagination
+from backend.projection import SparseFieldsViewMixin
+from .cache import (
+    get_dashboard, get_problem_detail_by_lookup, get_problem_list_page, get_problem_stats, get_user_overlay
+)
+from .filters import ProblemSearchFilter
 from .models import Problem, TestCase
+from .search import get_typeahead_index
 from .serializers import ProblemListSerializer, ProblemDetailSerializer, TestCaseSerializer
 
 
-class ProblemListView(generics.ListAPIView):
+class ProblemListPagination(KeysetPagination):
+    """Page numbers by default (the frontend reads count), keyset on the list's ordering when asked"""
+    
+    ordering = ('id',)
+
+
+class ProblemListView(SparseFieldsViewMixin, generics.ListAPIView):
     """List all problems with filtering and search"""
     
     queryset = Problem.objects.filter(is_active=True)
     serializer_class = ProblemListSerializer
     permission_classes = (permissions.AllowAny,)
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = ProblemListPagination
+    # Search must follow ordering so relevance can replace the default order
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProblemSearchFilter]
     filterset_fields = ['difficulty', 'category']
-    search_fields = ['title', 'description', 'tags']
+    search_fields = ['title', 'tags', 'description']
     ordering_fields = ['id', 'difficulty', 'acceptance_rate', 'total_submissions']
     ordering = ['id']
+    field_sources = {'is_solved': ()}
+    # Only reads request.user.pk, so a token user will do
+    allow_token_user = True
+    
+    def get_queryset(self):
+        return self.project_queryset(super().get_queryset())
+    
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        # Anonymous pages are the same for everyone, so they are shared
+        build = super().list
+        return Response(get_problem_list_page(request, lambda: build(request, *args, **kwargs).data))
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_requested_fields()
+        if self.request.user.is_authenticated and (fields is None or 'is_solved' in fields):
+            from submissions.models import ArchivedSubmission, Submission
+            context['solved_problem_ids'] = set(Submission.objects.filter(
+                user_id=self.request.user.pk,
+                status='Accepted'
+            ).order_by().values_list('problem_id', flat=True).union(
+                ArchivedSubmission.objects.filter(
+                    user_id=self.request.user.pk,
+                    status='Accepted'
+                ).order_by().values_list('problem_id', flat=True)
+            ).order_by())
+        return context
+
+
+class ProblemTypeaheadView(APIView):
+    """Prefix matches on problem titles, slugs and IDs for autocomplete"""
+    
+    # Answered from memory; skipping authentication keeps it off the DB entirely
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    default_limit = 10
+    max_limit = 25
+    
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        
+        results = get_typeahead_index().lookup(query, limit=max(limit, 1))
+        return Response({'results': results})
+
+
+class DashboardView(APIView):
+    """Site-wide totals for the home page in one request"""
+    
+    # Same for everyone and cached, so nothing to authenticate
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    
+    def get(self, request):
+        return Response(get_dashboard())
 
 
 class ProblemDetailView(generics.RetrieveAPIView):
@@ -24,16 +104,41 @@ class ProblemDetailView(generics.RetrieveAPIView):
     serializer_class = ProblemDetailSerializer
     permission_classes = (permissions.AllowAny,)
     lookup_field = 'pk'
+    allow_token_user = True
     
-    def get_object(self):
-        # Support lookup by both ID and slug
-        lookup_value = self.kwargs.get(self.lookup_field)
+    def retrieve(self, request, *args, **kwargs):
+        # Shared payload is cached per problem, the per-user overlay is merged in
         try:
-            # Try to find by ID first
-            return self.queryset.get(pk=int(lookup_value))
-        except (ValueError, Problem.DoesNotExist):
-            # Fall back to slug
-            return self.queryset.get(slug=lookup_value)
+            problem_id, entry = get_problem_detail_by_lookup(self.kwargs.get(self.lookup_field))
+        except Problem.DoesNotExist:
+            raise Http404('No Problem matches the given query.')
+        
+        stats = get_problem_stats(problem_id)
+        overlay = get_user_overlay(request.user, problem_id)
+        etag = self.get_etag(problem_id, entry['version'], stats, overlay)
+        last_modified = int(entry['version'])
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = Response({**entry['payload'], **stats, **overlay})
+        
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+    
+    def get_etag(self, problem_id, version, stats, overlay):
+        user_id = self.request.user.pk if self.request.user.is_authenticated else 0
+        return '"{}-{}-{}-{}-{}-{}-{:d}"'.format(
+            problem_id,
+            int(version * 1000000),
+            stats.get('total_submissions', 0),
+            stats.get('total_accepted', 0),
+            user_id,
+            overlay['user_submissions_count'],
+            overlay['is_solved'],
+        )
 
 
 class ProblemTestCasesView(generics.ListAPIView):
@@ -0,0 +1,136 @@
+// API Configuration
+const API_BASE_URL = window.location.origin;
+
+// Data embedded by the server for the first render, taken once
+function takeInitialData() {
+    const element = document.getElementById('initial-data');
+    if (!element) return null;
+    element.remove();
+    return JSON.parse(element.textContent);
+}
+
+// Auth utilities
+function getAccessToken() {
+    return localStorage.getItem('access_token');
+}
+
+function setTokens(access, refresh) {
+    localStorage.setItem('access_token', access);
+    localStorage.setItem('refresh_token', refresh);
+}
+
+function clearTokens() {
+    localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('user_data');
+}
+
+function isAuthenticated() {
+    return !!getAccessToken();
+}
+
+async function fetchWithAuth(url, options = {}) {
+    const token = getAccessToken();
+    const headers = {
+        'Content-Type': 'application/json',
+        ...options.headers,
+    };
+    
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+    
+    const response = await fetch(url, {
+        ...options,
+        headers,
+    });
+    
+    if (response.status === 401) {
+        // Token expired, try to refresh
+        const refreshed = await refreshToken();
+        if (refreshed) {
+            // Retry the request
+            headers['Authorization'] = `Bearer ${getAccessToken()}`;
+            return fetch(url, { ...options, headers });
+        } else {
+            // Refresh failed, redirect to login
+            window.location.href = '/login/';
+        }
+    }
+    
+    return response;
+}
+
+async function refreshToken() {
+    const refresh = localStorage.getItem('refresh_token');
+    if (!refresh) return false;
+    
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/auth/token/refresh/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh }),
+        });
+        
+        if (response.ok) {
+            const data = await response.json();
+            localStorage.setItem('access_token', data.access);
+            return true;
+        }
+    } catch (error) {
+        console.error('Token refresh failed:', error);
+    }
+    
+    return false;
+}
+
+function logout() {
+    clearTokens();
+    window.location.href = '/';
+}
+
+// Update navigation based on auth status
+function updateNavigation() {
+    const authButtons = document.getElementById('authButtons');
+    const userMenu = document.getElementById('userMenu');
+    
+    if (isAuthenticated()) {
+        authButtons.innerHTML = '';
+        userMenu.classList.remove('hidden');
+        
+        // Get user data from localStorage
+        const userData = JSON.parse(localStorage.getItem('user_data') || '{}');
+        document.getElementById('username').textContent = userData.username || 'User';
+    } else {
+        authButtons.innerHTML = `
+            <a href="/login/" class="text-gray-500 hover:text-gray-700 px-3 py-2 rounded-md text-sm font-medium">
+                Sign in
+            </a>
+            <a href="/register/" class="bg-blue-600 text-white hover:bg-blue-700 px-4 py-2 rounded-md text-sm font-medium">
+                Sign up
+            </a>
+        `;
+        userMenu.classList.add('hidden');
+    }
+}
+
+// Toggle user dropdown
+document.addEventListener('DOMContentLoaded', function() {
+    updateNavigation();
+    
+    const userMenuButton = document.getElementById('userMenuButton');
+    const userDropdown = document.getElementById('userDropdown');
+    
+    if (userMenuButton) {
+        userMenuButton.addEventListener('click', function() {
+            userDropdown.classList.toggle('hidden');
+        });
+        
+        // Close dropdown when clicking outside
+        document.addEventListener('click', function(event) {
+            if (!userMenuButton.contains(event.target) && !userDropdown.contains(event.target)) {
+                userDropdown.classList.add('hidden');
+            }
+        });
+    }
+});
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Submission
+from .models import ArchivedSubmission, Submission
 
 
 @admin.register(Submission)
@@ -7,7 +7,7 @@ class SubmissionAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'problem', 'language', 'status', 'runtime', 'memory', 'created_at')
     list_filter = ('status', 'language', 'problem__difficulty', 'created_at')
     search_fields = ('user__username', 'problem__title')
-    readonly_fields = ('created_at', 'updated_at', 'judge0_token')
+    readonly_fields = ('code', 'created_at', 'updated_at', 'judge0_token')
     
     fieldsets = (
         ('Submission Info', {
@@ -22,3 +22,12 @@ class SubmissionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(ArchivedSubmission)
+class ArchivedSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'problem', 'language', 'status', 'created_at', 'archived_at')
+    list_filter = ('status', 'language')
+    search_fields = ('user__username', 'problem__title')
+    readonly_fields = ('code',)
+    raw_id_fields = ('user', 'problem', 'source')
@@ -0,0 +1,125 @@
+import hashlib
+import zlib
+
+# Stored next to every blob so that dictionaries can evolve: a new
+# dictionary set needs a new codec name, existing blobs keep decoding
+# with the one they were written with.
+CODEC = 'zlib-dict-v1'
+
+# Preset dictionaries of boilerplate common to submissions in each
+# language. zlib favours matches near the end, so the most frequent
+# snippets come last. Never edit these in place; add a new codec instead.
+DICTIONARIES = {
+    'zlib-dict-v1': {
+        'python': (
+            b'import sys\nimport math\nimport heapq\nimport bisect\n'
+            b'from collections import defaultdict, deque, Counter\n'
+            b'from typing import List, Optional\n'
+            b'class ListNode:\n    def __init__(self, val=0, next=None):\n'
+            b'class TreeNode:\n    def __init__(self, val=0, left=None, right=None):\n'
+            b'        self.val = val\n        self.left = left\n        self.right = right\n'
+            b'if __name__ == "__main__":\n'
+            b'sys.stdin.readline().strip()\n'
+            b'print(json.dumps(\n'
+            b'json.loads(input())\n'
+            b'list(map(int, input().split()))\n'
+            b'    :type nums: List[int]\n    :type target: int\n    :rtype: List[int]\n'
+            b'    """\n    pass\n'
+            b' = [0] * (n + 1)\n'
+            b'for i in range(len(nums)):\n'
+            b'        for j in range(i + 1, len(nums)):\n'
+            b'        if not root:\n            return None\n'
+            b'    return result\n'
+            b'        return False\n        return True\n'
+            b'class Solution:\n    def '
+            b'(self, nums: List[int], target: int) -> List[int]:\n'
+            b'def solve():\n'
+            b'        return '
+            b'    def '
+        ),
+        'javascript': (
+            b'const readline = require("readline");\n'
+            b'const rl = readline.createInterface({ input: process.stdin });\n'
+            b'const lines = [];\nrl.on("line", (line) => lines.push(line));\n'
+            b'rl.on("close", () => {\n'
+            b'JSON.parse(lines[0]);\n'
+            b'console.log(JSON.stringify(\n'
+            b'/**\n * @param {number[]} nums\n * @param {number} target\n * @return {number[]}\n */\n'
+            b'function ListNode(val, next) {\n'
+            b'function TreeNode(val, left, right) {\n'
+            b'    this.val = (val===undefined ? 0 : val)\n'
+            b'new Map();\nnew Set();\n'
+            b'for (let i = 0; i < nums.length; i++) {\n'
+            b'        for (let j = i + 1; j < nums.length; j++) {\n'
+            b'    return result;\n'
+            b'        return false;\n    }\n    return true;\n'
+            b'var '
+            b' = function('
+            b') {\n    \n};'
+            b'const '
+            b'let '
+        ),
+        'java': (
+            b'import java.util.*;\nimport java.io.*;\n'
+            b'public class Main {\n    public static void main(String[] args) throws IOException {\n'
+            b'        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));\n'
+            b'        Scanner sc = new Scanner(System.in);\n'
+            b'        System.out.println(\n'
+            b'Integer.parseInt(br.readLine().trim());\n'
+            b'Arrays.toString(\n'
+            b'public class ListNode {\n    int val;\n    ListNode next;\n'
+            b'public class TreeNode {\n    int val;\n    TreeNode left;\n    TreeNode right;\n'
+            b'Map<Integer, Integer> map = new HashMap<>();\n'
+            b'List<Integer> list = new ArrayList<>();\n'
+            b'for (int i = 0; i < nums.length; i++) {\n'
+            b'            for (int j = i + 1; j < nums.length; j++) {\n'
+            b'        return result;\n'
+            b'        return new int[]{};\n'
+            b'        return false;\n'
+            b'class Solution {\n    public '
+            b'int[] nums, int target'
+            b'    }\n}\n'
+        ),
+        'cpp': (
+            b'#include <bits/stdc++.h>\n#include <iostream>\n#include <vector>\n'
+            b'#include <string>\n#include <unordered_map>\n#include <algorithm>\n'
+            b'using namespace std;\n'
+            b'int main() {\n    ios::sync_with_stdio(false);\n    cin.tie(nullptr);\n'
+            b'    return 0;\n}\n'
+            b'cout << '
+            b' << endl;\n'
+            b'struct ListNode {\n    int val;\n    ListNode *next;\n'
+            b'struct TreeNode {\n    int val;\n    TreeNode *left;\n    TreeNode *right;\n'
+            b'unordered_map<int, int> '
+            b'vector<vector<int>> '
+            b'for (int i = 0; i < n; i++) {\n'
+            b'        for (int j = i + 1; j < n; j++) {\n'
+            b'for (int i = 0; i < nums.size(); i++) {\n'
+            b'        return result;\n'
+            b'        return false;\n'
+            b'class Solution {\npublic:\n    '
+            b'vector<int> '
+            b'(vector<int>& nums, int target) {\n'
+            b'    }\n};'
+        ),
+    },
+}
+
+
+def get_dictionary(codec, language):
+    return DICTIONARIES[codec].get(language, b'')
+
+
+def source_digest(code, language):
+    """Content address of a submission source, scoped to its language"""
+    return hashlib.sha256(language.encode() + b'\0' + code.encode()).hexdigest()
+
+
+def compress_source(code, language, codec=CODEC):
+    compressor = zlib.compressobj(level=9, zdict=get_dictionary(codec, language))
+    return compressor.compress(code.encode()) + compressor.flush()
+
+
+def decompress_source(data, language, codec):
+    decompressor = zlib.decompressobj(zdict=get_dictionary(codec, language))
+    return (decompressor.decompress(bytes(data)) + decompressor.flush()).decode()
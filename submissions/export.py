@@ -0,0 +1,170 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from backend.async_views import database_sync_to_async
+
+from .compression import decompress_source
+from .models import ArchivedSubmission, Submission
+
+EXPORT_FIELDS = ('id', 'user_id', 'problem_id', 'language', 'status', 'runtime', 'memory',
+                 'passed_test_cases', 'total_test_cases', 'created_at')
+CODE_FIELDS = ('source__language', 'source__codec', 'source__data')
+CHUNK_SIZE = 2000
+FORMATS = ('ndjson', 'csv')
+
+
+def parse_bound(value, end=False):
+    """Parse a date or datetime filter; a bare end date covers that whole day"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value!r}')
+        parsed = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_querysets(start=None, end=None, problem_id=None, status=None, include_archived=False):
+    """Filtered submission querysets to export, archived rows first"""
+
+    models = (ArchivedSubmission, Submission) if include_archived else (Submission,)
+    for model in models:
+        queryset = model.objects.using(settings.SUBMISSION_EXPORT_DATABASE).order_by()
+        if start:
+            queryset = queryset.filter(created_at__gte=start)
+        if end:
+            queryset = queryset.filter(created_at__lte=end)
+        if problem_id:
+            queryset = queryset.filter(problem_id=problem_id)
+        if status:
+            queryset = queryset.filter(status=status)
+        yield model, queryset
+
+
+def fetch_rows(model, queryset, include_code=False, after_id=0):
+    """The next batch of up to CHUNK_SIZE export rows, by ID after after_id"""
+
+    fields = EXPORT_FIELDS + CODE_FIELDS if include_code else EXPORT_FIELDS
+    if include_code and model is Submission:
+        fields += ('legacy_code',)
+    rows = []
+    for values in queryset.filter(id__gt=after_id).order_by('id').values_list(*fields)[:CHUNK_SIZE]:
+        row = dict(zip(EXPORT_FIELDS, values))
+        row['created_at'] = row['created_at'].isoformat()
+        if include_code:
+            extra = dict(zip(fields[len(EXPORT_FIELDS):], values[len(EXPORT_FIELDS):]))
+            if extra['source__data'] is not None:
+                row['code'] = decompress_source(
+                    extra['source__data'], extra['source__language'], extra['source__codec']
+                )
+            else:
+                row['code'] = extra.get('legacy_code', '')
+        rows.append(row)
+    return rows
+
+
+def iter_batches(querysets, include_code=False):
+    """Yield the rows of each queryset in keyset-paginated batches"""
+
+    for model, queryset in querysets:
+        after_id = 0
+        while True:
+            rows = fetch_rows(model, queryset, include_code, after_id)
+            if rows:
+                yield rows
+            if len(rows) < CHUNK_SIZE:
+                break
+            after_id = rows[-1]['id']
+
+
+async def aiter_batches(querysets, include_code=False):
+    """iter_batches for ASGI: each batch is fetched in the database executor"""
+
+    for model, queryset in querysets:
+        after_id = 0
+        while True:
+            rows = await database_sync_to_async(fetch_rows)(model, queryset, include_code, after_id)
+            if rows:
+                yield rows
+            if len(rows) < CHUNK_SIZE:
+                break
+            after_id = rows[-1]['id']
+
+
+class _LineBuffer:
+    """File-like sink so csv.writer returns each line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class ExportEncoder:
+    """Encode batches of rows as NDJSON or CSV bytes, optionally as one gzip stream.
+
+    Each batch becomes one block, so the server writes blocks rather than
+    single rows; gzip output is flushed at the end of every batch.
+    """
+
+    def __init__(self, fmt='ndjson', compress=False, include_code=False):
+        self.fmt = fmt
+        self.columns = EXPORT_FIELDS + ('code',) if include_code else EXPORT_FIELDS
+        self.writer = csv.writer(_LineBuffer())
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def output(self, data, flush=zlib.Z_SYNC_FLUSH):
+        if self.compressor is None:
+            return data
+        return self.compressor.compress(data) + self.compressor.flush(flush)
+
+    def start(self):
+        if self.fmt == 'csv':
+            return self.output(self.writer.writerow(self.columns).encode())
+        return b''
+
+    def encode(self, rows):
+        if self.fmt == 'csv':
+            lines = [self.writer.writerow([row[column] for column in self.columns]) for row in rows]
+        else:
+            lines = [json.dumps(row, separators=(',', ':')) + '\n' for row in rows]
+        return self.output(''.join(lines).encode())
+
+    def finish(self):
+        return self.output(b'', zlib.Z_FINISH)
+
+
+def export_stream(fmt='ndjson', compress=False, include_code=False, **filters):
+    """Bytes iterator for an export, constant memory regardless of size"""
+
+    encoder = ExportEncoder(fmt, compress, include_code)
+    block = encoder.start()
+    if block:
+        yield block
+    for rows in iter_batches(export_querysets(**filters), include_code=include_code):
+        yield encoder.encode(rows)
+    block = encoder.finish()
+    if block:
+        yield block
+
+
+async def aexport_stream(fmt='ndjson', compress=False, include_code=False, **filters):
+    """export_stream as an async iterator, which ASGI servers stream without buffering"""
+
+    encoder = ExportEncoder(fmt, compress, include_code)
+    block = encoder.start()
+    if block:
+        yield block
+    async for rows in aiter_batches(export_querysets(**filters), include_code=include_code):
+        yield encoder.encode(rows)
+    block = encoder.finish()
+    if block:
+        yield block
@@ -1,7 +1,19 @@
+import asyncio
 import requests
 import time
 import base64
+import httpx
+import weakref
 from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from backend.metrics import (
+    judge0_request_duration_seconds,
+    judge0_requests_total,
+    judge0_results_total,
+    judge0_wait_seconds,
+)
+from backend.tracing import record_span, set_attributes, span
 
 
 class Judge0Service:
@@ -15,6 +27,15 @@ class Judge0Service:
         'cpp': 54,         # C++ (GCC 9.2.0)
     }
     
+    # Judge0's default MAX_SUBMISSION_BATCH_SIZE
+    BATCH_SIZE = 20
+    
+    # Judge0 omits its timestamps unless they are asked for
+    RESULT_FIELDS = (
+        'token,status,stdout,stderr,compile_output,message,time,wall_time,memory,'
+        'created_at,finished_at'
+    )
+    
     def __init__(self):
         self.api_url = settings.JUDGE0_API_URL
         self.api_key = settings.JUDGE0_API_KEY
@@ -24,69 +45,94 @@ class Judge0Service:
         if self.api_key:
             self.headers['X-RapidAPI-Key'] = self.api_key
     
+    def request(self, operation, method, url, **kwargs):
+        """Call the Judge0 API, recording latency and outcome per operation"""
+        
+        outcome = 'error'
+        try:
+            with judge0_request_duration_seconds.time(operation=operation):
+                response = requests.request(method, url, headers=self.headers, **kwargs)
+                response.raise_for_status()
+            outcome = 'ok'
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Judge0 API error: {str(e)}")
+        finally:
+            judge0_requests_total.inc(operation=operation, outcome=outcome)
+    
     def submit_code(self, code, language, stdin='', expected_output=''):
         """Submit code to Judge0 for execution"""
         
+        payload = self.build_payload(code, language, stdin, expected_output)
+        with span('submit'):
+            return self.request(
+                'submit',
+                'POST',
+                f'{self.api_url}/submissions',
+                json=payload,
+                params={'base64_encoded': 'true', 'wait': 'false'}
+            )
+    
+    def build_payload(self, code, language, stdin, expected_output):
+        """Base64-encoded submission body; no expected_output means any clean run is accepted"""
+        
         language_id = self.LANGUAGE_IDS.get(language)
         if not language_id:
             raise ValueError(f"Unsupported language: {language}")
         
         # Encode code and input/output
-        encoded_code = base64.b64encode(code.encode()).decode()
-        encoded_stdin = base64.b64encode(stdin.encode()).decode()
-        encoded_expected_output = base64.b64encode(expected_output.encode()).decode()
-        
-        payload = {
-            'source_code': encoded_code,
-            'language_id': language_id,
-            'stdin': encoded_stdin,
-            'expected_output': encoded_expected_output,
-        }
-        
-        try:
-            response = requests.post(
-                f'{self.api_url}/submissions',
-                json=payload,
-                headers=self.headers,
-                params={'base64_encoded': 'true', 'wait': 'false'}
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Judge0 API error: {str(e)}")
+        with span('encode'):
+            payload = {
+                'source_code': base64.b64encode(code.encode()).decode(),
+                'language_id': language_id,
+                'stdin': base64.b64encode(stdin.encode()).decode(),
+                # Judge0 limits files in KB; stdout is one, so this caps what a run prints
+                'max_file_size': max(settings.JUDGE_MAX_OUTPUT_BYTES // 1024, 1),
+            }
+            if expected_output is not None:
+                payload['expected_output'] = base64.b64encode(expected_output.encode()).decode()
+        return payload
+    
+    def supports(self, language):
+        return language in self.LANGUAGE_IDS
     
     def get_submission(self, token):
         """Get submission result from Judge0"""
         
-        try:
-            response = requests.get(
-                f'{self.api_url}/submissions/{token}',
-                headers=self.headers,
-                params={'base64_encoded': 'true'}
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Judge0 API error: {str(e)}")
+        return self.request(
+            'get',
+            'GET',
+            f'{self.api_url}/submissions/{token}',
+            params={'base64_encoded': 'true', 'fields': self.RESULT_FIELDS}
+        )
     
     def wait_for_result(self, token, max_attempts=10, delay=1):
         """Poll Judge0 until submission is processed"""
         
-        for _ in range(max_attempts):
-            result = self.get_submission(token)
-            status_id = result.get('status', {}).get('id')
+        for attempt in range(1, max_attempts + 1):
+            with span('poll', attempt=attempt) as record:
+                result = self.get_submission(token)
+                status_id = result.get('status', {}).get('id')
+                set_attributes(record, status_id=status_id)
             
-            # Status IDs: 1-2 = In Queue/Processing, 3+ = Finished
-            if status_id and status_id > 2:
+            if self.is_finished(status_id):
+                self.record_timings(result)
                 return result
             
             time.sleep(delay)
         
         raise Exception("Timeout waiting for Judge0 result")
     
+    @staticmethod
+    def is_finished(status_id):
+        # Status IDs: 1-2 = In Queue/Processing, 3+ = Finished
+        return bool(status_id and status_id > 2)
+    
     def run_test_case(self, code, language, input_data, expected_output):
         """Run code against a single test case"""
         
+        started = time.perf_counter()
+        
         # Submit code
         submission = self.submit_code(code, language, input_data, expected_output)
         token = submission.get('token')
@@ -96,9 +142,52 @@ class Judge0Service:
         
         # Wait for result
         result = self.wait_for_result(token)
+        return self.finish(result, language, started)
+    
+    def run_batch(self, code, language, inputs, max_attempts=30, delay=1):
+        """Run code on up to BATCH_SIZE inputs with one submit and shared polls.
+        
+        Results come back in input order, parsed like run_test_case's.
+        Outputs aren't compared, so a clean run is 'Accepted'.
+        """
+        
+        submissions = self.request(
+            'submit_batch',
+            'POST',
+            f'{self.api_url}/submissions/batch',
+            json={'submissions': [self.build_payload(code, language, stdin, None) for stdin in inputs]},
+            params={'base64_encoded': 'true'}
+        )
+        tokens = [submission.get('token') for submission in submissions]
+        if not all(tokens):
+            raise Exception(f"Judge0 rejected part of a batch: {submissions}")
+        
+        results = {}
+        for attempt in range(max_attempts):
+            pending = [token for token in tokens if token not in results]
+            response = self.request(
+                'get_batch',
+                'GET',
+                f'{self.api_url}/submissions/batch',
+                params={'tokens': ','.join(pending), 'base64_encoded': 'true', 'fields': self.RESULT_FIELDS}
+            )
+            for result in response.get('submissions', []):
+                if self.is_finished(result.get('status', {}).get('id')):
+                    results[result['token']] = self.parse_result(result)
+            if len(results) == len(tokens):
+                return [results[token] for token in tokens]
+            time.sleep(delay)
         
-        # Parse result
-        return self.parse_result(result)
+        raise Exception("Timeout waiting for Judge0 batch results")
+    
+    def finish(self, result, language, started):
+        """Parse a finished result, recording wait time and verdict"""
+        
+        judge0_wait_seconds.observe(time.perf_counter() - started, language=language)
+        with span('decode'):
+            parsed = self.parse_result(result)
+        judge0_results_total.inc(status=parsed['status'], language=language)
+        return parsed
     
     def parse_result(self, result):
         """Parse Judge0 result into a standardized format"""
@@ -142,12 +231,137 @@ class Judge0Service:
             'error_message': stderr or compile_output or '',
         }
     
+    @staticmethod
+    def record_timings(result):
+        """Split Judge0's own time into queue wait and execution spans"""
+        
+        created = parse_datetime(result.get('created_at') or '')
+        finished = parse_datetime(result.get('finished_at') or '')
+        if not created or not finished:
+            return
+        total = (finished - created).total_seconds()
+        wall_time = float(result.get('wall_time') or result.get('time') or 0)
+        record_span('judge0_queue', max(total - wall_time, 0))
+        record_span('judge0_execution', wall_time, cpu_time=result.get('time'))
+    
     @staticmethod
     def decode_base64(encoded_str):
-        """Decode base64 encoded string"""
+        """Decode base64 encoded output, at most JUDGE_MAX_OUTPUT_BYTES of it"""
         if not encoded_str:
             return ''
+        limit = settings.JUDGE_MAX_OUTPUT_BYTES
+        # Only the quads covering the limit are decoded; Judge0 wraps its
+        # base64 in lines, so twice as many characters are taken first
+        quads = limit // 3 + 1
+        chunk = encoded_str[:quads * 8].replace('\n', '')[:quads * 4]
         try:
-            return base64.b64decode(encoded_str).decode()
+            return base64.b64decode(chunk)[:limit].decode(errors='replace')
         except Exception:
-            return encoded_str
+            return encoded_str[:limit]
+
+
+class AsyncJudge0Service(Judge0Service):
+    """Judge0Service whose network calls are coroutines, for async views.
+    
+    Requests go through one pooled httpx client per event loop, and polls
+    sleep with asyncio, so a waiting run costs a coroutine, not a thread.
+    """
+    
+    # Clients are bound to the loop they were created on
+    _clients = weakref.WeakKeyDictionary()
+    
+    def get_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Judge0 is called from many concurrent runs; keep connections warm
+            client = httpx.AsyncClient(
+                timeout=settings.JUDGE0_TIMEOUT,
+                limits=httpx.Limits(max_connections=settings.JUDGE0_MAX_CONNECTIONS),
+            )
+            self._clients[loop] = client
+        return client
+    
+    async def request(self, operation, method, url, **kwargs):
+        """Call the Judge0 API, recording latency and outcome per operation"""
+        
+        outcome = 'error'
+        try:
+            with judge0_request_duration_seconds.time(operation=operation):
+                response = await self.get_client().request(method, url, headers=self.headers, **kwargs)
+                response.raise_for_status()
+            outcome = 'ok'
+            return response.json()
+        except httpx.HTTPError as e:
+            raise Exception(f"Judge0 API error: {str(e)}")
+        finally:
+            judge0_requests_total.inc(operation=operation, outcome=outcome)
+    
+    async def submit_code(self, code, language, stdin='', expected_output=''):
+        """Submit code to Judge0 for execution"""
+        
+        payload = self.build_payload(code, language, stdin, expected_output)
+        with span('submit'):
+            return await self.request(
+                'submit',
+                'POST',
+                f'{self.api_url}/submissions',
+                json=payload,
+                params={'base64_encoded': 'true', 'wait': 'false'}
+            )
+    
+    async def get_submission(self, token):
+        """Get submission result from Judge0"""
+        
+        return await self.request(
+            'get',
+            'GET',
+            f'{self.api_url}/submissions/{token}',
+            params={'base64_encoded': 'true', 'fields': self.RESULT_FIELDS}
+        )
+    
+    async def wait_for_result(self, token, max_attempts=10, delay=1):
+        """Poll Judge0 until submission is processed"""
+        
+        for attempt in range(1, max_attempts + 1):
+            with span('poll', attempt=attempt) as record:
+                result = await self.get_submission(token)
+                status_id = result.get('status', {}).get('id')
+                set_attributes(record, status_id=status_id)
+            
+            if self.is_finished(status_id):
+                self.record_timings(result)
+                return result
+            
+            await asyncio.sleep(delay)
+        
+        raise Exception("Timeout waiting for Judge0 result")
+    
+    async def run_test_case(self, code, language, input_data, expected_output):
+        """Run code against a single test case"""
+        
+        started = time.perf_counter()
+        submission = await self.submit_code(code, language, input_data, expected_output)
+        token = submission.get('token')
+        
+        if not token:
+            raise Exception("Failed to get submission token from Judge0")
+        
+        result = await self.wait_for_result(token)
+        return self.finish(result, language, started)
+
+
+def get_judge_service():
+    """Judge selected by JUDGE_BACKEND: 'judge0', or 'local' for development"""
+    if settings.JUDGE_BACKEND == 'local':
+        from .local_judge import LocalJudgeService
+        return LocalJudgeService()
+    return Judge0Service()
+
+
+def get_async_judge_service():
+    """Coroutine-based counterpart of get_judge_service()"""
+    if settings.JUDGE_BACKEND == 'local':
+        from .local_judge import AsyncLocalJudgeService
+        return AsyncLocalJudgeService()
+    return AsyncJudge0Service()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+
+from backend.tracing import span
+
+from .output import read_output
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def output_limit():
+    """preexec_fn making the child's writes past JUDGE_MAX_OUTPUT_BYTES fail, as Judge0's max_file_size does"""
+    if resource is None:
+        return None
+    limit = settings.JUDGE_MAX_OUTPUT_BYTES
+    return lambda: resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))
+
+
+class LocalJudgeService:
+    """Stand-in for Judge0 that runs Python submissions in a local subprocess.
+
+    Used when ``JUDGE_BACKEND = 'local'``, for development, benchmarks and
+    the query budget suite. There is no sandbox beyond an isolated
+    interpreter, a time limit and an output limit, so never enable it where
+    untrusted users can submit code. Output goes to temporary files, of
+    which at most JUDGE_MAX_OUTPUT_BYTES is read back.
+    """
+
+    TIME_LIMIT = 5  # seconds
+    BATCH_SIZE = 20  # inputs per run_batch call, as with Judge0
+
+    def run_test_case(self, code, language, input_data, expected_output):
+        """Run code against a single test case"""
+
+        if language != 'python':
+            return self.result('Internal Error', error=f'Local judge cannot run {language}')
+
+        started = time.perf_counter()
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            try:
+                with span('execute'):
+                    completed = subprocess.run(
+                        [sys.executable, '-I', '-c', code],
+                        input=input_data.encode(),
+                        stdout=stdout,
+                        stderr=stderr,
+                        timeout=self.TIME_LIMIT,
+                        preexec_fn=output_limit()
+                    )
+            except subprocess.TimeoutExpired:
+                return self.result('Time Limit Exceeded', runtime=self.TIME_LIMIT)
+            runtime = round(time.perf_counter() - started, 3)
+            return self.verdict(completed.returncode, runtime, stdout, stderr, expected_output)
+
+    def verdict(self, returncode, runtime, stdout_file, stderr_file, expected_output):
+        """Judge a finished run from the output files it wrote"""
+
+        exceeded = os.fstat(stdout_file.fileno()).st_size >= settings.JUDGE_MAX_OUTPUT_BYTES
+        stdout, stderr = read_output(stdout_file), read_output(stderr_file)
+
+        if returncode != 0:
+            if exceeded:
+                return self.result('Runtime Error', runtime, stdout, 'Output limit exceeded')
+            status = 'Compilation Error' if 'SyntaxError' in stderr else 'Runtime Error'
+            return self.result(status, runtime, stdout, stderr)
+        if expected_output is not None and stdout.strip() != expected_output.strip():
+            return self.result('Wrong Answer', runtime, stdout, stderr)
+        return self.result('Accepted', runtime, stdout, stderr)
+
+    def run_batch(self, code, language, inputs):
+        """Run code on each input in turn; with no expected output a clean run is 'Accepted'"""
+
+        return [self.run_test_case(code, language, stdin, None) for stdin in inputs]
+
+    @staticmethod
+    def supports(language):
+        return language == 'python'
+
+    @staticmethod
+    def result(status, runtime=None, stdout='', error=''):
+        """Result in the same shape as Judge0Service.parse_result"""
+        return {
+            'status': status,
+            'status_id': None,
+            'status_description': status,
+            'runtime': runtime,
+            'memory': None,
+            'stdout': stdout,
+            'stderr': error,
+            'compile_output': '',
+            'error_message': error,
+        }
+
+
+class AsyncLocalJudgeService(LocalJudgeService):
+    """LocalJudgeService for async views, waiting on the subprocess without a thread"""
+
+    async def run_test_case(self, code, language, input_data, expected_output):
+        """Run code against a single test case"""
+
+        if language != 'python':
+            return self.result('Internal Error', error=f'Local judge cannot run {language}')
+
+        started = time.perf_counter()
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            with span('execute'):
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable, '-I', '-c', code,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=stdout,
+                    stderr=stderr,
+                    preexec_fn=output_limit()
+                )
+                try:
+                    await asyncio.wait_for(process.communicate(input_data.encode()), self.TIME_LIMIT)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    return self.result('Time Limit Exceeded', runtime=self.TIME_LIMIT)
+            runtime = round(time.perf_counter() - started, 3)
+            return self.verdict(process.returncode, runtime, stdout, stderr, expected_output)
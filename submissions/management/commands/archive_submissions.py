@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from submissions.models import ArchivedSubmission, SourceCode, Submission
+
+
+class Command(BaseCommand):
+    help = 'Move submissions older than the archive age out of the hot submissions table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.SUBMISSION_ARCHIVE_AFTER_DAYS,
+                            help='Archive submissions created more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Submissions moved per transaction')
+        parser.add_argument('--sleep', type=float, default=0.5,
+                            help='Seconds to pause between batches')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after archiving this many submissions')
+    
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        batch_size = options['batch_size']
+        archived = 0
+        
+        while options['limit'] is None or archived < options['limit']:
+            moved = self.archive_batch(cutoff, batch_size)
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f'Archived {archived} submissions')
+            
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {archived} submissions older than {cutoff:%Y-%m-%d} archived'
+        ))
+    
+    def archive_batch(self, cutoff, batch_size):
+        with transaction.atomic():
+            submissions = list(
+                Submission.objects.select_for_update(skip_locked=True)
+                .filter(created_at__lt=cutoff)
+                .exclude(status__in=('Pending', 'Processing'))
+                .order_by('id')[:batch_size]
+            )
+            if not submissions:
+                return 0
+            
+            # Rows never converted to compressed storage get their blob now
+            pending = {}
+            for submission in submissions:
+                if not submission.source_id:
+                    blob = SourceCode.build(submission.legacy_code, submission.language)
+                    pending.setdefault(blob.digest, blob)
+                    submission.pending_digest = blob.digest
+            if pending:
+                SourceCode.objects.bulk_create(pending.values(), ignore_conflicts=True)
+                blob_ids = dict(
+                    SourceCode.objects.filter(digest__in=pending).values_list('digest', 'id')
+                )
+            
+            ArchivedSubmission.objects.bulk_create(
+                [
+                    ArchivedSubmission.from_submission(
+                        submission,
+                        submission.source_id or blob_ids[submission.pending_digest]
+                    )
+                    for submission in submissions
+                ],
+                ignore_conflicts=True
+            )
+            Submission.objects.filter(id__in=[submission.id for submission in submissions]).delete()
+        return len(submissions)
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from submissions.models import SourceCode, Submission
+
+
+class Command(BaseCommand):
+    help = 'Move legacy plain-text submission code into compressed, deduplicated storage'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Submissions converted per transaction')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between batches')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after converting this many submissions')
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        converted = 0
+        
+        while options['limit'] is None or converted < options['limit']:
+            rows = list(
+                Submission.objects.filter(source__isnull=True, id__gt=last_id)
+                .exclude(legacy_code='')
+                .order_by('id')
+                .values_list('id', 'language', 'legacy_code')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            # Short transaction per batch, so row locks are only held briefly
+            with transaction.atomic():
+                blobs = {}
+                digests = []
+                for submission_id, language, code in rows:
+                    blob = SourceCode.build(code, language)
+                    blobs.setdefault(blob.digest, blob)
+                    digests.append((submission_id, blob.digest))
+                
+                SourceCode.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+                blob_ids = dict(
+                    SourceCode.objects.filter(digest__in=blobs).values_list('digest', 'id')
+                )
+                
+                submissions = [
+                    Submission(id=submission_id, source_id=blob_ids[digest], legacy_code='')
+                    for submission_id, digest in digests
+                ]
+                Submission.objects.bulk_update(submissions, ['source', 'legacy_code'])
+            
+            converted += len(rows)
+            self.stdout.write(f'Converted {converted} submissions (up to id {last_id})')
+            
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {converted} submissions converted, {SourceCode.objects.count()} distinct sources stored'
+        ))
@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.export import FORMATS, export_stream, parse_bound
+
+
+class Command(BaseCommand):
+    help = 'Stream submissions to NDJSON or CSV for analytics'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-',
+                            help="Output file, or '-' for stdout")
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output')
+        parser.add_argument('--start', help='Only submissions created on/after this date or datetime')
+        parser.add_argument('--end', help='Only submissions created on/before this date or datetime')
+        parser.add_argument('--problem', type=int, help='Only submissions for this problem ID')
+        parser.add_argument('--status', help="Only submissions with this status, e.g. 'Accepted'")
+        parser.add_argument('--include-archived', action='store_true',
+                            help='Also export submissions from the archive table')
+        parser.add_argument('--include-code', action='store_true',
+                            help='Include decoded source code in each row')
+    
+    def handle(self, *args, **options):
+        try:
+            start = parse_bound(options['start'])
+            end = parse_bound(options['end'], end=True)
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        stream = export_stream(
+            fmt=options['format'],
+            compress=options['gzip'],
+            include_code=options['include_code'],
+            start=start,
+            end=end,
+            problem_id=options['problem'],
+            status=options['status'],
+            include_archived=options['include_archived'],
+        )
+        
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        written = 0
+        try:
+            for chunk in stream:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from problems.search import invalidate_search_index
+from submissions.synthetic import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate users, problems and skewed submissions for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--problems', type=int, default=500)
+        parser.add_argument('--submissions', type=int, default=100000)
+        parser.add_argument('--test-cases', type=int, default=10, help='Test cases per problem')
+        parser.add_argument('--days', type=int, default=365, help='Spread submissions over this many days')
+        parser.add_argument('--problem-skew', type=float, default=1.0,
+                            help='Zipf exponent of problem popularity (0 = uniform)')
+        parser.add_argument('--user-skew', type=float, default=1.1,
+                            help='Zipf exponent of user activity (0 = uniform)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert')
+        parser.add_argument('--prefix', default='synthetic', help='Prefix of generated usernames and slugs')
+        parser.add_argument('--seed', type=int, help='Random seed, for reproducible data')
+        parser.add_argument('--skip-activity-stats', action='store_true',
+                            help="Don't rebuild per-user activity stats (slow for many users)")
+
+    def handle(self, *args, **options):
+        generator = SyntheticDataGenerator(
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            problem_skew=options['problem_skew'],
+            user_skew=options['user_skew'],
+        )
+
+        self.run_step('users', generator.create_users(options['users']), options['users'])
+        self.run_step(
+            'problems',
+            generator.create_problems(options['problems'], test_cases=options['test_cases']),
+            options['problems']
+        )
+        try:
+            self.run_step('submissions', generator.create_submissions(options['submissions']),
+                          options['submissions'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('Updating problem and user counters...')
+        generator.update_problem_stats()
+        generator.update_user_stats()
+        if not options['skip_activity_stats']:
+            self.run_step('activity stats', generator.rebuild_activity_stats(), None)
+
+        # Bulk inserts skip the signals that keep the search index fresh
+        invalidate_search_index()
+        self.stdout.write(self.style.SUCCESS('Synthetic data generated'))
+
+    def run_step(self, name, progress, total):
+        start = time.monotonic()
+        done = 0
+        for done in progress:
+            elapsed = time.monotonic() - start
+            rate = done / elapsed if elapsed else 0
+            self.stdout.write(f"{name}: {done}{f'/{total}' if total else ''} ({rate:,.0f}/s)")
+        self.stdout.write(f'{name}: done in {time.monotonic() - start:.1f}s')
@@ -0,0 +1,69 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Summarize judge pipeline traces per language and stage'
+    # Stages nest (test_case contains submit/poll/decode) and judge0_queue /
+    # judge0_execution come from Judge0's clock during polling, so stage
+    # times are compared with each other rather than summed.
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=str(settings.TRACES_FILE),
+                            help='Trace file to read (defaults to TRACES_FILE)')
+        parser.add_argument('--name', default='submission', choices=('submission', 'run'),
+                            help='Which traces to summarize')
+        parser.add_argument('--language', help='Only this language')
+
+    def handle(self, *args, **options):
+        # language -> stage -> per-trace total milliseconds
+        stages = defaultdict(lambda: defaultdict(list))
+        totals = defaultdict(list)
+
+        try:
+            with open(options['file']) as f:
+                for line in f:
+                    try:
+                        trace = json.loads(line)
+                    except ValueError:
+                        continue
+                    if trace.get('name') != options['name']:
+                        continue
+                    language = trace.get('attributes', {}).get('language', 'unknown')
+                    if options['language'] and language != options['language']:
+                        continue
+
+                    totals[language].append(trace['duration_ms'])
+                    per_stage = defaultdict(float)
+                    for span in trace['spans']:
+                        per_stage[span['name']] += span.get('duration_ms') or 0
+                    for stage, duration in per_stage.items():
+                        stages[language][stage].append(duration)
+        except FileNotFoundError:
+            raise CommandError(f"No trace file at {options['file']}")
+
+        if not totals:
+            self.stdout.write('No traces found.')
+            return
+
+        for language in sorted(totals):
+            durations = totals[language]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{language}: {len(durations)} traces, '
+                f'p50 {percentile(durations, 0.5):.1f}ms, p95 {percentile(durations, 0.95):.1f}ms'
+            ))
+            self.stdout.write(f"  {'stage':<24}{'traces':>8}{'mean ms':>12}{'p50 ms':>12}{'p95 ms':>12}")
+            by_time = sorted(stages[language].items(), key=lambda item: -sum(item[1]))
+            for stage, values in by_time:
+                self.stdout.write(
+                    f'  {stage:<24}{len(values):>8}{sum(values) / len(values):>12.1f}'
+                    f'{percentile(values, 0.5):>12.1f}{percentile(values, 0.95):>12.1f}'
+                )
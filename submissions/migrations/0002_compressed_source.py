@@ -0,0 +1,47 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('language', models.CharField(max_length=20)),
+                ('codec', models.CharField(default='zlib-dict-v1', max_length=20)),
+                ('data', models.BinaryField()),
+                ('size', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # The existing "code" column is kept as-is and only renamed in the
+        # model state, so this migration never rewrites the submissions table.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='submission',
+                    old_name='code',
+                    new_name='legacy_code',
+                ),
+                migrations.AlterField(
+                    model_name='submission',
+                    name='legacy_code',
+                    field=models.TextField(blank=True, db_column='code', default=''),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='submissions.sourcecode'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0001_initial'),
+        ('submissions', '0002_compressed_source'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSubmission',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('language', models.CharField(choices=[('python', 'Python 3'), ('javascript', 'JavaScript'), ('java', 'Java'), ('cpp', 'C++')], max_length=20)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Processing', 'Processing'), ('Accepted', 'Accepted'), ('Wrong Answer', 'Wrong Answer'), ('Time Limit Exceeded', 'Time Limit Exceeded'), ('Memory Limit Exceeded', 'Memory Limit Exceeded'), ('Runtime Error', 'Runtime Error'), ('Compilation Error', 'Compilation Error'), ('Internal Error', 'Internal Error')], max_length=30)),
+                ('runtime', models.IntegerField(blank=True, null=True)),
+                ('memory', models.IntegerField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('passed_test_cases', models.IntegerField(default=0)),
+                ('total_test_cases', models.IntegerField(default=0)),
+                ('failed_test_case', models.JSONField(blank=True, null=True)),
+                ('judge0_token', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_submissions', to='problems.problem')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_submissions', to='submissions.sourcecode')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='submissions_user_id_ae0587_idx'), models.Index(fields=['problem', '-created_at'], name='submissions_problem_2da608_idx')],
+            },
+        ),
+    ]
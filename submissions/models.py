@@ -1,10 +1,55 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from problems.models import Problem
+from .compression import CODEC, compress_source, decompress_source, source_digest
 
 User = get_user_model()
 
 
+class SourceCode(models.Model):
+    """Compressed submission source, stored once per distinct (language, code)"""
+    
+    digest = models.CharField(max_length=64, unique=True)
+    language = models.CharField(max_length=20)
+    codec = models.CharField(max_length=20, default=CODEC)
+    data = models.BinaryField()
+    size = models.IntegerField()  # uncompressed size in bytes
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.language} source {self.digest[:12]}"
+    
+    @classmethod
+    def build(cls, code, language):
+        """Unsaved instance for the given source"""
+        return cls(
+            digest=source_digest(code, language),
+            language=language,
+            codec=CODEC,
+            data=compress_source(code, language),
+            size=len(code.encode()),
+        )
+    
+    @classmethod
+    def store(cls, code, language):
+        """Return the stored blob for this source, creating it if new"""
+        blob = cls.build(code, language)
+        stored, _ = cls.objects.get_or_create(
+            digest=blob.digest,
+            defaults={
+                'language': blob.language,
+                'codec': blob.codec,
+                'data': blob.data,
+                'size': blob.size,
+            }
+        )
+        return stored
+    
+    def decode(self):
+        return decompress_source(self.data, self.language, self.codec)
+
+
 class Submission(models.Model):
     """Model for code submissions"""
     
@@ -30,7 +75,9 @@ class Submission(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submissions')
     problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='submissions')
     
-    code = models.TextField()
+    # Source lives in SourceCode; legacy_code holds rows not yet converted
+    source = models.ForeignKey(SourceCode, on_delete=models.PROTECT, null=True, blank=True, related_name='submissions')
+    legacy_code = models.TextField(blank=True, default='', db_column='code')
     language = models.CharField(max_length=20, choices=LANGUAGE_CHOICES)
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='Pending')
     
@@ -62,6 +109,25 @@ class Submission(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.problem.title} - {self.status}"
     
+    @property
+    def code(self):
+        """Decoded source, whether stored compressed or still in the legacy column"""
+        if not hasattr(self, '_code'):
+            self._code = self.source.decode() if self.source_id else self.legacy_code
+        return self._code
+    
+    @code.setter
+    def code(self, value):
+        self._code = value
+        self._code_pending = True
+    
+    def save(self, *args, **kwargs):
+        if getattr(self, '_code_pending', False):
+            self.source = SourceCode.store(self._code, self.language)
+            self.legacy_code = ''
+            self._code_pending = False
+        super().save(*args, **kwargs)
+    
     def update_problem_stats(self):
         """Update problem statistics after submission"""
         self.problem.total_submissions += 1
@@ -69,7 +135,67 @@ class Submission(models.Model):
             self.problem.total_accepted += 1
         self.problem.update_acceptance_rate()
     
+    def update_activity_stats(self):
+        """Record this finished submission in the user's precomputed statistics"""
+        from users.models import UserStats
+        UserStats.record(self)
+    
     def update_user_stats(self):
         """Update user statistics after accepted submission"""
         if self.status == 'Accepted':
             self.user.update_stats()
+
+
+class ArchivedSubmission(models.Model):
+    """Submission moved out of the hot table once older than the archive age"""
+    
+    # Keeps the original submission ID so links and lookups still resolve
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_submissions')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='archived_submissions')
+    
+    source = models.ForeignKey(SourceCode, on_delete=models.PROTECT, related_name='archived_submissions')
+    language = models.CharField(max_length=20, choices=Submission.LANGUAGE_CHOICES)
+    status = models.CharField(max_length=30, choices=Submission.STATUS_CHOICES)
+    
+    # Results
+    runtime = models.IntegerField(null=True, blank=True)  # in milliseconds
+    memory = models.IntegerField(null=True, blank=True)  # in KB
+    error_message = models.TextField(blank=True)
+    passed_test_cases = models.IntegerField(default=0)
+    total_test_cases = models.IntegerField(default=0)
+    failed_test_case = models.JSONField(null=True, blank=True)
+    judge0_token = models.CharField(max_length=255, blank=True)
+    
+    # Timestamps carried over from the original submission
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    # Copied as-is when a submission is archived
+    COPIED_FIELDS = ('id', 'user_id', 'problem_id', 'language', 'status', 'runtime', 'memory',
+                     'error_message', 'passed_test_cases', 'total_test_cases',
+                     'failed_test_case', 'judge0_token', 'created_at', 'updated_at')
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['problem', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.problem.title} - {self.status} (archived)"
+    
+    @property
+    def code(self):
+        if not hasattr(self, '_code'):
+            self._code = self.source.decode()
+        return self._code
+    
+    @classmethod
+    def from_submission(cls, submission, source_id):
+        archived = cls(source_id=source_id)
+        for field in cls.COPIED_FIELDS:
+            setattr(archived, field, getattr(submission, field))
+        return archived
@@ -0,0 +1,63 @@
+import io
+from itertools import zip_longest
+
+from django.conf import settings
+
+
+def read_output(file):
+    """Output a judge run wrote to a temporary file, up to JUDGE_MAX_OUTPUT_BYTES"""
+    file.seek(0)
+    return file.read(settings.JUDGE_MAX_OUTPUT_BYTES).decode(errors='replace')
+
+
+def clip(text, tail=False):
+    """At most SUBMISSION_OUTPUT_EXCERPT characters of text, marking what was cut"""
+    limit = settings.SUBMISSION_OUTPUT_EXCERPT
+    if not text or len(text) <= limit:
+        return text
+    # Errors end with the interesting part, outputs start with it
+    return '...' + text[-limit:] if tail else text[:limit] + '...'
+
+
+def first_difference(output, expected):
+    """1-based number of the first line where output and expected differ, or None"""
+    pairs = zip_longest(io.StringIO(output.strip()), io.StringIO(expected.strip()), fillvalue='')
+    for number, (actual, wanted) in enumerate(pairs, start=1):
+        if actual.rstrip() != wanted.rstrip():
+            return number
+    return None
+
+
+def from_line(text, line):
+    """Excerpt of text starting at a 1-based line number"""
+    if not line or line == 1:
+        return clip(text.strip())
+    lines = io.StringIO(text.strip())
+    for _ in range(line - 1):
+        lines.readline()
+    return '...\n' + clip(lines.read())
+
+
+def failure_details(test_case, result):
+    """What a submission keeps of its first failed test.
+
+    The test case is referenced by ID rather than copied; input and
+    expected output are only quoted for sample tests, whose data users can
+    already see. Outputs are excerpted from their first differing line, so
+    a row stays small however much the program printed.
+    """
+    output = result.get('stdout', '')
+    line = None
+    if result['status'] == 'Wrong Answer' and test_case.expected_output:
+        line = first_difference(output, test_case.expected_output)
+    details = {
+        'test_case_id': test_case.id,
+        'is_sample': test_case.is_sample,
+        'line': line,
+        'output': from_line(output, line),
+        'error': clip(result.get('error_message', ''), tail=True),
+    }
+    if test_case.is_sample:
+        details['input'] = clip(test_case.input_data)
+        details['expected'] = from_line(test_case.expected_output, line)
+    return details
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from backend.projection import SparseFieldsSerializerMixin
 from .models import Submission
 from problems.serializers import ProblemListSerializer
 
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Submission model"""
     
     problem_title = serializers.CharField(source='problem.title', read_only=True)
@@ -23,6 +24,8 @@ class SubmissionSerializer(serializers.ModelSerializer):
 class SubmissionCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating submissions"""
     
+    code = serializers.CharField(style={'base_template': 'textarea.html'})
+    
     class Meta:
         model = Submission
         fields = ('problem', 'code', 'language')
@@ -0,0 +1,270 @@
+import random
+from bisect import bisect
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from problems.models import Problem, Solution, TestCase
+from .models import SourceCode, Submission
+
+User = get_user_model()
+
+TOPICS = ['array', 'string', 'hash-table', 'dynamic-programming', 'math', 'sorting', 'greedy',
+          'depth-first-search', 'binary-search', 'tree', 'graph', 'two-pointers', 'stack',
+          'heap', 'sliding-window', 'backtracking', 'linked-list', 'bit-manipulation']
+WORDS = ['Two', 'Sum', 'Longest', 'Substring', 'Median', 'Sorted', 'Arrays', 'Palindromic',
+         'Container', 'Water', 'Roman', 'Integer', 'Valid', 'Parentheses', 'Merge', 'Lists',
+         'Path', 'Island', 'Window', 'Maximum', 'Minimum', 'Subarray', 'Tree', 'Graph', 'Cycle',
+         'Course', 'Schedule', 'Kth', 'Largest', 'Element', 'Rotate', 'Matrix', 'Word', 'Search']
+
+DIFFICULTY_WEIGHTS = {'Easy': 35, 'Medium': 45, 'Hard': 20}
+# Chance that a submission to a problem of this difficulty is accepted
+ACCEPTANCE = {'Easy': 0.6, 'Medium': 0.45, 'Hard': 0.3}
+LANGUAGE_WEIGHTS = {'python': 50, 'cpp': 20, 'java': 15, 'javascript': 15}
+FAILURE_WEIGHTS = {
+    'Wrong Answer': 55, 'Time Limit Exceeded': 15, 'Runtime Error': 15,
+    'Compilation Error': 10, 'Memory Limit Exceeded': 5,
+}
+SOURCE_TEMPLATES = {
+    'python': 'class Solution:\n    def solve(self, nums):\n        seen = {{}}\n'
+              '        for i, n in enumerate(nums):\n            seen[n] = i  # {0}\n'
+              '        return sorted(seen)[:{0}]\n',
+    'cpp': 'class Solution {{\npublic:\n    vector<int> solve(vector<int>& nums) {{\n'
+           '        sort(nums.begin(), nums.end());  // {0}\n        return nums;\n    }}\n}};',
+    'java': 'class Solution {{\n    public int[] solve(int[] nums) {{\n'
+            '        Arrays.sort(nums);  // {0}\n        return nums;\n    }}\n}}\n',
+    'javascript': 'var solve = function(nums) {{\n    const seen = new Map();  // {0}\n'
+                  '    nums.forEach((n, i) => seen.set(n, i));\n    return [...seen.keys()];\n}};',
+}
+
+
+def zipf_weights(count, exponent):
+    """Cumulative weights where rank r is drawn in proportion to 1 / r**exponent"""
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def weighted_table(weights):
+    """(values, cumulative weights) for drawing with bisect"""
+    return list(weights), list(accumulate(weights.values()))
+
+
+class RowWriter:
+    """Insert plain tuples into a model's table, bypassing the ORM.
+
+    PostgreSQL gets COPY, which loads millions of rows a minute; other
+    databases get a batched executemany. Rows must list values in the
+    order of ``fields`` and may not rely on field defaults or auto_now.
+    """
+
+    def __init__(self, model, fields):
+        self.table = model._meta.db_table
+        self.columns = [model._meta.get_field(field).column for field in fields]
+        self.datetime_indexes = [
+            index for index, field in enumerate(fields)
+            if model._meta.get_field(field).get_internal_type() == 'DateTimeField'
+        ]
+
+    def write(self, rows):
+        column_list = ', '.join(connection.ops.quote_name(column) for column in self.columns)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                with cursor.cursor.copy(f'COPY {connection.ops.quote_name(self.table)} ({column_list}) FROM STDIN') as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                return
+
+            adapt = connection.ops.adapt_datetimefield_value
+            if self.datetime_indexes:
+                rows = [list(row) for row in rows]
+                for row in rows:
+                    for index in self.datetime_indexes:
+                        row[index] = adapt(row[index])
+            placeholders = ', '.join(['%s'] * len(self.columns))
+            cursor.executemany(
+                f'INSERT INTO {connection.ops.quote_name(self.table)} ({column_list}) VALUES ({placeholders})',
+                rows
+            )
+
+
+class SyntheticDataGenerator:
+    """Production-shaped data with realistic skew.
+
+    Problem popularity and user activity both follow a Zipf distribution,
+    so a few problems and power users account for most submissions;
+    verdicts depend on difficulty, and recent days are busier than old
+    ones. Everything is bulk inserted, and generated names carry a prefix
+    so repeated runs don't collide.
+    """
+
+    SUBMISSION_FIELDS = ('user', 'problem', 'source', 'legacy_code', 'language', 'status', 'runtime',
+                         'memory', 'error_message', 'passed_test_cases', 'total_test_cases',
+                         'judge0_token', 'created_at', 'updated_at')
+
+    def __init__(self, prefix='synthetic', seed=None, batch_size=10000, days=365,
+                 problem_skew=1.0, user_skew=1.1, sources_per_language=500):
+        self.prefix = prefix
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.problem_skew = problem_skew
+        self.user_skew = user_skew
+        self.sources_per_language = sources_per_language
+        self.now = timezone.now()
+
+    def create_users(self, count, password='synthetic-pass'):
+        hashed = make_password(password)
+        start = User.objects.filter(username__startswith=f'{self.prefix}-user-').count()
+        for offset in range(0, count, self.batch_size):
+            User.objects.bulk_create(
+                User(
+                    username=f'{self.prefix}-user-{start + i}',
+                    email=f'{self.prefix}-user-{start + i}@example.com',
+                    password=hashed,
+                )
+                for i in range(offset, min(offset + self.batch_size, count))
+            )
+            yield min(offset + self.batch_size, count)
+
+    def create_problems(self, count, test_cases=10, samples=3):
+        start = Problem.objects.filter(slug__startswith=f'{self.prefix}-problem-').count()
+        difficulties, difficulty_weights = weighted_table(DIFFICULTY_WEIGHTS)
+        for offset in range(0, count, self.batch_size):
+            problems = []
+            for i in range(start + offset, start + min(offset + self.batch_size, count)):
+                title = ' '.join(self.random.sample(WORDS, self.random.randint(2, 4)))
+                problems.append(Problem(
+                    title=f'{title} {i}',
+                    slug=f'{self.prefix}-problem-{i}',
+                    description=' '.join(self.random.choices(WORDS, k=self.random.randint(80, 300))).lower(),
+                    difficulty=difficulties[bisect(difficulty_weights, self.random.random() * difficulty_weights[-1])],
+                    category=self.random.choice(TOPICS),
+                    tags=self.random.sample(TOPICS, self.random.randint(1, 4)),
+                    constraints='1 <= nums.length <= 10^5',
+                    examples=[{'input': 'nums = [2,7,11,15]', 'output': '[0,1]'}],
+                    starter_code_python='class Solution:\n    def solve(self, nums):\n        pass\n',
+                ))
+            problems = Problem.objects.bulk_create(problems)
+
+            TestCase.objects.bulk_create(
+                (
+                    TestCase(
+                        problem=problem,
+                        input_data=' '.join(str(self.random.randint(-1000, 1000)) for _ in range(20)),
+                        expected_output=str(self.random.randint(0, 1000)),
+                        is_sample=index < samples,
+                        is_hidden=index >= samples,
+                    )
+                    for problem in problems for index in range(test_cases)
+                ),
+                batch_size=self.batch_size
+            )
+            Solution.objects.bulk_create(
+                Solution(problem=problem, title='Hash map', approach='One pass with a hash map.',
+                         code=SOURCE_TEMPLATES['python'].format(0), language='python',
+                         time_complexity='O(n)', space_complexity='O(n)')
+                for problem in problems
+            )
+            yield min(offset + self.batch_size, count)
+
+    def create_sources(self):
+        """A pool of stored sources per language, shared by generated submissions"""
+
+        sources = {}
+        for language, template in SOURCE_TEMPLATES.items():
+            blobs = [SourceCode.build(template.format(i), language) for i in range(self.sources_per_language)]
+            SourceCode.objects.bulk_create(blobs, ignore_conflicts=True, batch_size=1000)
+            sources[language] = list(SourceCode.objects.filter(
+                digest__in=[blob.digest for blob in blobs]
+            ).values_list('id', flat=True))
+        return sources
+
+    def create_submissions(self, count):
+        users = list(User.objects.filter(username__startswith=f'{self.prefix}-user-').values_list('id', flat=True))
+        problems = list(Problem.objects.filter(
+            slug__startswith=f'{self.prefix}-problem-'
+        ).annotate(test_case_count=Count('test_cases')).values_list('id', 'difficulty', 'test_case_count'))
+        if not users or not problems:
+            raise ValueError('Generate users and problems before submissions')
+
+        # Rank order is random, so popularity isn't correlated with ID
+        self.random.shuffle(users)
+        self.random.shuffle(problems)
+        user_weights = zipf_weights(len(users), self.user_skew)
+        problem_weights = zipf_weights(len(problems), self.problem_skew)
+        languages, language_weights = weighted_table(LANGUAGE_WEIGHTS)
+        failures, failure_weights = weighted_table(FAILURE_WEIGHTS)
+        sources = self.create_sources()
+        writer = RowWriter(Submission, self.SUBMISSION_FIELDS)
+        rand = self.random.random
+        span = self.days * 86400
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            user_ids = self.random.choices(users, cum_weights=user_weights, k=size)
+            picked = self.random.choices(problems, cum_weights=problem_weights, k=size)
+            rows = []
+            for user_id, (problem_id, difficulty, total) in zip(user_ids, picked):
+                language = languages[bisect(language_weights, rand() * language_weights[-1])]
+                if rand() < ACCEPTANCE[difficulty]:
+                    status, passed = 'Accepted', total
+                else:
+                    status = failures[bisect(failure_weights, rand() * failure_weights[-1])]
+                    passed = int(rand() * total)
+                ran = status in ('Accepted', 'Wrong Answer')
+                # Squaring skews activity towards recent days
+                created_at = self.now - timedelta(seconds=int(rand() ** 2 * span))
+                rows.append((
+                    user_id, problem_id, self.random.choice(sources[language]), '', language, status,
+                    int(rand() * 500) + 5 if ran else None, int(rand() * 40000) + 8000 if ran else None,
+                    '' if ran else f'{status} on test {passed + 1}', passed, total, '',
+                    created_at, created_at,
+                ))
+            with transaction.atomic():
+                writer.write(rows)
+            yield offset + size
+
+    def update_problem_stats(self):
+        """Recompute counters of generated problems in one grouped query"""
+
+        problems = Problem.objects.filter(slug__startswith=f'{self.prefix}-problem-').annotate(
+            submitted=Count('submissions'),
+            accepted=Count('submissions', filter=Q(submissions__status='Accepted')),
+        ).only('id')
+        updated = []
+        for problem in problems.iterator(chunk_size=self.batch_size):
+            problem.total_submissions = problem.submitted
+            problem.total_accepted = problem.accepted
+            problem.acceptance_rate = round(problem.accepted / problem.submitted * 100, 2) if problem.submitted else 0.0
+            updated.append(problem)
+        Problem.objects.bulk_update(updated, Problem.STATS_FIELDS, batch_size=self.batch_size)
+
+    def update_user_stats(self):
+        """solved_count and points for generated users, as User.update_stats computes them"""
+
+        points = {'Easy': 10, 'Medium': 20, 'Hard': 30}
+        totals = {}
+        solved = Submission.objects.filter(
+            user__username__startswith=f'{self.prefix}-user-', status='Accepted'
+        ).order_by().values_list('user_id', 'problem_id', 'problem__difficulty').distinct()
+        for user_id, _, difficulty in solved.iterator(chunk_size=self.batch_size):
+            count, score = totals.get(user_id, (0, 0))
+            totals[user_id] = (count + 1, score + points[difficulty])
+
+        users = []
+        for user_id, (count, score) in totals.items():
+            users.append(User(id=user_id, solved_count=count, points=score))
+        User.objects.bulk_update(users, ['solved_count', 'points'], batch_size=self.batch_size)
+
+    def rebuild_activity_stats(self):
+        from users.models import UserStats
+
+        user_ids = User.objects.filter(username__startswith=f'{self.prefix}-user-').values_list('id', flat=True)
+        for index, user_id in enumerate(user_ids.iterator(), 1):
+            UserStats(user_id=user_id).rebuild()
+            if index % 1000 == 0:
+                yield index
@@ -0,0 +1,195 @@
+import zlib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.routers import PIN_KEY
+from problems.models import Problem, TestCase as ProblemTestCase
+
+from .compression import CODEC, DICTIONARIES, compress_source, decompress_source, source_digest
+from .models import ArchivedSubmission, SourceCode, Submission
+from .output import clip, first_difference
+
+SOURCES = {
+    'python': 'class Solution:\n    def twoSum(self, nums: List[int], target: int) -> List[int]:\n'
+              '        seen = {}\n        for i, n in enumerate(nums):\n'
+              '            if target - n in seen:\n                return [seen[target - n], i]\n'
+              '            seen[n] = i  # héllo\n',
+    'javascript': 'var twoSum = function(nums, target) {\n    const seen = new Map();\n'
+                  '    for (let i = 0; i < nums.length; i++) {\n        seen.set(nums[i], i);\n    }\n};',
+    'java': 'class Solution {\n    public int[] twoSum(int[] nums, int target) {\n'
+            '        return new int[]{};\n    }\n}\n',
+    'cpp': 'class Solution {\npublic:\n    vector<int> twoSum(vector<int>& nums, int target) {\n'
+           '        return {};\n    }\n};',
+}
+
+
+class CompressionTests(TestCase):
+    """Dictionary compression of submission sources"""
+
+    def test_round_trip_per_language(self):
+        for language, code in SOURCES.items():
+            with self.subTest(language):
+                data = compress_source(code, language)
+                self.assertEqual(decompress_source(data, language, CODEC), code)
+
+    def test_dictionary_shrinks_boilerplate(self):
+        for language, code in SOURCES.items():
+            with self.subTest(language):
+                self.assertLess(len(compress_source(code, language)), len(zlib.compress(code.encode(), 9)))
+
+    def test_language_without_dictionary_round_trips(self):
+        self.assertNotIn('ruby', DICTIONARIES[CODEC])
+        code = 'puts gets.to_i * 2\n'
+        self.assertEqual(decompress_source(compress_source(code, 'ruby'), 'ruby', CODEC), code)
+
+    def test_blob_needs_its_own_dictionary(self):
+        data = compress_source(SOURCES['python'], 'python')
+        with self.assertRaises(zlib.error):
+            decompress_source(data, 'java', CODEC)
+
+    def test_digest_is_scoped_to_language(self):
+        self.assertEqual(source_digest('x', 'python'), source_digest('x', 'python'))
+        self.assertNotEqual(source_digest('x', 'python'), source_digest('x', 'cpp'))
+
+
+class SubmissionTestMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'Test-pass-123')
+        cls.other = User.objects.create_user('bob', 'bob@example.com', 'Test-pass-123')
+        cls.problem = Problem.objects.create(title='Two Sum', slug='two-sum', description='Add',
+                                             difficulty='Easy', category='array')
+
+    def submit(self, code, user=None, status='Accepted', age_days=0):
+        submission = Submission(user=user or self.user, problem=self.problem, language='python', status=status)
+        submission.code = code
+        submission.save()
+        if age_days:
+            Submission.objects.filter(pk=submission.pk).update(
+                created_at=timezone.now() - timedelta(days=age_days)
+            )
+        return submission
+
+
+class SourceStorageTests(SubmissionTestMixin, TestCase):
+    """Submission sources stored once per distinct (language, code)"""
+
+    def test_identical_sources_share_a_blob(self):
+        first = self.submit(SOURCES['python'])
+        second = self.submit(SOURCES['python'], user=self.other)
+        self.assertEqual(first.source_id, second.source_id)
+        self.assertEqual(SourceCode.objects.count(), 1)
+        self.assertEqual(Submission.objects.get(pk=second.pk).code, SOURCES['python'])
+
+    def test_legacy_rows_read_the_old_column(self):
+        submission = Submission.objects.create(user=self.user, problem=self.problem, language='python',
+                                               legacy_code='print(1)\n')
+        self.assertIsNone(submission.source_id)
+        self.assertEqual(Submission.objects.get(pk=submission.pk).code, 'print(1)\n')
+
+
+@override_settings(JUDGE_BACKEND='local')
+class ArchiveTests(SubmissionTestMixin, TestCase):
+    """archive_submissions and the lookups that fall back to the archive"""
+
+    def archive(self, days=30):
+        call_command('archive_submissions', older_than_days=days, sleep=0, stdout=StringIO())
+
+    def test_old_finished_submissions_move_to_the_archive(self):
+        old = self.submit('print(1)\n', age_days=60)
+        pending = self.submit('print(2)\n', status='Pending', age_days=60)
+        recent = self.submit('print(3)\n')
+        self.archive()
+
+        self.assertEqual(list(ArchivedSubmission.objects.values_list('id', flat=True)), [old.id])
+        self.assertEqual(set(Submission.objects.values_list('id', flat=True)), {pending.id, recent.id})
+        archived = ArchivedSubmission.objects.get()
+        self.assertEqual(archived.code, 'print(1)\n')
+        self.assertEqual(archived.source_id, old.source_id)
+        self.assertLess(archived.created_at, timezone.now() - timedelta(days=59))
+
+    def test_legacy_rows_get_a_blob_when_archived(self):
+        legacy = Submission.objects.create(user=self.user, problem=self.problem, language='python',
+                                           status='Accepted', legacy_code='print(4)\n')
+        Submission.objects.filter(pk=legacy.pk).update(created_at=timezone.now() - timedelta(days=60))
+        self.archive()
+        self.assertEqual(ArchivedSubmission.objects.get(pk=legacy.pk).code, 'print(4)\n')
+
+    def test_archiving_twice_is_harmless(self):
+        self.submit('print(1)\n', age_days=60)
+        self.archive()
+        self.archive()
+        self.assertEqual(ArchivedSubmission.objects.count(), 1)
+
+    def test_detail_falls_back_to_the_archive(self):
+        old = self.submit('print(1)\n', age_days=60)
+        self.archive()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f'/api/submissions/{old.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], old.id)
+        self.assertEqual(response.data['code'], 'print(1)\n')
+
+        client.force_authenticate(self.other)
+        self.assertEqual(client.get(f'/api/submissions/{old.id}/').status_code, 404)
+
+
+@override_settings(JUDGE_BACKEND='local', RATE_LIMIT_ENABLED=False)
+class SubmitErrorTests(SubmissionTestMixin, TransactionTestCase):
+    """Submissions the judge couldn't run"""
+
+    def setUp(self):
+        # Async views query from executor threads, so rows are committed
+        self.setUpTestData()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def submit_code(self):
+        return self.client.post('/api/submissions/', {
+            'problem': self.problem.pk, 'code': 'print(1)', 'language': 'python'
+        }, format='json')
+
+    @override_settings(SUBMISSION_OUTPUT_EXCERPT=50)
+    def test_judge_failure_is_clipped_and_logged(self):
+        ProblemTestCase.objects.create(problem=self.problem, input_data='1', expected_output='1')
+        with mock.patch('submissions.views.get_async_judge_service', side_effect=RuntimeError('x' * 1000)), \
+                self.assertLogs('submissions', 'ERROR') as logs:
+            response = self.submit_code()
+        self.assertEqual(response.data['status'], 'Internal Error')
+        self.assertEqual(response.data['error_message'], '...' + 'x' * 50)
+        self.assertIn('x' * 1000, '\n'.join(logs.output))
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_unjudged_submission_pins_the_user(self):
+        response = self.submit_code()
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(cache.get(PIN_KEY.format(self.user.pk)))
+
+
+class OutputTests(TestCase):
+    """Excerpts kept of a failed test's output"""
+
+    def test_first_difference(self):
+        self.assertIsNone(first_difference('1\n2\n', '1\n2'))
+        self.assertIsNone(first_difference('1 \n2', '1\n2'))
+        self.assertEqual(first_difference('1\n3\n', '1\n2\n'), 2)
+        self.assertEqual(first_difference('1\n', '1\n2\n'), 2)
+
+    @override_settings(SUBMISSION_OUTPUT_EXCERPT=4)
+    def test_clip(self):
+        self.assertEqual(clip('abcd'), 'abcd')
+        self.assertEqual(clip('abcdef'), 'abcd...')
+        self.assertEqual(clip('abcdef', tail=True), '...cdef')
@@ -4,6 +4,7 @@ from .views import (
     SubmissionDetailView,
     UserSubmissionsView,
     ProblemSubmissionsView,
+    SubmissionExportView,
     RunCodeView
 )
 
@@ -13,6 +14,7 @@ urlpatterns = [
     path('<int:pk>/', SubmissionDetailView.as_view(), name='submission_detail'),
     path('user/', UserSubmissionsView.as_view(), name='user_submissions'),
     path('problem/<int:problem_id>/', ProblemSubmissionsView.as_view(), name='problem_submissions'),
+    path('export/', SubmissionExportView.as_view(), name='submission_export'),
     
     # Run code without submitting
     path('run/<int:problem_id>/', RunCodeView.as_view(), name='run_code'),
@@ -1,74 +1,111 @@
+import logging
+
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Submission
+from backend import routers
+from backend.async_views import AsyncAPIView, AsyncViewMixin, database_sync_to_async
+from backend.pagination import KeysetPagination
+from backend.projection import SparseFieldsViewMixin
+from backend.tracing import span, start_trace
+from .models import ArchivedSubmission, Submission
 from .serializers import (
     SubmissionSerializer,
     SubmissionCreateSerializer,
     SubmissionResultSerializer
 )
-from .judge0_service import Judge0Service
+from .export import FORMATS, aexport_stream, export_stream, parse_bound
+from .judge0_service import get_async_judge_service
+from .output import clip, failure_details
 from problems.models import Problem, TestCase
 
+logger = logging.getLogger('submissions')
+
+# Model paths read by each SubmissionSerializer field, for ?fields= projection
+SUBMISSION_FIELD_SOURCES = {
+    'code': ('legacy_code', 'source__language', 'source__codec', 'source__data'),
+    'problem_title': ('problem__title',),
+    'user_username': ('user__username',),
+}
+
 
-class SubmissionCreateView(generics.CreateAPIView):
+class SubmissionCreateView(AsyncViewMixin, generics.GenericAPIView):
     """Create and execute a code submission"""
     
     serializer_class = SubmissionCreateSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = 'submit'
     
-    def create(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        # Validation looks up the problem
+        await database_sync_to_async(serializer.is_valid)(raise_exception=True)
         
         # Create submission
-        submission = serializer.save(user=request.user, status='Processing')
+        submission = await database_sync_to_async(serializer.save)(user=request.user, status='Processing')
+        
+        with start_trace(
+            'submission',
+            submission_id=submission.id,
+            problem_id=submission.problem_id,
+            language=submission.language
+        ) as trace:
+            judged = await self.execute(submission)
+            trace.attributes['status'] = submission.status
+        
+        data = await database_sync_to_async(lambda: SubmissionResultSerializer(submission).data)()
+        if not judged:
+            # Still a write, which the routing middleware only pins for on success
+            routers.pin_to_primary(request.user.pk)
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    async def execute(self, submission):
+        """Judge a saved submission; False if its problem has no test cases"""
         
         # Get problem and test cases
-        problem = submission.problem
-        test_cases = TestCase.objects.filter(problem=problem)
+        with span('fetch_test_cases'):
+            test_cases = await database_sync_to_async(list)(
+                TestCase.objects.filter(problem_id=submission.problem_id)
+            )
         
-        if not test_cases.exists():
+        if not test_cases:
             submission.status = 'Internal Error'
             submission.error_message = 'No test cases found for this problem'
-            submission.save()
-            return Response(
-                SubmissionResultSerializer(submission).data,
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            with span('save'):
+                await database_sync_to_async(self.save_unjudged)(submission)
+            return False
         
         # Execute submission
         try:
-            judge0 = Judge0Service()
+            judge0 = get_async_judge_service()
             passed = 0
-            total = test_cases.count()
+            total = len(test_cases)
             submission.total_test_cases = total
             
-            for test_case in test_cases:
-                result = judge0.run_test_case(
-                    code=submission.code,
-                    language=submission.language,
-                    input_data=test_case.input_data,
-                    expected_output=test_case.expected_output
-                )
+            for index, test_case in enumerate(test_cases):
+                with span('test_case', index=index):
+                    result = await judge0.run_test_case(
+                        code=submission.code,
+                        language=submission.language,
+                        input_data=test_case.input_data,
+                        expected_output=test_case.expected_output
+                    )
                 
                 if result['status'] == 'Accepted':
                     passed += 1
                 else:
                     # Store first failed test case
                     if not submission.failed_test_case:
-                        submission.failed_test_case = {
-                            'input': test_case.input_data,
-                            'expected': test_case.expected_output,
-                            'output': result.get('stdout', ''),
-                            'error': result.get('error_message', ''),
-                            'is_sample': test_case.is_sample
-                        }
+                        submission.failed_test_case = failure_details(test_case, result)
                     
                     # Set submission status based on error type
                     submission.status = result['status']
-                    submission.error_message = result.get('error_message', '')
+                    submission.error_message = clip(result.get('error_message', ''), tail=True)
                     break
             
             # Update submission results
@@ -83,66 +120,144 @@ class SubmissionCreateView(generics.CreateAPIView):
             if result.get('memory'):
                 submission.memory = result['memory']
             
-            submission.save()
-            
-            # Update statistics
-            submission.update_problem_stats()
-            if submission.status == 'Accepted':
-                submission.update_user_stats()
+            with span('save'):
+                await database_sync_to_async(self.save_judged)(submission)
             
         except Exception as e:
+            logger.exception('Judging submission %s failed', submission.id)
             submission.status = 'Internal Error'
-            submission.error_message = str(e)
-            submission.save()
+            submission.error_message = clip(str(e), tail=True)
+            with span('save'):
+                await database_sync_to_async(submission.save)()
         
-        return Response(
-            SubmissionResultSerializer(submission).data,
-            status=status.HTTP_201_CREATED
-        )
+        with span('update_activity_stats'):
+            await database_sync_to_async(submission.update_activity_stats)()
+        return True
+    
+    @staticmethod
+    def save_unjudged(submission):
+        submission.save()
+        submission.update_activity_stats()
+    
+    @staticmethod
+    def save_judged(submission):
+        submission.save()
+        
+        # Update statistics
+        submission.update_problem_stats()
+        if submission.status == 'Accepted':
+            submission.update_user_stats()
 
 
 class SubmissionDetailView(generics.RetrieveAPIView):
     """Get submission details"""
     
-    queryset = Submission.objects.all()
+    queryset = Submission.objects.select_related('source', 'problem')
     serializer_class = SubmissionResultSerializer
     permission_classes = (permissions.IsAuthenticated,)
     
     def get_queryset(self):
         # Users can only see their own submissions
         return self.queryset.filter(user=self.request.user)
+    
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            # Old submissions live in the archive table under the same ID
+            return get_object_or_404(
+                ArchivedSubmission.objects.select_related('source', 'problem'),
+                user=self.request.user,
+                pk=self.kwargs.get(self.lookup_field)
+            )
 
 
-class UserSubmissionsView(generics.ListAPIView):
+class UserSubmissionsView(SparseFieldsViewMixin, generics.ListAPIView):
     """List all submissions for a user"""
     
     serializer_class = SubmissionSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
+    field_sources = SUBMISSION_FIELD_SOURCES
+    # Keyset pagination reads these from every row
+    always_load = ('id', 'created_at')
+    allow_token_user = True
     
     def get_queryset(self):
-        return Submission.objects.filter(user=self.request.user)
+        return self.project_queryset(Submission.objects.filter(user_id=self.request.user.pk))
 
 
-class ProblemSubmissionsView(generics.ListAPIView):
+class ProblemSubmissionsView(SparseFieldsViewMixin, generics.ListAPIView):
     """List all submissions for a specific problem by the current user"""
     
     serializer_class = SubmissionSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
+    field_sources = SUBMISSION_FIELD_SOURCES
+    # Keyset pagination reads these from every row
+    always_load = ('id', 'created_at')
+    allow_token_user = True
     
     def get_queryset(self):
         problem_id = self.kwargs.get('problem_id')
-        return Submission.objects.filter(
-            user=self.request.user,
+        return self.project_queryset(Submission.objects.filter(
+            user_id=self.request.user.pk,
             problem_id=problem_id
+        ))
+
+
+class SubmissionExportView(APIView):
+    """Stream submissions as NDJSON or CSV for analytics (admin only)"""
+    
+    permission_classes = (permissions.IsAdminUser,)
+    
+    def get(self, request):
+        params = request.query_params
+        # 'format' is reserved by DRF for renderer selection
+        fmt = params.get('output', 'ndjson')
+        if fmt not in FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start = parse_bound(params.get('start'))
+            end = parse_bound(params.get('end'), end=True)
+            problem_id = int(params['problem']) if params.get('problem') else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        compress = params.get('gzip') in ('1', 'true')
+        # An ASGI server buffers a sync iterator whole before sending it
+        stream_export = aexport_stream if isinstance(request._request, ASGIRequest) else export_stream
+        stream = stream_export(
+            fmt=fmt,
+            compress=compress,
+            include_code=params.get('include_code') in ('1', 'true'),
+            start=start,
+            end=end,
+            problem_id=problem_id,
+            status=params.get('status'),
+            include_archived=params.get('include_archived') in ('1', 'true'),
         )
+        
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        filename = f'submissions.{fmt}'
+        if compress:
+            content_type = 'application/gzip'
+            filename += '.gz'
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 
-class RunCodeView(APIView):
+class RunCodeView(AsyncAPIView):
     """Run code against sample test cases without submitting"""
     
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = 'run_code'
     
-    def post(self, request, problem_id):
+    async def post(self, request, problem_id):
         code = request.data.get('code')
         language = request.data.get('language')
         
@@ -152,11 +267,15 @@ class RunCodeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        with start_trace('run', problem_id=problem_id, language=language):
+            return await self.run(code, language, problem_id)
+    
+    async def run(self, code, language, problem_id):
         # Get sample test cases
-        problem = get_object_or_404(Problem, pk=problem_id)
-        sample_tests = TestCase.objects.filter(problem=problem, is_sample=True)
+        with span('fetch_test_cases'):
+            sample_tests = await database_sync_to_async(self.get_sample_tests)(problem_id)
         
-        if not sample_tests.exists():
+        if not sample_tests:
             return Response(
                 {'error': 'No sample test cases found'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -164,25 +283,26 @@ class RunCodeView(APIView):
         
         # Run against sample test cases
         try:
-            judge0 = Judge0Service()
+            judge0 = get_async_judge_service()
             results = []
             
-            for test_case in sample_tests:
-                result = judge0.run_test_case(
-                    code=code,
-                    language=language,
-                    input_data=test_case.input_data,
-                    expected_output=test_case.expected_output
-                )
+            for index, test_case in enumerate(sample_tests):
+                with span('test_case', index=index):
+                    result = await judge0.run_test_case(
+                        code=code,
+                        language=language,
+                        input_data=test_case.input_data,
+                        expected_output=test_case.expected_output
+                    )
                 
                 results.append({
-                    'input': test_case.input_data,
-                    'expected_output': test_case.expected_output,
-                    'actual_output': result.get('stdout', ''),
+                    'input': clip(test_case.input_data),
+                    'expected_output': clip(test_case.expected_output),
+                    'actual_output': clip(result.get('stdout', '')),
                     'status': result['status'],
                     'runtime': result.get('runtime'),
                     'memory': result.get('memory'),
-                    'error': result.get('error_message', ''),
+                    'error': clip(result.get('error_message', ''), tail=True),
                 })
             
             return Response({'results': results}, status=status.HTTP_200_OK)
@@ -192,3 +312,8 @@ class RunCodeView(APIView):
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @staticmethod
+    def get_sample_tests(problem_id):
+        problem = get_object_or_404(Problem, pk=problem_id)
+        return list(TestCase.objects.filter(problem=problem, is_sample=True))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, UserStats
 
 
 @admin.register(User)
@@ -13,3 +13,10 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Statistics', {'fields': ('solved_count', 'points', 'bio', 'avatar')}),
     )
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_submissions', 'accepted_submissions', 'current_streak', 'longest_streak', 'last_active_date')
+    search_fields = ('user__username',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,144 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.routers import note_user
+
+SHARED_CACHE_KEY = 'users:auth:{}'
+
+# Claims copied from the user into every token, read back by token users
+SNAPSHOT_CLAIMS = ('username', 'is_staff')
+
+
+def add_snapshot_claims(token, user):
+    """Embed the fields read-only endpoints need, so they can skip the user lookup"""
+    for claim in SNAPSHOT_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserCache:
+    """Users loaded by JWT authentication, kept for AUTH_USER_CACHE_TTL seconds.
+
+    Each process keeps its own entries; with AUTH_USER_CACHE_SHARED the
+    shared cache backs them, so a user loaded by one worker is a cache hit
+    in the others. Saving or deleting a user drops both copies (see
+    users/signals.py); other processes may serve their local copy until
+    it expires, which is why the TTL is short.
+    """
+
+    max_entries = 10000
+
+    def __init__(self):
+        self.entries = {}
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 0)
+
+    @property
+    def shared(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SHARED', False)
+
+    def get(self, user_id):
+        if not self.ttl:
+            return None
+        key = str(user_id)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            # Requests may modify request.user, so each gets its own copy
+            return copy.copy(entry[1])
+
+        if self.shared:
+            user = cache.get(SHARED_CACHE_KEY.format(key))
+            if user is not None:
+                self.store_local(key, user)
+                return copy.copy(user)
+        return None
+
+    def set(self, user):
+        if not self.ttl:
+            return
+        key = str(user.pk)
+        # Related objects (e.g. stats) have their own freshness; don't pin them
+        user = copy.copy(user)
+        user._state.fields_cache = {}
+        self.store_local(key, user)
+        if self.shared:
+            cache.set(SHARED_CACHE_KEY.format(key), user, self.ttl)
+
+    def store_local(self, key, user):
+        if len(self.entries) >= self.max_entries:
+            now = time.monotonic()
+            self.entries = {k: entry for k, entry in self.entries.items() if entry[0] > now}
+            if len(self.entries) >= self.max_entries:
+                self.entries = {}
+        self.entries[key] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, user_id):
+        key = str(user_id)
+        self.entries.pop(key, None)
+        if self.shared:
+            cache.delete(SHARED_CACHE_KEY.format(key))
+
+    def clear(self):
+        self.entries = {}
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that looks users up in ``user_cache`` first.
+
+    Views that set ``allow_token_user = True`` get a ``TokenUser`` built
+    from the token's snapshot claims on safe requests when
+    AUTH_TOKEN_SNAPSHOT is enabled, with no lookup at all. Such views must
+    only read ``id``, ``username`` and ``is_staff`` from ``request.user``.
+    """
+
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # Users who just wrote something read from the primary, this lookup included
+        note_user(user_id)
+
+        if self.use_snapshot(validated_token):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            user_cache.set(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    def use_snapshot(self, validated_token):
+        if not getattr(settings, 'AUTH_TOKEN_SNAPSHOT', False):
+            return False
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return False
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        if not getattr(view, 'allow_token_user', False):
+            return False
+        return all(claim in validated_token for claim in SNAPSHOT_CLAIMS)
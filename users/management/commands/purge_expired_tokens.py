@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in small batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Tokens deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between batches')
+    
+    def handle(self, *args, **options):
+        # Expired tokens fail verification anyway, so nothing needs them
+        now = timezone.now()
+        purged = 0
+    
+        while True:
+            deleted = self.purge_batch(now, options['batch_size'])
+            if not deleted:
+                break
+            purged += deleted
+            self.stdout.write(f'Purged {purged} tokens')
+    
+            if options['sleep']:
+                time.sleep(options['sleep'])
+    
+        self.stdout.write(self.style.SUCCESS(f'Done: {purged} expired tokens purged'))
+    
+    def purge_batch(self, now, batch_size):
+        with transaction.atomic():
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lt=now)
+                .order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        return len(ids)
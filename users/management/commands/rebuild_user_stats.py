@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from users.models import UserStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed user statistics from submission history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild the given user ID (repeatable)')
+    
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            stats, _ = UserStats.objects.get_or_create(user_id=user_id)
+            stats.rebuild()
+            rebuilt += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {rebuilt} user(s)'))
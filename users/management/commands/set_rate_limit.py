@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.throttling import OVERRIDES_KEY, PERIODS, parse_rate
+
+
+class Command(BaseCommand):
+    help = 'Override a RATE_LIMITS scope at runtime (needs a shared cache to reach other processes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scope', nargs='?', help='throttle_scope to change, e.g. submit')
+        parser.add_argument('--user', help="Rate per authenticated user, e.g. 10/min ('off' to disable)")
+        parser.add_argument('--ip', help="Rate per client IP, e.g. 30/min ('off' to disable)")
+        parser.add_argument('--reset', action='store_true', help='Drop the overrides of this scope')
+
+    def handle(self, *args, **options):
+        overrides = cache.get(OVERRIDES_KEY) or {}
+        scope = options['scope']
+
+        if scope:
+            if scope not in settings.RATE_LIMITS:
+                raise CommandError(f"Unknown scope '{scope}', choose from {', '.join(settings.RATE_LIMITS)}")
+            if options['reset']:
+                overrides.pop(scope, None)
+            else:
+                changes = {kind: options[kind] for kind in ('user', 'ip') if options[kind]}
+                for kind, rate in changes.items():
+                    if rate == 'off':
+                        changes[kind] = None
+                    else:
+                        self.validate(rate)
+                overrides[scope] = {**overrides.get(scope, {}), **changes}
+            cache.set(OVERRIDES_KEY, overrides, None)
+
+        for name, limits in settings.RATE_LIMITS.items():
+            effective = {**limits, **overrides.get(name, {})}
+            marker = ' (overridden)' if name in overrides else ''
+            self.stdout.write(f'{name}: {json.dumps(effective)}{marker}')
+
+    def validate(self, rate):
+        try:
+            count, period = rate.split('/')
+            if period.strip()[0] not in PERIODS or int(count) < 1:
+                raise ValueError
+            parse_rate(rate)
+        except (ValueError, IndexError):
+            raise CommandError(f"Invalid rate '{rate}', expected e.g. 10/min")
@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_submissions', models.IntegerField(default=0)),
+                ('accepted_submissions', models.IntegerField(default=0)),
+                ('by_language', models.JSONField(blank=True, default=dict)),
+                ('by_difficulty', models.JSONField(blank=True, default=dict)),
+                ('calendar', models.JSONField(blank=True, default=dict)),
+                ('current_streak', models.IntegerField(default=0)),
+                ('longest_streak', models.IntegerField(default=0)),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'user stats',
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+# UserStats.CALENDAR_DAYS when this migration was written
+CALENDAR_DAYS = 366
+BATCH_SIZE = 500
+
+
+def add_counts(breakdowns, rows):
+    for user_id, value, total, accepted in rows:
+        entry = breakdowns.setdefault(user_id, {}).setdefault(value, {'total': 0, 'accepted': 0})
+        entry['total'] += total
+        entry['accepted'] += accepted
+
+
+def build_stats(UserStats, user_id, by_language, by_difficulty, days):
+    """Counters for one user, as UserStats.rebuild would compute them"""
+    stats = UserStats(
+        user_id=user_id,
+        total_submissions=sum(entry['total'] for entry in by_language.values()),
+        accepted_submissions=sum(entry['accepted'] for entry in by_language.values()),
+        by_language=by_language,
+        by_difficulty=by_difficulty,
+    )
+    previous = None
+    for day in sorted(days):
+        stats.current_streak = stats.current_streak + 1 if previous and (day - previous).days == 1 else 1
+        stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+        previous = day
+    stats.last_active_date = previous
+    cutoff = previous - timedelta(days=CALENDAR_DAYS - 1)
+    stats.calendar = {day.isoformat(): count for day, count in sorted(days.items()) if day >= cutoff}
+    return stats
+
+
+def backfill_user_stats(apps, schema_editor):
+    """Precompute statistics for users who submitted before UserStats existed"""
+    User = apps.get_model('users', 'User')
+    UserStats = apps.get_model('users', 'UserStats')
+    models = (apps.get_model('submissions', 'Submission'), apps.get_model('submissions', 'ArchivedSubmission'))
+    accepted = Count('id', filter=Q(status='Accepted'))
+
+    user_ids = User.objects.filter(stats__isnull=True).order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        batch = list(user_ids.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1]
+
+        by_language, by_difficulty, days = {}, {}, {}
+        for model in models:
+            finished = model.objects.filter(user_id__in=batch).exclude(status__in=('Pending', 'Processing')).order_by()
+            add_counts(by_language, finished.values_list('user_id', 'language').annotate(
+                total=Count('id'), accepted=accepted
+            ))
+            add_counts(by_difficulty, finished.values_list('user_id', 'problem__difficulty').annotate(
+                total=Count('id'), accepted=accepted
+            ))
+            for user_id, day, count in finished.annotate(day=TruncDate('created_at')).values_list(
+                'user_id', 'day'
+            ).annotate(count=Count('id')):
+                user_days = days.setdefault(user_id, {})
+                user_days[day] = user_days.get(day, 0) + count
+
+        UserStats.objects.bulk_create(
+            [
+                build_stats(UserStats, user_id, by_language[user_id], by_difficulty[user_id], days[user_id])
+                for user_id in batch if user_id in by_language
+            ],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_stats'),
+        ('submissions', '0003_archived_submission'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
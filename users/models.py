@@ -28,22 +28,23 @@ class User(AbstractUser):
     
     def update_stats(self):
         """Update user statistics based on accepted submissions"""
-        from submissions.models import Submission
+        from submissions.models import ArchivedSubmission, Submission
         
-        # Count unique solved problems
-        solved_problems = Submission.objects.filter(
+        # Unique solved problems, including archived submissions
+        solved_problem_ids = set(Submission.objects.filter(
             user=self,
             status='Accepted'
-        ).values('problem').distinct().count()
+        ).order_by().values_list('problem_id', flat=True).union(
+            ArchivedSubmission.objects.filter(
+                user=self,
+                status='Accepted'
+            ).order_by().values_list('problem_id', flat=True)
+        ).order_by())
         
-        self.solved_count = solved_problems
+        self.solved_count = len(solved_problem_ids)
         
         # Calculate points (Easy: 10, Medium: 20, Hard: 30)
         from problems.models import Problem
-        solved_problem_ids = Submission.objects.filter(
-            user=self,
-            status='Accepted'
-        ).values_list('problem_id', flat=True).distinct()
         
         total_points = 0
         for problem in Problem.objects.filter(id__in=solved_problem_ids):
@@ -56,3 +57,129 @@ class User(AbstractUser):
         
         self.points = total_points
         self.save()
+
+
+class UserStats(models.Model):
+    """Precomputed submission statistics and activity calendar for a user"""
+    
+    # Days of daily submission counts kept for the activity calendar
+    CALENDAR_DAYS = 366
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    
+    total_submissions = models.IntegerField(default=0)
+    accepted_submissions = models.IntegerField(default=0)
+    by_language = models.JSONField(default=dict, blank=True)  # {language: {'total': n, 'accepted': n}}
+    by_difficulty = models.JSONField(default=dict, blank=True)  # {difficulty: {'total': n, 'accepted': n}}
+    
+    # Activity calendar and streaks
+    calendar = models.JSONField(default=dict, blank=True)  # {'YYYY-MM-DD': count}
+    current_streak = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'user stats'
+    
+    def __str__(self):
+        return f"Stats for {self.user_id}"
+    
+    @classmethod
+    def record(cls, submission):
+        """Fold a finished submission into its user's statistics"""
+        from django.db import transaction
+        
+        with transaction.atomic():
+            stats, created = cls.objects.get_or_create(user_id=submission.user_id)
+            if created:
+                # First row for this user: count their earlier history too, saved submission included
+                stats.rebuild()
+                return stats
+            stats = cls.objects.select_for_update().get(user_id=submission.user_id)
+            stats.add_submission(submission)
+            stats.save()
+        return stats
+    
+    def add_submission(self, submission):
+        """Apply a single submission to the counters without saving"""
+        from django.utils import timezone
+        
+        accepted = submission.status == 'Accepted'
+        self.total_submissions += 1
+        if accepted:
+            self.accepted_submissions += 1
+        
+        self._increment(self.by_language, submission.language, accepted)
+        self._increment(self.by_difficulty, submission.problem.difficulty, accepted)
+        
+        day = timezone.localdate(submission.created_at)
+        key = day.isoformat()
+        self.calendar[key] = self.calendar.get(key, 0) + 1
+        self._trim_calendar(day)
+        
+        if self.last_active_date is None or day > self.last_active_date:
+            if self.last_active_date is not None and (day - self.last_active_date).days == 1:
+                self.current_streak += 1
+            else:
+                self.current_streak = 1
+            self.last_active_date = day
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+    
+    def rebuild(self):
+        """Recompute every counter from the user's full submission history"""
+        import heapq
+        from submissions.models import ArchivedSubmission, Submission
+        
+        self.total_submissions = 0
+        self.accepted_submissions = 0
+        self.by_language = {}
+        self.by_difficulty = {}
+        self.calendar = {}
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.last_active_date = None
+        
+        history = []
+        for model in (ArchivedSubmission, Submission):
+            history.append(model.objects.filter(
+                user_id=self.user_id
+            ).exclude(
+                status__in=('Pending', 'Processing')
+            ).select_related('problem').only(
+                'user_id', 'status', 'language', 'created_at', 'problem__difficulty'
+            ).order_by('created_at').iterator(chunk_size=2000))
+        
+        for submission in heapq.merge(*history, key=lambda submission: submission.created_at):
+            self.add_submission(submission)
+        self.save()
+    
+    def get_current_streak(self):
+        """Current streak, which lapses once a full day passes without activity"""
+        from django.utils import timezone
+        
+        if self.last_active_date is None:
+            return 0
+        if (timezone.localdate() - self.last_active_date).days > 1:
+            return 0
+        return self.current_streak
+    
+    def get_acceptance_rate(self):
+        if self.total_submissions == 0:
+            return 0
+        return round((self.accepted_submissions / self.total_submissions) * 100, 2)
+    
+    @staticmethod
+    def _increment(breakdown, key, accepted):
+        entry = breakdown.setdefault(key, {'total': 0, 'accepted': 0})
+        entry['total'] += 1
+        if accepted:
+            entry['accepted'] += 1
+    
+    def _trim_calendar(self, today):
+        from datetime import timedelta
+        
+        cutoff = (today - timedelta(days=self.CALENDAR_DAYS - 1)).isoformat()
+        if min(self.calendar) < cutoff:
+            self.calendar = {day: count for day, count in self.calendar.items() if day >= cutoff}
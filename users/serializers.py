@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from .authentication import add_snapshot_claims
+from .models import UserStats
+from .tokens import RefreshToken
 
 User = get_user_model()
 
@@ -40,25 +45,54 @@ class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile with additional statistics"""
     
     total_submissions = serializers.SerializerMethodField()
+    accepted_submissions = serializers.SerializerMethodField()
     acceptance_rate = serializers.SerializerMethodField()
+    languages = serializers.SerializerMethodField()
+    difficulties = serializers.SerializerMethodField()
+    calendar = serializers.SerializerMethodField()
+    current_streak = serializers.SerializerMethodField()
+    longest_streak = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name',
                   'bio', 'avatar', 'solved_count', 'points', 'created_at',
-                  'total_submissions', 'acceptance_rate')
+                  'total_submissions', 'accepted_submissions', 'acceptance_rate',
+                  'languages', 'difficulties', 'calendar',
+                  'current_streak', 'longest_streak')
         read_only_fields = ('id', 'username', 'email', 'solved_count', 
                             'points', 'created_at')
     
+    def get_stats(self, obj):
+        # Precomputed row, absent until the user's first finished submission
+        try:
+            return obj.stats
+        except UserStats.DoesNotExist:
+            return UserStats(user=obj)
+    
     def get_total_submissions(self, obj):
-        return obj.submissions.count()
+        return self.get_stats(obj).total_submissions
+    
+    def get_accepted_submissions(self, obj):
+        return self.get_stats(obj).accepted_submissions
     
     def get_acceptance_rate(self, obj):
-        total = obj.submissions.count()
-        if total == 0:
-            return 0
-        accepted = obj.submissions.filter(status='Accepted').count()
-        return round((accepted / total) * 100, 2)
+        return self.get_stats(obj).get_acceptance_rate()
+    
+    def get_languages(self, obj):
+        return self.get_stats(obj).by_language
+    
+    def get_difficulties(self, obj):
+        return self.get_stats(obj).by_difficulty
+    
+    def get_calendar(self, obj):
+        return self.get_stats(obj).calendar
+    
+    def get_current_streak(self, obj):
+        return self.get_stats(obj).get_current_streak()
+    
+    def get_longest_streak(self, obj):
+        return self.get_stats(obj).longest_streak
 
 
 class LeaderboardSerializer(serializers.ModelSerializer):
@@ -69,3 +103,19 @@ class LeaderboardSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'avatar', 'solved_count', 'points', 'rank')
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Login serializer whose tokens carry the user snapshot claims"""
+    
+    token_class = RefreshToken
+    
+    @classmethod
+    def get_token(cls, user):
+        return add_snapshot_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Refresh serializer checking the blacklist through the in-memory filter"""
+    
+    token_class = RefreshToken
@@ -0,0 +1,115 @@
+import importlib
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from problems.models import Problem
+from submissions.models import ArchivedSubmission, SourceCode, Submission
+
+from .models import UserStats
+from .tokens import BloomFilter, RefreshToken, blacklist_filter
+
+
+class BloomFilterTests(TestCase):
+    """Membership of the blacklist's Bloom filter"""
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, 0.01)
+        values = [f'jti-{i}' for i in range(5000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_false_positive_rate_stays_near_the_target(self):
+        for error_rate in (0.01, 0.001):
+            with self.subTest(error_rate=error_rate):
+                bloom = BloomFilter(5000, error_rate)
+                for i in range(5000):
+                    bloom.add(f'jti-{i}')
+                trials = 50000
+                false_positives = sum(f'other-{i}' in bloom for i in range(trials))
+                self.assertLessEqual(false_positives / trials, error_rate * 2)
+
+    def test_empty_filter_contains_nothing(self):
+        bloom = BloomFilter(0, 0.01)
+        self.assertNotIn('jti', bloom)
+
+
+class BlacklistTests(TestCase):
+    """Blacklist checks through the filter, confirmed against the table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('alice', 'alice@example.com', 'Test-pass-123')
+
+    def setUp(self):
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
+
+    def test_unlisted_token_is_accepted(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(RefreshToken(str(token))['jti'], token['jti'])
+
+    def test_blacklisted_token_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    def test_token_blacklisted_after_the_filter_was_built_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        RefreshToken(str(token))
+        # Blacklisted by another process: this filter never saw it
+        BlacklistedToken.objects.create(token=token.outstand()[0])
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+
+class UserStatsBackfillTests(TestCase):
+    """Statistics for users whose history predates UserStats"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('alice', 'alice@example.com', 'Test-pass-123')
+        cls.idle = get_user_model().objects.create_user('bob', 'bob@example.com', 'Test-pass-123')
+        easy = Problem.objects.create(title='Two Sum', slug='two-sum', description='Add',
+                                      difficulty='Easy', category='array')
+        hard = Problem.objects.create(title='Median', slug='median', description='Find',
+                                      difficulty='Hard', category='array')
+        now = timezone.now()
+        history = [
+            (easy, 'python', 'Accepted', 400), (hard, 'cpp', 'Wrong Answer', 3), (hard, 'cpp', 'Accepted', 2),
+            (easy, 'java', 'Runtime Error', 2), (easy, 'python', 'Accepted', 0), (hard, 'python', 'Pending', 0),
+        ]
+        for problem, language, status, days in history:
+            submission = Submission.objects.create(user=cls.user, problem=problem, language=language,
+                                                   status=status, legacy_code='pass')
+            Submission.objects.filter(pk=submission.pk).update(created_at=now - timedelta(days=days))
+        old = Submission.objects.get(created_at__lt=now - timedelta(days=300))
+        ArchivedSubmission.objects.create(source=SourceCode.store('pass', 'python'),
+                                          **{field: getattr(old, field) for field in ArchivedSubmission.COPIED_FIELDS})
+        old.delete()
+
+    def test_backfill_matches_rebuild(self):
+        backfill = importlib.import_module('users.migrations.0003_backfill_user_stats')
+        backfill.backfill_user_stats(apps, None)
+        self.assertFalse(UserStats.objects.filter(user=self.idle).exists())
+
+        backfilled = UserStats.objects.get(user=self.user)
+        rebuilt = UserStats(user=self.user)
+        rebuilt.rebuild()
+        for field in ('total_submissions', 'accepted_submissions', 'by_language', 'by_difficulty',
+                      'calendar', 'current_streak', 'longest_streak', 'last_active_date'):
+            self.assertEqual(getattr(backfilled, field), getattr(rebuilt, field), field)
+        self.assertEqual((backfilled.total_submissions, backfilled.longest_streak), (5, 2))
+
+    def test_first_recorded_submission_counts_earlier_history(self):
+        submission = Submission.objects.filter(user=self.user).latest('created_at')
+        stats = UserStats.record(submission)
+        self.assertEqual(stats.total_submissions, 5)
+        self.assertEqual(UserStats.record(submission).total_submissions, 6)
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from backend.cache import cache_is_shared
+
+# Set in the shared cache when a token is blacklisted, until every
+# process has rebuilt its filter from the database
+RECENT_KEY = 'users:blacklisted:{}'
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.capacity = capacity
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class BlacklistFilter:
+    """Per-process Bloom filter of the JTIs of unexpired blacklisted tokens.
+
+    A JTI the filter has never seen is not blacklisted, so most checks
+    never reach the database; a hit is confirmed against the blacklist
+    table. The filter is rebuilt every TOKEN_BLACKLIST_FILTER_REFRESH
+    seconds, when it fills up, and tokens blacklisted by this process are
+    added straight away. Tokens blacklisted by other processes since the
+    last rebuild are found through a short-lived marker in the shared
+    cache. Tokens issued since the last rebuild, and every token when the
+    cache is per process, are always checked against the table.
+    """
+
+    def __init__(self):
+        self.bloom = None
+        self.built_at = 0
+        # Wall clock time the filter's snapshot was taken, to compare with token iat
+        self.snapshot_at = 0
+        self.lock = threading.Lock()
+
+    @property
+    def refresh_interval(self):
+        return settings.TOKEN_BLACKLIST_FILTER_REFRESH
+
+    def get_bloom(self):
+        bloom = self.bloom
+        if bloom is None or bloom.count >= bloom.capacity or time.monotonic() - self.built_at > self.refresh_interval:
+            with self.lock:
+                if self.bloom is bloom:
+                    self.rebuild()
+                bloom = self.bloom
+        return bloom
+
+    def rebuild(self):
+        snapshot_at = time.time()
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        # Headroom for the tokens blacklisted until the next rebuild
+        bloom = BloomFilter(max(len(jtis) * 2, 10000), settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom, self.built_at, self.snapshot_at = bloom, time.monotonic(), snapshot_at
+
+    def might_contain(self, jti, issued_at=None):
+        if jti in self.get_bloom():
+            return True
+        if not cache_is_shared() or issued_at is None or issued_at >= self.snapshot_at:
+            # Markers from other processes can't be seen, or the token is newer than the filter
+            return True
+        return bool(cache.get(RECENT_KEY.format(jti)))
+
+    def add(self, jti):
+        if self.bloom is not None:
+            self.bloom.add(jti)
+        cache.set(RECENT_KEY.format(jti), True, self.refresh_interval * 2)
+
+    def reset(self):
+        self.bloom = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token whose blacklist checks go through ``blacklist_filter``"""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.might_contain(jti, self.payload.get('iat')):
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        token = self.outstand()[0]
+        blacklisted = BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+    def outstand(self):
+        # The token's user ID is trusted as is, saving a user lookup
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+                'created_at': self.current_time,
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
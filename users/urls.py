@@ -1,7 +1,8 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
     UserRegistrationView,
+    TokenObtainPairView,
+    TokenRefreshView,
     UserProfileView,
     UserDetailView,
     LeaderboardView,
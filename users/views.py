@@ -1,10 +1,15 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView as BaseTokenObtainPairView
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 from django.contrib.auth import get_user_model
 from django.db.models import Window, F
 from django.db.models.functions import RowNumber
+from backend.cache import TieredCache
+from backend.pagination import absolute_links, relative_links
+from .authentication import add_snapshot_claims
+from .tokens import RefreshToken
 from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
@@ -14,6 +19,10 @@ from .serializers import (
 
 User = get_user_model()
 
+# Points change with every accepted submission; a short delay is acceptable
+LEADERBOARD_CACHE_TIMEOUT = 30
+leaderboard_cache = TieredCache('users:leaderboard', LEADERBOARD_CACHE_TIMEOUT)
+
 
 class UserRegistrationView(generics.CreateAPIView):
     """User registration endpoint"""
@@ -21,6 +30,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = UserRegistrationSerializer
+    throttle_scope = 'auth'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -28,7 +38,7 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = add_snapshot_claims(RefreshToken.for_user(user), user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -37,6 +47,18 @@ class UserRegistrationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class TokenObtainPairView(BaseTokenObtainPairView):
+    """Login endpoint returning an access and refresh token pair"""
+    
+    throttle_scope = 'auth'
+
+
+class TokenRefreshView(BaseTokenRefreshView):
+    """Exchange a refresh token for a new pair"""
+    
+    throttle_scope = 'auth'
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """User profile view and update"""
     
@@ -50,7 +72,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 class UserDetailView(generics.RetrieveAPIView):
     """Public user profile view"""
     
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('stats')
     serializer_class = UserProfileSerializer
     permission_classes = (permissions.AllowAny,)
 
@@ -70,6 +92,13 @@ class LeaderboardView(generics.ListAPIView):
         ).order_by('-points', '-solved_count')[:100]
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Links are cached relative and made absolute per request, so any Host header shares one entry
+        key = request.query_params.get('page', '1')
+        build = super().list
+        data = leaderboard_cache.get_or_set(key, lambda: relative_links(build(request, *args, **kwargs).data))
+        return Response(absolute_links(data, request))
 
 
 class LogoutView(APIView):